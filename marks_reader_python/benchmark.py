@@ -0,0 +1,229 @@
+"""
+Throughput benchmarks for the marks reader
+
+Generates synthetic classes with synth_gradebook at several sizes and
+measures decode records/sec (full, and projected to the config's marks),
+rows/sec for each CSV writer and the wall time of export_to_excel and the
+write-only export_class. Each run is appended to a JSON history file; a
+metric more than --tolerance worse than its best result in any earlier run
+is reported as a regression and the run exits with status 1.
+
+Usage:
+    py benchmark.py [--sizes 1000 10000 100000] [--history benchmark_history.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from marks_reader import (class_output_paths, iter_student_records, read_config_file,
+                          stream_class_to_csv, write_attendance_csv, write_marks_csv,
+                          write_transposed_csv)
+from synth_gradebook import generate_class
+
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_HISTORY = 'benchmark_history.json'
+
+# Metrics where a smaller value is better; every other metric is a rate
+LOWER_IS_BETTER = {'excel_seconds', 'excel_fast_seconds'}
+
+
+def best_time(func, repeat):
+    """Run func `repeat` times and return the fastest wall time in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_size(num_students, work_dir, repeat=3, excel=True, num_marks=15):
+    """
+    Benchmark one synthetic class
+
+    Args:
+        num_students: Number of students in the class
+        work_dir: Scratch directory for the generated and exported files
+        repeat: Timing repetitions (the fastest is kept)
+        excel: Also time export_to_excel (needs openpyxl)
+        num_marks: Assessments in the generated class
+
+    Returns:
+        dict: Metric name -> value (rates are per second)
+    """
+    class_code = f"BENCH{num_students}"
+    rec_file, txt_file = generate_class(work_dir, class_code, num_students, num_marks, seed=num_students)
+    config = read_config_file(txt_file)
+    with open(rec_file, 'rb') as f:
+        data = f.read()
+    students = [student for student in iter_student_records(data) if student['name']]
+    marks_csv, attendance_csv, transposed_csv = class_output_paths(work_dir, class_code)
+
+    results = {}
+    seconds = best_time(lambda: sum(1 for _ in iter_student_records(data)), repeat)
+    results['decode_records_per_sec'] = num_students / seconds
+    seconds = best_time(lambda: sum(1 for _ in iter_student_records(data, config)), repeat)
+    results['projected_decode_records_per_sec'] = num_students / seconds
+    seconds = best_time(lambda: write_marks_csv(students, config, marks_csv), repeat)
+    results['marks_csv_rows_per_sec'] = num_students / seconds
+    seconds = best_time(lambda: write_attendance_csv(students, attendance_csv), repeat)
+    results['attendance_csv_rows_per_sec'] = num_students / seconds
+    seconds = best_time(lambda: write_transposed_csv(students, config, transposed_csv), repeat)
+    results['transposed_csv_rows_per_sec'] = num_students / seconds
+    paths = class_output_paths(work_dir, class_code)
+    seconds = best_time(lambda: stream_class_to_csv(rec_file, config, paths), repeat)
+    results['streamed_csv_rows_per_sec'] = num_students / seconds
+
+    if excel:
+        from export_to_excel import export_class, export_to_excel
+        write_marks_csv(students, config, marks_csv)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['excel_seconds'] = best_time(lambda: export_to_excel(class_code, work_dir, work_dir), 1)
+        excel_file = os.path.join(work_dir, f"{class_code}_fast.xlsx")
+        results['excel_fast_seconds'] = best_time(lambda: export_class(students, excel_file, config), 1)
+
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, excel=True):
+    """
+    Benchmark every size in a temporary directory
+
+    Returns:
+        dict: str(size) -> metrics dict
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            results[str(size)] = benchmark_size(size, work_dir, repeat, excel)
+    return results
+
+
+def load_history(path):
+    """Return the list of previous runs stored at path ([] if there is none)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+        f.write('\n')
+
+
+def best_results(history):
+    """
+    The best value of every metric over a list of runs
+
+    Comparing against the best rather than the last run means a regressed
+    run, once appended, does not become the baseline that hides it.
+
+    Args:
+        history: Runs as stored by save_history
+
+    Returns:
+        dict: str(size) -> metric -> best value
+    """
+    best = {}
+    for run in history:
+        for size, metrics in run['results'].items():
+            size_best = best.setdefault(size, {})
+            for metric, value in metrics.items():
+                old = size_best.get(metric)
+                if old is None or (value < old if metric in LOWER_IS_BETTER else value > old):
+                    size_best[metric] = value
+    return best
+
+
+def find_regressions(previous, current, tolerance=0.2):
+    """
+    Compare two runs' results
+
+    Args:
+        previous: Results to compare against, e.g. best_results(history)
+                  (str(size) -> metrics)
+        current: Results of this run
+        tolerance: Allowed fractional slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        list: (size, metric, previous value, current value) for every metric
+        that got worse by more than the tolerance
+    """
+    regressions = []
+    for size, metrics in current.items():
+        for metric, value in metrics.items():
+            old = previous.get(size, {}).get(metric)
+            if old is None:
+                continue
+            if metric in LOWER_IS_BETTER:
+                worse = value > old * (1 + tolerance)
+            else:
+                worse = value < old * (1 - tolerance)
+            if worse:
+                regressions.append((size, metric, old, value))
+    return regressions
+
+
+def format_results(results):
+    lines = []
+    for size, metrics in results.items():
+        lines.append(f"{size} students:")
+        for metric, value in metrics.items():
+            lines.append(f"  {metric:30} {value:14,.3f}" if metric in LOWER_IS_BETTER
+                         else f"  {metric:30} {value:14,.0f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the marks reader on synthetic classes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="class sizes in students (default: 1000 10000 100000)")
+    parser.add_argument('--repeat', type=int, default=3, help="timing repetitions, fastest kept")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown against the previous run (default 0.2 = 20%%)")
+    parser.add_argument('--no-excel', action='store_true', help="skip the export_to_excel timing")
+    args = parser.parse_args(argv)
+
+    excel = not args.no_excel
+    if excel:
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            print("openpyxl not installed, skipping export_to_excel timing")
+            excel = False
+
+    results = run_benchmarks(args.sizes, args.repeat, excel)
+    print(format_results(results))
+
+    history = load_history(args.history)
+    regressions = find_regressions(best_results(history), results, args.tolerance)
+    history.append({
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    })
+    save_history(args.history, history)
+    print(f"\nResults appended to {args.history}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for size, metric, old, new in regressions:
+            print(f"  {size} students {metric}: {old:,.3f} -> {new:,.3f}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
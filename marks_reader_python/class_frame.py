@@ -0,0 +1,175 @@
+"""
+Columnar representation of a decoded class
+
+A ClassFrame holds one class as NumPy columns instead of a list of record
+dicts: a students x num_marks float64 matrix, category/term/final arrays and
+fixed-width string columns. Only the mark slots the config uses are decoded.
+"""
+
+import csv
+
+import numpy as np
+
+from marks_reader import (FIELDS_BY_NAME, RECORD_SIZE, marks_csv_header,
+                          read_config_file, transposed_row_labels)
+from real48 import decode_real48_array
+
+
+def _string_column(records, name):
+    """Decode one Pascal string field of every record into a fixed-width column"""
+    field = FIELDS_BY_NAME[name]
+    lengths = np.minimum(records[:, field.offset], field.length)
+    chars = records[:, field.offset + 1:field.offset + 1 + field.length]
+    values = [row[:length].tobytes().decode('latin-1').strip() for row, length in zip(chars, lengths)]
+    return np.array(values, dtype=f'U{field.length}')
+
+
+def _real_columns(records, name, count):
+    """Decode the first `count` elements of a real field of every record"""
+    field = FIELDS_BY_NAME[name]
+    raw = records[:, field.offset:field.offset + 6 * count]
+    return decode_real48_array(raw.reshape(len(records), count, 6))
+
+
+def _integer_column(records, name):
+    """Decode a scalar integer field of every record"""
+    field = FIELDS_BY_NAME[name]
+    return records[:, field.offset:field.offset + 2].copy().view('<i2')[:, 0]
+
+
+def format_marks(values):
+    """
+    Format an array of marks like marks_reader.format_mark
+
+    Args:
+        values: float array of any shape
+
+    Returns:
+        numpy.ndarray: str array, '' where there is no mark
+    """
+    values = np.asarray(values, dtype=np.float64)
+    text = np.char.mod('%.1f', values)
+    return np.where((values < 0) | (values >= 999), '', text)
+
+
+class ClassFrame:
+    """
+    Columnar class data
+
+    Attributes:
+        config: Configuration dict from read_config_file
+        names, studentnos, homeforms, telnos: fixed-width str arrays
+        marks: float64 array (students x num_marks)
+        catmarks: float64 array (students x num_cat)
+        termmarks: float64 array (students x num_terms)
+        finalmarks: float64 array (students,)
+        absences, lates: int16 arrays (students,)
+
+    Missing marks keep the reader's convention (-1.0 for "no mark").
+    """
+
+    def __init__(self, config, names, studentnos, homeforms, telnos,
+                 marks, catmarks, termmarks, finalmarks, absences, lates):
+        self.config = config
+        self.names = names
+        self.studentnos = studentnos
+        self.homeforms = homeforms
+        self.telnos = telnos
+        self.marks = marks
+        self.catmarks = catmarks
+        self.termmarks = termmarks
+        self.finalmarks = finalmarks
+        self.absences = absences
+        self.lates = lates
+
+    @classmethod
+    def from_buffer(cls, data, config, skip_empty=True):
+        """
+        Build a ClassFrame straight from the contents of a .rec file
+
+        Args:
+            data: bytes-like object holding the .rec file
+            config: Configuration dict from read_config_file
+            skip_empty: Drop records with an empty name, as the CSV export does
+
+        Returns:
+            ClassFrame
+        """
+        count = len(data) // RECORD_SIZE
+        records = np.frombuffer(data, dtype=np.uint8, count=count * RECORD_SIZE).reshape(count, RECORD_SIZE)
+
+        names = _string_column(records, 'name')
+        if skip_empty:
+            keep = names != ''
+            records = records[keep]
+            names = names[keep]
+
+        return cls(
+            config,
+            names,
+            _string_column(records, 'studentno'),
+            _string_column(records, 'homeform'),
+            _string_column(records, 'telno'),
+            _real_columns(records, 'marks', config['num_marks']),
+            _real_columns(records, 'catmarks', config['num_cat']),
+            _real_columns(records, 'termmarks', config['num_terms']),
+            _real_columns(records, 'finalmark', 1)[:, 0],
+            _integer_column(records, 'absences'),
+            _integer_column(records, 'lates'),
+        )
+
+    @classmethod
+    def from_files(cls, rec_file, txt_file, skip_empty=True):
+        """
+        Build a ClassFrame from a .rec/.txt pair
+
+        Args:
+            rec_file: Path to .rec binary file
+            txt_file: Path to .txt configuration file
+            skip_empty: Drop records with an empty name
+
+        Returns:
+            ClassFrame
+        """
+        config = read_config_file(txt_file)
+        with open(rec_file, 'rb') as f:
+            data = f.read()
+        return cls.from_buffer(data, config, skip_empty)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def nbytes(self):
+        """Total size of the column arrays in bytes"""
+        columns = (self.names, self.studentnos, self.homeforms, self.telnos, self.marks,
+                   self.catmarks, self.termmarks, self.finalmarks, self.absences, self.lates)
+        return sum(column.nbytes for column in columns)
+
+    def mark_table(self):
+        """
+        All mark columns in marks CSV order
+
+        Returns:
+            numpy.ndarray: students x (num_marks + num_cat + num_terms + 1)
+        """
+        return np.hstack([self.marks, self.catmarks, self.termmarks, self.finalmarks[:, None]])
+
+    def write_marks_csv(self, path):
+        """Write the {CLASS}_marks.csv layout (students as rows)"""
+        cells = format_marks(self.mark_table()).tolist()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(marks_csv_header(self.config))
+            for name, studentno, homeform, row in zip(self.names.tolist(), self.studentnos.tolist(),
+                                                       self.homeforms.tolist(), cells):
+                writer.writerow([name, studentno, homeform] + row)
+
+    def write_transposed_csv(self, path):
+        """Write the {CLASS}_marks_transposed.csv layout (students as columns)"""
+        cells = format_marks(self.mark_table().T).tolist()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Assignment'] + self.names.tolist())
+            for label, row in zip(transposed_row_labels(self.config), cells):
+                writer.writerow([label] + row)
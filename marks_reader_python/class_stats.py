@@ -0,0 +1,216 @@
+"""
+Class statistics
+
+Computes, for every assessment, category and the final mark of a class,
+the mean, median, standard deviation, percentiles, completion rate and a
+10-bin histogram, all as percentages, in one vectorized pass over the
+class's ClassFrame. Each assessment's mean is checked against the
+'average' the gradebook stored in the .txt config.
+
+Usage:
+    py class_stats.py [--classes-dir DIR] [--output-dir DIR]
+"""
+
+import argparse
+import csv
+import os
+import warnings
+
+import numpy as np
+
+from class_frame import ClassFrame
+from marks_reader import find_class_files, marks_csv_header
+
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 10  # 0-10%, 10-20%, ..., 90-100% (and above)
+
+# The config averages are stored to one decimal, so a computed mean within
+# half a unit of the last place (plus float noise) agrees with it
+AVERAGE_TOLERANCE = 0.051
+
+STATS_HEADER = ['Class Code', 'Column', 'Kind', 'Out Of', 'Count', 'Completion Rate', 'Mean %', 'Median %',
+                'Std Dev %'] + [f'P{p} %' for p in PERCENTILES if p != 50] + \
+               ['Config Average %', 'Off Config Average', 'Histogram']
+
+
+def percent_table(frame):
+    """
+    Every mark of a class as a percentage
+
+    Args:
+        frame: ClassFrame
+
+    Returns:
+        tuple: (students x columns float64 array, NaN for no mark;
+        list of (label, kind, out of) per column)
+    """
+    config = frame.config
+    totals = np.array([mark['total'] for mark in config['marks']], dtype=np.float64)
+    weights = np.array([weight for _, weight in config['categories']], dtype=np.float64)
+    out_of = np.concatenate([totals, weights, [100.0]])
+    raw = np.hstack([frame.marks, frame.catmarks, frame.finalmarks[:, None]])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table = raw * 100 / out_of
+    table[(raw < 0) | (raw >= 999) | (out_of <= 0)] = np.nan
+
+    labels = marks_csv_header(config)[3:]
+    columns = [(label, 'assessment', total) for label, total in zip(labels, totals)]
+    columns += [(label, 'category', weight) for label, weight in zip(labels[config['num_marks']:], weights)]
+    columns.append((labels[-1], 'final', 100.0))
+    return table, columns
+
+
+def class_stats(frame, tolerance=AVERAGE_TOLERANCE):
+    """
+    Statistics of every assessment, category and the final mark of a class
+
+    Args:
+        frame: ClassFrame
+        tolerance: Largest difference between an assessment's mean and its
+                   config average that is not flagged
+
+    Returns:
+        list: One dict per column with label, kind, out_of, count,
+        completion, mean, median, std, percentiles (list, one per PERCENTILES),
+        histogram (list of counts), config_average and off_average
+    """
+    table, columns = percent_table(frame)
+    students, width = table.shape
+    counts = np.count_nonzero(~np.isnan(table), axis=0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # columns without marks give NaN
+        means = np.nanmean(table, axis=0)
+        stds = np.nanstd(table, axis=0)
+        if students:
+            percentiles = np.nanpercentile(table, PERCENTILES, axis=0)
+        else:
+            percentiles = np.full((len(PERCENTILES), width), np.nan)
+
+    rows, cols = np.nonzero(~np.isnan(table))
+    bins = np.clip((table[rows, cols] // (100 / HISTOGRAM_BINS)).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+    histograms = np.bincount(cols * HISTOGRAM_BINS + bins,
+                             minlength=width * HISTOGRAM_BINS).reshape(width, HISTOGRAM_BINS)
+
+    averages = [mark['average'] for mark in frame.config['marks']]
+    result = []
+    for i, (label, kind, out_of) in enumerate(columns):
+        config_average = averages[i] if kind == 'assessment' else None
+        mean = None if counts[i] == 0 else float(means[i])
+        result.append({
+            'label': label,
+            'kind': kind,
+            'out_of': float(out_of),
+            'count': int(counts[i]),
+            'completion': float(counts[i] / students) if students else 0.0,
+            'mean': mean,
+            'median': None if mean is None else float(percentiles[PERCENTILES.index(50), i]),
+            'std': None if mean is None else float(stds[i]),
+            'percentiles': [None if mean is None else float(percentiles[j, i]) for j in range(len(PERCENTILES))],
+            'histogram': histograms[i].tolist(),
+            'config_average': config_average,
+            'off_average': (config_average is not None and mean is not None
+                            and abs(mean - config_average) > tolerance),
+        })
+    return result
+
+
+def summary_stats(column_stats, num_students):
+    """
+    Class-level values for the extended _summary.csv
+
+    Args:
+        column_stats: Result of class_stats
+        num_students: Number of students in the class
+
+    Returns:
+        dict: final_count, final_mean, final_median, final_std,
+        completion (share of assessment cells with a mark) and off_average
+        (labels of assessments whose mean is off the config average)
+    """
+    final = column_stats[-1]
+    assessments = [column for column in column_stats if column['kind'] == 'assessment']
+    cells = num_students * len(assessments)
+    return {
+        'final_count': final['count'],
+        'final_mean': final['mean'],
+        'final_median': final['median'],
+        'final_std': final['std'],
+        'completion': sum(column['count'] for column in assessments) / cells if cells else 0.0,
+        'off_average': [column['label'] for column in assessments if column['off_average']],
+    }
+
+
+def class_summary_stats(data, config):
+    """
+    Statistics of a class straight from the contents of its .rec file
+
+    Used by convert_class_to_csv(stats=True), so the statistics come from
+    the buffer the conversion already read and are cached with its summary.
+
+    Args:
+        data: bytes-like object holding the .rec file
+        config: Configuration dict from read_config_file
+
+    Returns:
+        tuple: (summary_stats result, class_stats result)
+    """
+    frame = ClassFrame.from_buffer(data, config)
+    column_stats = class_stats(frame)
+    return summary_stats(column_stats, len(frame)), column_stats
+
+
+def format_percent(value):
+    return '' if value is None else f'{value:.1f}'
+
+
+def write_stats_csv(results, output_dir):
+    """
+    Write _assessment_stats.csv: one row per assessment, category and final mark
+
+    Args:
+        results: List of (class_code, class_stats result)
+        output_dir: Output directory
+
+    Returns:
+        str: Path of the file
+    """
+    path = os.path.join(output_dir, '_assessment_stats.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(STATS_HEADER)
+        for class_code, column_stats in results:
+            for column in column_stats:
+                writer.writerow(
+                    [class_code, column['label'], column['kind'], f"{column['out_of']:g}", column['count'],
+                     f"{column['completion']:.3f}", format_percent(column['mean']),
+                     format_percent(column['median']), format_percent(column['std'])] +
+                    [format_percent(value) for p, value in zip(PERCENTILES, column['percentiles']) if p != 50] +
+                    [format_percent(column['config_average']), 'YES' if column['off_average'] else '',
+                     ' '.join(str(count) for count in column['histogram'])])
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute per-assessment statistics of every class")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--output-dir', default=r'S:\Chn\classes\csv_exports_python')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = []
+    for rec_file, txt_file in sorted(find_class_files(args.classes_dir)):
+        frame = ClassFrame.from_files(rec_file, txt_file)
+        column_stats = class_stats(frame)
+        results.append((frame.config['class_code'], column_stats))
+        for column in column_stats:
+            if column['off_average']:
+                print(f"  {frame.config['class_code']} {column['label']}: mean {column['mean']:.1f}%, "
+                      f"config average {column['config_average']:.1f}%")
+    print(f"Created {write_stats_csv(results, args.output_dir)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,6 @@
 import struct
 
-def decode_turbo_real(bytes_data):
-    """
-    Decode Turbo Pascal/Delphi 48-bit real (6 bytes)
-    Format: 1 byte exponent + 5 bytes mantissa (39 bits + sign bit)
-    """
-    if len(bytes_data) != 6:
-        return None
-
-    # Unpack the 6 bytes
-    exp_byte = bytes_data[0]
-    mantissa_bytes = bytes_data[1:6]
-
-    # Special case: exponent = 0 means the number is 0 or no mark
-    if exp_byte == 0:
-        return -1.0  # Use -1 to indicate "no mark"
-
-    # Convert mantissa bytes to integer (little-endian)
-    mantissa_int = int.from_bytes(mantissa_bytes, 'little')
-
-    # Extract sign bit (bit 39, which is bit 7 of the 5th byte)
-    sign = 1 if (mantissa_int & 0x8000000000) == 0 else -1
-
-    # Clear the sign bit to get the actual mantissa value
-    mantissa_int = mantissa_int & 0x7FFFFFFFFF
-
-    # Calculate the real exponent (bias is 129 for Turbo Pascal real)
-    exponent = exp_byte - 129
-
-    # Calculate the floating point value
-    # Mantissa is normalized, so we divide by 2^39 and multiply by 2^exponent
-    value = sign * (mantissa_int / (2.0 ** 39)) * (2.0 ** exponent)
-
-    return value
+from real48 import decode_turbo_real
 
 # Test with the actual bytes from the file
 # From offset 0x2B (43): marks start
@@ -1,18 +1,31 @@
 """
 Export class marks to Excel spreadsheet format
+
+export_to_excel converts a class's marks CSV. The faster export_class and
+export_board paths build sheets straight from decoded records or a
+ClassFrame in openpyxl write-only mode, so rows are streamed to the file
+instead of held in memory, and every cell shares one of three named styles.
 """
 
-import sys
+import argparse
+import mmap
+import os
 import csv
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+
+import instrument
+from marks_reader import (find_class_files, iter_student_records, mark_columns, marks_csv_header, read_config_file,
+                          record_count)
 
 
 def export_to_excel(class_code, csv_dir=r'S:\Chn\classes\csv_exports_python', output_dir=r'S:\Chn\classes'):
     """Export class marks to Excel with formatting"""
 
-    csv_file = f"{csv_dir}\\{class_code}_marks.csv"
-    excel_file = f"{output_dir}\\{class_code}_marks.xlsx"
+    csv_file = os.path.join(csv_dir, f"{class_code}_marks.csv")
+    excel_file = os.path.join(output_dir, f"{class_code}_marks.xlsx")
 
     # Read CSV data
     with open(csv_file, 'r') as f:
@@ -48,7 +61,6 @@ def export_to_excel(class_code, csv_dir=r'S:\Chn\classes\csv_exports_python', ou
     ws.column_dimensions['C'].width = 8   # Homeform
 
     # All other columns (use get_column_letter for columns beyond Z)
-    from openpyxl.utils import get_column_letter
     for col in range(4, ws.max_column + 1):
         ws.column_dimensions[get_column_letter(col)].width = 9
 
@@ -62,6 +74,199 @@ def export_to_excel(class_code, csv_dir=r'S:\Chn\classes\csv_exports_python', ou
     print(f"  {ws.max_column - 3} assignments + {ws.max_column - len(rows[0])} summary columns")
 
 
+# Shared cell styles for the write-only export: (name, font, fill, alignment, number format)
+SHEET_STYLES = (
+    ('marks header', Font(bold=True, color="FFFFFF", size=11),
+     PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+     Alignment(horizontal='center', vertical='center'), 'General'),
+    ('marks text', Font(size=11), PatternFill(), Alignment(horizontal='left'), 'General'),
+    ('marks mark', Font(size=11), PatternFill(), Alignment(horizontal='center'), '0.0'),
+)
+
+
+def add_sheet_styles(wb):
+    """Register the shared named styles on a workbook (once per workbook)"""
+    for name, font, fill, alignment, number_format in SHEET_STYLES:
+        if name not in wb.named_styles:
+            wb.add_named_style(NamedStyle(name=name, font=font, fill=fill, alignment=alignment,
+                                          number_format=number_format))
+
+
+def mark_value(m):
+    """Cell value for a mark: rounded as in the CSV, None for no mark"""
+    if m < 0 or m >= 999:
+        return None
+    return round(m, 1)
+
+
+# The record fields a sheet row is built from
+EXPORT_FIELDS = ('name', 'studentno', 'homeform', 'marks', 'catmarks', 'termmarks', 'finalmark')
+
+
+def record_rows(students, config):
+    """
+    Yield (name, studentno, homeform, marks...) rows from record dicts
+
+    Args:
+        students: Iterable of record dicts or RecordViews; empty records are skipped
+        config: Configuration dict from read_config_file
+    """
+    columns = mark_columns(config)
+    for student in students:
+        if not student['name']:
+            continue
+        row = [student['name'], student['studentno'], student['homeform']]
+        for field, i in columns:
+            row.append(mark_value(student[field] if i is None else student[field][i]))
+        yield row
+
+
+def frame_rows(frame):
+    """Yield (name, studentno, homeform, marks...) rows from a ClassFrame"""
+    import numpy as np
+
+    table = frame.mark_table()
+    missing = (table < 0) | (table >= 999)
+    values = np.where(missing, np.nan, np.round(table, 1)).tolist()
+    for name, studentno, homeform, marks in zip(frame.names.tolist(), frame.studentnos.tolist(),
+                                                frame.homeforms.tolist(), values):
+        yield [name, studentno, homeform] + [None if m != m else m for m in marks]
+
+
+def write_class_sheet(wb, config, rows, title=None):
+    """
+    Append one class as a sheet of a write-only workbook
+
+    Args:
+        wb: Workbook(write_only=True) with add_sheet_styles applied
+        config: Configuration dict from read_config_file
+        rows: Iterable of (name, studentno, homeform, marks...) rows
+        title: Sheet title (the class code by default)
+
+    Returns:
+        int: Number of student rows written
+    """
+    ws = wb.create_sheet(title=(title or config['class_code'])[:31])
+    header = marks_csv_header(config)
+
+    # Column widths and panes must be set before the first row is written
+    ws.column_dimensions['A'].width = 25  # Name
+    ws.column_dimensions['B'].width = 12  # Student Number
+    ws.column_dimensions['C'].width = 8   # Homeform
+    for col in range(4, len(header) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 9
+    ws.freeze_panes = 'D2'
+
+    def styled_cell(style, value=None):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([styled_cell('marks header', label) for label in header])
+
+    # Rows are serialized as soon as they are appended, so one styled cell
+    # per column is reused for every row; missing marks are left empty.
+    cells = ([styled_cell('marks text') for _ in range(3)] +
+             [styled_cell('marks mark') for _ in range(len(header) - 3)])
+    count = 0
+    for row in rows:
+        out = []
+        for cell, value in zip(cells, row):
+            if value is None:
+                out.append(None)
+            else:
+                cell.value = value
+                out.append(cell)
+        ws.append(out)
+        count += 1
+    return count
+
+
+def export_class(source, excel_file, config=None):
+    """
+    Export one class to Excel without going through its CSV
+
+    Args:
+        source: A ClassFrame, or an iterable of record dicts / RecordViews
+        excel_file: Output .xlsx path
+        config: Configuration dict (taken from the ClassFrame if omitted)
+
+    Returns:
+        int: Number of students written
+    """
+    if config is None:
+        config = source.config
+    with instrument.stage('export_excel') as step:
+        wb = Workbook(write_only=True)
+        add_sheet_styles(wb)
+        rows = frame_rows(source) if hasattr(source, 'mark_table') else record_rows(source, config)
+        count = write_class_sheet(wb, config, rows)
+        wb.save(excel_file)
+        step.add(records=count)
+    return count
+
+
+def export_board(class_files, excel_file):
+    """
+    Export several classes as the sheets of one board workbook
+
+    Each .rec file is memory-mapped and its records are decoded as the rows
+    are written, so memory does not grow with the number of classes. A file
+    ending in a partial record issues a PartialRecordWarning, as decode_class
+    does, and the partial record is left out.
+
+    Args:
+        class_files: List of (rec_path, txt_path) tuples
+        excel_file: Output .xlsx path
+
+    Returns:
+        list: (class_code, number of students) per sheet
+    """
+    wb = Workbook(write_only=True)
+    add_sheet_styles(wb)
+    sheets = []
+    for rec_file, txt_file in class_files:
+        with instrument.stage('read_config', rec_file) as step:
+            config = read_config_file(txt_file)
+            step.add_file(txt_file)
+        with open(rec_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                continue
+            record_count(size, rec_file)
+            with instrument.stage('export_excel', rec_file) as step, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                count = write_class_sheet(wb, config, record_rows(iter_student_records(buffer, config, EXPORT_FIELDS), config))
+                step.add(records=count, bytes=size)
+        sheets.append((config['class_code'], count))
+    with instrument.stage('save_workbook') as step:
+        wb.save(excel_file)
+        step.add_file(excel_file)
+    return sheets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export class marks to Excel")
+    parser.add_argument('class_code', nargs='?', default='TIK2O1-1',
+                        help="class to export from its marks CSV (default TIK2O1-1)")
+    parser.add_argument('--board', metavar='XLSX',
+                        help="write every class in --classes-dir as sheets of one workbook, from the .rec files")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    instrument.add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    instrument.start(args)
+
+    if args.board:
+        sheets = export_board(sorted(find_class_files(args.classes_dir)), args.board)
+        print(f"Saved to: {args.board}")
+        for class_code, count in sheets:
+            print(f"  {class_code}: {count} students")
+    else:
+        with instrument.stage('export_excel', args.class_code):
+            export_to_excel(args.class_code)
+    if args.profile:
+        instrument.finish(args.profile)
+
+
 if __name__ == '__main__':
-    class_code = sys.argv[1] if len(sys.argv) > 1 else 'TIK2O1-1'
-    export_to_excel(class_code)
+    main()
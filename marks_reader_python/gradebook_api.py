@@ -0,0 +1,356 @@
+"""
+Read-only gradebook JSON API
+
+A small local HTTP service (standard library only) serving decoded
+.rec/.txt data as JSON:
+
+    GET /classes                              every class: code and files
+    GET /classes/{code}                       the class config
+    GET /classes/{code}/students              roster: name, student number, homeform
+    GET /classes/{code}/students/{studentno}  one student's full record
+    GET /classes/{code}/marks                 mark matrix: column titles and one row per student
+
+Decoded classes (compact StudentRecords) are kept in an LRU cache and
+reloaded when the size or mtime of their .rec or .txt changes. Each
+class's ETag is made from those stats, so a request with a matching
+If-None-Match costs two stats and a 304; other repeat requests are served
+from the response bodies cached with the class. The class list is re-read
+from the directory at most every REFRESH_SECONDS. Connections are kept
+alive (HTTP/1.1).
+
+Usage:
+    py gradebook_api.py [--classes-dir DIR] [--port 8765] [--cache-size 64]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from marks_reader import find_class_files, marks_csv_header, open_class, read_config_file
+from sqlite_export import mark_value
+
+
+CACHE_SIZE = 64
+REFRESH_SECONDS = 5.0  # least time between re-listings of the directory for an unknown class
+
+
+def file_signature(rec_file, txt_file):
+    """(rec size, rec mtime_ns, txt size, txt mtime_ns); raises OSError if a file is gone"""
+    rec = os.stat(rec_file)
+    txt = os.stat(txt_file)
+    return rec.st_size, rec.st_mtime_ns, txt.st_size, txt.st_mtime_ns
+
+
+def make_etag(signature):
+    return '"' + '-'.join(f'{value:x}' for value in signature) + '"'
+
+
+def student_json(student, config):
+    """One student's record as JSON-ready data (None for no mark)"""
+    return {
+        'name': student['name'],
+        'studentno': student['studentno'],
+        'homeform': student['homeform'],
+        'telno': student['telno'],
+        'absences': student['absences'] if student['absences'] >= 0 else None,
+        'lates': student['lates'] if student['lates'] >= 0 else None,
+        'marks': [mark_value(m) for m in student['marks'][:config['num_marks']]],
+        'catmarks': [mark_value(m) for m in student['catmarks'][:config['num_cat']]],
+        'termmarks': [mark_value(m) for m in student['termmarks'][:config['num_terms']]],
+        'finalmark': mark_value(student['finalmark']),
+        'comments': list(student['comments']),
+    }
+
+
+class CachedClass:
+    """A decoded class and the JSON bodies already built from it"""
+
+    def __init__(self, rec_file, txt_file, signature):
+        self.config, _, self.students = open_class(rec_file, txt_file, compact=True)
+        self.signature = signature
+        self.etag = make_etag(signature)
+        self.by_studentno = {student['studentno']: student for student in self.students if student['studentno']}
+        self.bodies = {}
+
+    def body(self, resource, key=None):
+        """
+        The encoded JSON of a resource of this class, built once
+
+        Args:
+            resource: 'config', 'students', 'student' or 'marks'
+            key: Student number, for 'student'
+
+        Returns:
+            bytes: The body, or None if the student is not in the class
+        """
+        cache_key = (resource, key)
+        body = self.bodies.get(cache_key)
+        if body is None:
+            data = self.build(resource, key)
+            if data is None:
+                return None
+            body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+            self.bodies[cache_key] = body
+        return body
+
+    def build(self, resource, key):
+        config = self.config
+        if resource == 'config':
+            return config
+        if resource == 'students':
+            return [{'name': s['name'], 'studentno': s['studentno'], 'homeform': s['homeform']}
+                    for s in self.students]
+        if resource == 'student':
+            student = self.by_studentno.get(key)
+            return None if student is None else student_json(student, config)
+        if resource == 'marks':
+            return {
+                'class_code': config['class_code'],
+                'columns': marks_csv_header(config)[3:],
+                'rows': [{'studentno': s['studentno'], 'name': s['name'],
+                          'marks': [mark_value(m) for m in s['marks'][:config['num_marks']]] +
+                                   [mark_value(m) for m in s['catmarks'][:config['num_cat']]] +
+                                   [mark_value(m) for m in s['termmarks'][:config['num_terms']]] +
+                                   [mark_value(s['finalmark'])]}
+                         for s in self.students],
+            }
+        raise KeyError(resource)
+
+
+class GradebookAPI:
+    """
+    Routes API paths to cached class data, independent of the HTTP server
+
+    Usage:
+        api = GradebookAPI(classes_dir)
+        status, headers, body = api.handle('/classes/ICS4M1-1/marks', if_none_match)
+    """
+
+    def __init__(self, classes_dir, cache_size=CACHE_SIZE, recursive=False, clock=time.monotonic):
+        self.classes_dir = classes_dir
+        self.recursive = recursive
+        self.cache_size = cache_size
+        self.clock = clock
+        self.lock = threading.Lock()  # guards cache, files, loading and the counters
+        self.cache = OrderedDict()  # class_code -> CachedClass, least recently used first
+        self.loading = {}           # class_code -> Lock held while the class is decoded
+        self.files = {}             # class_code -> (rec_path, txt_path)
+        self.listed_at = None
+        self.hits = self.misses = self.not_modified = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-list the classes directory and read each class's code"""
+        files = {}
+        for rec_file, txt_file in find_class_files(self.classes_dir, self.recursive):
+            try:
+                files[read_config_file(txt_file)['class_code']] = (rec_file, txt_file)
+            except (OSError, ValueError, IndexError):
+                continue  # unreadable or half-written config
+        self.files = files
+        self.listed_at = self.clock()
+
+    def list_classes(self):
+        """The code -> files of every class, re-listing the directory if the listing is older than REFRESH_SECONDS"""
+        if self.clock() - self.listed_at >= REFRESH_SECONDS:
+            with self.lock:
+                self.refresh()
+        return self.files
+
+    def locate(self, class_code):
+        """The files of a class, re-listing the directory (at most every REFRESH_SECONDS) if unknown"""
+        paths = self.files.get(class_code)
+        if paths is None and self.clock() - self.listed_at >= REFRESH_SECONDS:
+            with self.lock:
+                self.refresh()
+            paths = self.files.get(class_code)
+        return paths
+
+    def get_class(self, class_code):
+        """
+        The current decoded class, from the cache when its files have not changed
+
+        A class is decoded outside the cache lock, so a slow decode does not
+        hold up requests for other classes; concurrent requests for the same
+        class wait on its loading lock and share one decode.
+
+        Returns:
+            CachedClass, or None if there is no such class
+        """
+        paths = self.locate(class_code)
+        if paths is None:
+            return None
+        try:
+            signature = file_signature(*paths)
+        except OSError:
+            with self.lock:
+                self.files.pop(class_code, None)
+                self.cache.pop(class_code, None)
+            return None
+
+        cached = self.cached(class_code, signature)
+        if cached is not None:
+            return cached
+        with self.lock:
+            loading = self.loading.setdefault(class_code, threading.Lock())
+        with loading:
+            cached = self.cached(class_code, signature)  # loaded while this request waited
+            if cached is not None:
+                return cached
+            with self.lock:
+                self.misses += 1
+            cached = CachedClass(paths[0], paths[1], signature)
+            with self.lock:
+                self.cache[class_code] = cached
+                self.cache.move_to_end(class_code)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            return cached
+
+    def cached(self, class_code, signature):
+        """The cached class if it matches the files' signature (counted as a hit), else None"""
+        with self.lock:
+            cached = self.cache.get(class_code)
+            if cached is None or cached.signature != signature:
+                return None
+            self.cache.move_to_end(class_code)
+            self.hits += 1
+            return cached
+
+    def handle(self, path, if_none_match=None):
+        """
+        Answer one GET request
+
+        Args:
+            path: Request path (a query string is ignored)
+            if_none_match: The If-None-Match header, if any
+
+        Returns:
+            tuple: (HTTP status, dict of extra headers, body bytes)
+        """
+        parts = [unquote(part) for part in urlsplit(path).path.split('/') if part]
+        if parts == ['classes']:
+            body = json.dumps([{'class_code': code, 'rec_file': rec_file, 'txt_file': txt_file}
+                               for code, (rec_file, txt_file) in sorted(self.list_classes().items())],
+                              separators=(',', ':')).encode('utf-8')
+            return 200, {}, body
+        if len(parts) < 2 or parts[0] != 'classes':
+            return self.error(404, f"no such resource: {path}")
+
+        class_code = parts[1]
+        route = parts[2:]
+        if route == []:
+            resource, key = 'config', None
+        elif route == ['students']:
+            resource, key = 'students', None
+        elif len(route) == 2 and route[0] == 'students':
+            resource, key = 'student', route[1]
+        elif route == ['marks']:
+            resource, key = 'marks', None
+        else:
+            return self.error(404, f"no such resource: {path}")
+
+        # The ETag only depends on the files' stats, so a 304 needs no decoding
+        paths = self.locate(class_code)
+        if paths is None:
+            return self.error(404, f"no such class: {class_code}")
+        if if_none_match:
+            try:
+                etag = make_etag(file_signature(*paths))
+            except OSError:
+                etag = None
+            if etag is not None and etag in (tag.strip() for tag in if_none_match.split(',')):
+                with self.lock:
+                    self.not_modified += 1
+                return 304, {'ETag': etag}, b''
+
+        try:
+            cached = self.get_class(class_code)
+        except Exception as e:
+            return self.error(500, f"cannot read {class_code}: {e}")
+        if cached is None:
+            return self.error(404, f"no such class: {class_code}")
+        body = cached.body(resource, key)
+        if body is None:
+            return self.error(404, f"no student {key} in {class_code}")
+        return 200, {'ETag': cached.etag}, body
+
+    @staticmethod
+    def error(status, message):
+        return status, {}, json.dumps({'error': message}).encode('utf-8')
+
+
+class GradebookRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler for GradebookAPI"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GradebookAPI/1.0'
+    # Headers and body are separate writes; without TCP_NODELAY the body
+    # waits for the client's delayed ACK on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        status, headers, body = self.server.api.handle(self.path, self.headers.get('If-None-Match'))
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')  # revalidate with the ETag every time
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(classes_dir, host='127.0.0.1', port=8765, cache_size=CACHE_SIZE, recursive=False, verbose=False):
+    """
+    Create (but do not start) the API server
+
+    Args:
+        classes_dir: Directory holding the class files
+        host, port: Address to listen on (port 0 picks a free one)
+        cache_size: Number of decoded classes kept in memory
+        recursive: Also serve classes in subdirectories
+        verbose: Log every request
+
+    Returns:
+        ThreadingHTTPServer: Call serve_forever(); its .api is the GradebookAPI
+    """
+    server = ThreadingHTTPServer((host, port), GradebookRequestHandler)
+    server.daemon_threads = True
+    server.api = GradebookAPI(classes_dir, cache_size, recursive)
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve class data as JSON over HTTP")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="decoded classes kept in memory")
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.classes_dir, args.host, args.port, args.cache_size, args.recursive, args.verbose)
+    print(f"Serving {len(server.api.files)} classes on http://{args.host}:{server.server_address[1]}/classes")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
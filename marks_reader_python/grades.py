@@ -0,0 +1,258 @@
+"""
+Vectorized grade recomputation and what-if reweighting
+
+The gradebook stores category, term and final marks precomputed by the
+Delphi program. A GradeBoard recomputes them for every student of one or
+many classes from the raw marks, each assessment's total and category and
+the category weights:
+
+    category mark = weight * (marks earned / marks possible)
+    final mark    = sum(category marks) * 100 / sum(weights of categories with marks)
+
+A blank mark counts as 0 out of the assessment's total, as the gradebook
+scores it; a category where the student has no mark at all stays blank.
+Only invalid values (>= 999) are left out. The per-category earned/possible
+ratios are computed once for the whole board with a single bincount, so
+reweighting ("what if TESTS were 40%?") is one elementwise pass.
+
+The config does not say which assessments belong to which term, so term
+marks are only checked for single-term classes, where the term mark equals
+the final mark.
+
+Usage:
+    py grades.py [--classes-dir DIR] [--weights TESTS=40,ASSIGN=30]
+"""
+
+import argparse
+import warnings
+
+import numpy as np
+
+from class_frame import ClassFrame
+from marks_reader import find_class_files
+
+
+# Largest difference from a stored mark that is still agreement: the stored
+# values were rounded by the Delphi program, and the CSVs show one decimal
+TOLERANCE = 0.05
+
+
+def present(values):
+    """Mask of real marks (the reader uses -1.0 for no mark, >= 999 for invalid)"""
+    return (values >= 0) & (values < 999)
+
+
+def counted(values):
+    """Mask of marks that count towards a category: real marks and blanks (0 earned), not invalid values"""
+    return values < 999
+
+
+class GradeBoard:
+    """
+    Category and final marks of many classes, recomputed together
+
+    Attributes:
+        frames: The ClassFrames, in order
+        slices: class_code -> slice of that class's students in the board arrays
+        ratios: float64 (students x max categories), earned/possible per
+                category (blanks earn 0), NaN where a category has no marks
+        weights: float64 (students x max categories), each student's class weights
+        stored_catmarks, stored_finals: the values in the .rec files (NaN for no mark)
+    """
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        width = max([frame.config['num_cat'] for frame in self.frames] + [1])
+        self.width = width
+
+        keys, earned, possible, marked = [], [], [], []
+        weights, stored_catmarks, stored_finals = [], [], []
+        self.slices = {}
+        start = 0
+        for frame in self.frames:
+            config = frame.config
+            count = len(frame)
+            self.slices[config['class_code']] = slice(start, start + count)
+
+            totals = np.array([mark['total'] for mark in config['marks']], dtype=np.float64)
+            categories = np.array([mark['category'] - 1 for mark in config['marks']], dtype=np.int64)
+            valid = counted(frame.marks) & ((categories >= 0) & (categories < config['num_cat']))[None, :]
+            rows, cols = np.nonzero(valid)
+            values = frame.marks[rows, cols]
+            is_mark = present(values)
+            keys.append((start + rows) * width + categories[cols])
+            earned.append(np.where(is_mark, values, 0.0))
+            possible.append(totals[cols])
+            marked.append(is_mark.astype(np.float64))
+
+            class_weights = np.zeros(width)
+            class_weights[:config['num_cat']] = [weight for _, weight in config['categories']]
+            weights.append(np.broadcast_to(class_weights, (count, width)))
+
+            catmarks = np.full((count, width), np.nan)
+            catmarks[:, :config['num_cat']] = np.where(present(frame.catmarks), frame.catmarks, np.nan)
+            stored_catmarks.append(catmarks)
+            stored_finals.append(np.where(present(frame.finalmarks), frame.finalmarks, np.nan))
+            start += count
+
+        self.size = start
+        keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+        earned_sums = np.bincount(keys, np.concatenate(earned) if earned else None, minlength=start * width)
+        possible_sums = np.bincount(keys, np.concatenate(possible) if possible else None, minlength=start * width)
+        marked_counts = np.bincount(keys, np.concatenate(marked) if marked else None, minlength=start * width)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.ratios = (earned_sums / possible_sums).reshape(start, width)
+        self.ratios[((possible_sums == 0) | (marked_counts == 0)).reshape(start, width)] = np.nan
+
+        self.weights = np.concatenate(weights) if weights else np.zeros((0, width))
+        self.stored_catmarks = np.concatenate(stored_catmarks) if stored_catmarks else np.zeros((0, width))
+        self.stored_finals = np.concatenate(stored_finals) if stored_finals else np.zeros(0)
+
+    @classmethod
+    def from_files(cls, rec_files):
+        """
+        Build a board from .rec/.txt pairs
+
+        Args:
+            rec_files: List of (rec_path, txt_path) tuples
+
+        Returns:
+            GradeBoard
+        """
+        return cls(ClassFrame.from_files(rec_file, txt_file) for rec_file, txt_file in rec_files)
+
+    def recompute(self, weights=None):
+        """
+        Category and final marks for every student
+
+        Args:
+            weights: students x categories weights (the classes' own by default)
+
+        Returns:
+            tuple: (catmarks, finals) float64 arrays, NaN where there are no marks
+        """
+        if weights is None:
+            weights = self.weights
+        catmarks = weights * self.ratios
+        has_marks = ~np.isnan(self.ratios)
+        used = np.where(has_marks, weights, 0).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            finals = np.where(has_marks, catmarks, 0).sum(axis=1) * 100 / used
+        finals[used == 0] = np.nan
+        return catmarks, finals
+
+    def reweighted(self, by_name=None, by_class=None):
+        """
+        Weights with some categories changed, for what_if
+
+        Args:
+            by_name: {category name: weight}, applied in every class that has
+                     a category of that name
+            by_class: {class_code: [weight per category]}
+
+        Returns:
+            numpy.ndarray: students x categories weights
+        """
+        weights = self.weights.copy()
+        for frame in self.frames:
+            config = frame.config
+            rows = self.slices[config['class_code']]
+            for i, (name, _) in enumerate(config['categories']):
+                if by_name and name in by_name:
+                    weights[rows, i] = by_name[name]
+            if by_class and config['class_code'] in by_class:
+                new = np.asarray(by_class[config['class_code']], dtype=np.float64)
+                weights[rows, :len(new)] = new
+        return weights
+
+    def what_if(self, by_name=None, by_class=None):
+        """
+        Final marks of every student under different category weights
+
+        Args:
+            by_name: {category name: weight}, e.g. {'TESTS': 40}
+            by_class: {class_code: [weight per category]}
+
+        Returns:
+            numpy.ndarray: Final mark per student (NaN where there are no marks)
+        """
+        return self.recompute(self.reweighted(by_name, by_class))[1]
+
+    def class_averages(self, finals):
+        """Mean final mark of each class: {class_code: float}"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # classes with no marks average to NaN
+            return {code: float(np.nanmean(finals[rows])) for code, rows in self.slices.items()}
+
+    def mismatches(self, tolerance=TOLERANCE):
+        """
+        Compare recomputed marks with the stored ones
+
+        A stored mark disagrees if it differs by more than the tolerance, or
+        if exactly one of the stored and recomputed values is missing.
+
+        Args:
+            tolerance: Largest difference treated as agreement
+
+        Returns:
+            list: (class_code, student name, studentno, column, stored, recomputed)
+            per disagreement, with None for a missing value
+        """
+        catmarks, finals = self.recompute()
+        result = []
+        for frame in self.frames:
+            config = frame.config
+            rows = self.slices[config['class_code']]
+            columns = [(f"{name} %", self.stored_catmarks[rows, i], catmarks[rows, i])
+                       for i, (name, _) in enumerate(config['categories'])]
+            columns.append(("Final Mark %", self.stored_finals[rows], finals[rows]))
+            if config['num_terms'] == 1:
+                stored_term = np.where(present(frame.termmarks[:, 0]), frame.termmarks[:, 0], np.nan)
+                columns.append(("Term 1 %", stored_term, finals[rows]))
+
+            for label, stored, computed in columns:
+                stored_missing = np.isnan(stored)
+                computed_missing = np.isnan(computed)
+                with np.errstate(invalid='ignore'):
+                    bad = (stored_missing != computed_missing) | (np.abs(stored - computed) > tolerance)
+                for i in np.nonzero(bad)[0].tolist():
+                    result.append((config['class_code'], str(frame.names[i]), str(frame.studentnos[i]), label,
+                                   None if stored_missing[i] else float(stored[i]),
+                                   None if computed_missing[i] else float(computed[i])))
+        return result
+
+
+def parse_weights(text):
+    """Parse 'TESTS=40,ASSIGN=30' into {'TESTS': 40.0, 'ASSIGN': 30.0}"""
+    weights = {}
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        weights[name.strip()] = float(value)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute category and final marks and try other weights")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--weights', type=parse_weights,
+                        help="what-if category weights by name, e.g. TESTS=40,ASSIGN=30")
+    args = parser.parse_args(argv)
+
+    board = GradeBoard.from_files(sorted(find_class_files(args.classes_dir)))
+    mismatches = board.mismatches()
+    for class_code, name, studentno, label, stored, computed in mismatches:
+        stored = '-' if stored is None else f'{stored:.2f}'
+        computed = '-' if computed is None else f'{computed:.2f}'
+        print(f"  {class_code} {name} ({studentno}) {label}: stored {stored}, recomputed {computed}")
+    print(f"{board.size} students in {len(board.frames)} classes, {len(mismatches)} stored marks disagree")
+
+    if args.weights:
+        before = board.class_averages(board.recompute()[1])
+        after = board.class_averages(board.what_if(by_name=args.weights))
+        print("\nClass average final mark: current -> what-if")
+        for class_code in board.slices:
+            print(f"  {class_code:12} {before[class_code]:6.1f} -> {after[class_code]:6.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Import an edited marks CSV back into a .rec file
+
+Reads a {CLASS}_marks.csv (as written by marks_reader, possibly edited in
+a spreadsheet), matches its rows to records by student number and patches
+only the mark cells whose value changed, in place through a writable
+RecFile. Unchanged records are never written.
+
+Usage:
+    py import_marks.py CLASS.rec CLASS.txt CLASS_marks.csv [--dry-run]
+"""
+
+import argparse
+import csv
+
+from marks_reader import format_mark, mark_columns, marks_csv_header, read_config_file
+from rec_file import RecFile
+
+
+def parse_mark(cell, label, row_number):
+    """
+    Parse a marks CSV cell
+
+    Args:
+        cell: Cell text ('' for no mark)
+        label: Column header, for error messages
+        row_number: CSV line number, for error messages
+
+    Returns:
+        float or None: The mark, None for no mark
+
+    Raises:
+        ValueError: If the cell is not a number
+    """
+    cell = cell.strip()
+    if not cell:
+        return None
+    try:
+        return float(cell)
+    except ValueError:
+        raise ValueError(f"Line {row_number}, {label}: {cell!r} is not a mark") from None
+
+
+def student_keys(rec):
+    """
+    Map student numbers (or names, for records without one) to record indexes
+
+    Args:
+        rec: RecFile
+
+    Returns:
+        dict: key -> record index, for every non-empty record
+
+    Raises:
+        ValueError: If two records share a key
+    """
+    keys = {}
+    for view in rec:
+        if not view['name']:
+            continue
+        key = view['studentno'] or view['name']
+        if key in keys:
+            raise ValueError(f"Student {key} appears twice in {rec.path}")
+        keys[key] = view.index
+    return keys
+
+
+def import_marks_csv(rec_file, txt_file, csv_file, dry_run=False):
+    """
+    Write the changed marks of an edited marks CSV into a .rec file
+
+    A cell is only written when its value, formatted as the CSV export
+    formats marks, differs from the record's, so re-importing an unedited
+    export writes nothing. Columns missing from the CSV are left alone.
+    An empty cell clears the mark; a mark of 0 cannot be stored in a
+    Real48 and also reads back as no mark.
+
+    Args:
+        rec_file: Path to .rec binary file (patched in place)
+        txt_file: Path to .txt configuration file
+        csv_file: Path to the edited marks CSV
+        dry_run: Report the changes without writing them
+
+    Returns:
+        dict: 'changes' (list of (studentno, column, old, new) cell
+        changes), 'records' (number of records changed) and 'unmatched'
+        (CSV student numbers with no record)
+
+    Raises:
+        ValueError: If a cell is not a number or student numbers are ambiguous
+    """
+    config = read_config_file(txt_file)
+    labels = marks_csv_header(config)[3:]
+    columns = mark_columns(config)
+
+    with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = {label: i for i, label in enumerate(header)}
+        targets = [(label, column, positions[label])
+                   for label, column in zip(labels, columns) if label in positions]
+        rows = list(reader)
+
+    changes = []
+    changed_records = set()
+    unmatched = []
+    with RecFile(rec_file, writable=not dry_run) as rec:
+        keys = student_keys(rec)
+        for row_number, row in enumerate(rows, start=2):
+            if not row:
+                continue
+            name, studentno = row[0], row[1] if len(row) > 1 else ''
+            key = studentno or name
+            if key not in keys:
+                unmatched.append(key)
+                continue
+            view = rec[keys[key]]
+            for label, (field, i), position in targets:
+                cell = row[position] if position < len(row) else ''
+                current = view[field] if i is None else view[field][i]
+                old = format_mark(current)
+                value = parse_mark(cell, label, row_number)
+                new = '' if value is None else format_mark(value)
+                if new == old:  # also catches '85' against a stored 85.0
+                    continue
+                if not dry_run:
+                    if i is None:
+                        view[field] = value
+                    else:
+                        view.set_element(field, i, value)
+                changes.append((key, label, old, new))
+                changed_records.add(view.index)
+
+    return {'changes': changes, 'records': len(changed_records), 'unmatched': unmatched}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import an edited marks CSV back into a .rec file")
+    parser.add_argument('rec_file')
+    parser.add_argument('txt_file')
+    parser.add_argument('csv_file')
+    parser.add_argument('--dry-run', action='store_true', help="list the changes without writing them")
+    args = parser.parse_args(argv)
+
+    result = import_marks_csv(args.rec_file, args.txt_file, args.csv_file, args.dry_run)
+    for studentno, label, old, new in result['changes']:
+        print(f"  {studentno} {label}: {old or '(none)'} -> {new or '(none)'}")
+    for studentno in result['unmatched']:
+        print(f"  No record for student {studentno}")
+    verb = "Would change" if args.dry_run else "Changed"
+    print(f"{verb} {len(result['changes'])} marks in {result['records']} records")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Opt-in per-stage instrumentation
+
+Code marks its stages with
+
+    with instrument.stage('decode', rec_file) as stage:
+        ...
+        stage.add(records=len(records), bytes=len(data))
+
+When instrumentation is off (the default) stage() returns one shared
+do-nothing object, so each stage costs a function call and a global lookup.
+Once enable() is called, every stage records wall time, CPU time (of the
+whole process, so background read-ahead threads are included), the records
+and bytes it reports and, with trace_memory, the tracemalloc peak while it
+ran. Totals are kept per stage and per class (the rec_file passed as item),
+and finish() writes them as a JSON report and prints a one-line throughput
+summary.
+
+Stages run in --jobs worker processes are not seen; profile with --jobs 1.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+
+# Stages whose records and bytes are the run's input, for the throughput line
+INPUT_STAGES = ('decode', 'stream_csv', 'export_excel')
+
+_profiler = None
+
+
+class NullStage:
+    """The stage returned while instrumentation is off: does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, records=0, bytes=0):
+        pass
+
+    def add_file(self, path):
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+def stage(name, item=None):
+    """
+    Time a stage of the run, if instrumentation is enabled
+
+    Args:
+        name: Stage name, e.g. 'decode' or 'write_marks_csv'
+        item: The class being processed (its .rec path), or None for a
+              stage of the whole run
+
+    Returns:
+        A context manager yielding an object with add(records, bytes) and
+        add_file(path)
+    """
+    if _profiler is None:
+        return NULL_STAGE
+    return _profiler.stage(name, item)
+
+
+def enable(trace_memory=False):
+    """
+    Start collecting stage timings
+
+    Args:
+        trace_memory: Also record each stage's peak traced memory (tracemalloc
+                      slows Python allocations down, so timings are inflated)
+
+    Returns:
+        Profiler: The profiler now receiving every stage
+    """
+    global _profiler
+    _profiler = Profiler(trace_memory)
+    return _profiler
+
+
+def disable():
+    """Stop collecting; returns the profiler that was active (or None)"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+class StageTotals:
+    """Accumulated measurements of one stage (for one class or the whole run)"""
+
+    __slots__ = ('calls', 'wall', 'cpu', 'records', 'bytes', 'peak')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = self.cpu = 0.0
+        self.records = self.bytes = 0
+        self.peak = None
+
+    def add(self, timing):
+        self.calls += 1
+        self.wall += timing.wall
+        self.cpu += timing.cpu
+        self.records += timing.records
+        self.bytes += timing.bytes
+        if timing.peak is not None:
+            self.peak = max(self.peak or 0, timing.peak)
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'wall_seconds': round(self.wall, 6),
+            'cpu_seconds': round(self.cpu, 6),
+            'records': self.records,
+            'bytes': self.bytes,
+            'peak_memory_bytes': self.peak,
+        }
+
+
+class StageTiming:
+    """One running stage; the object bound by `with instrument.stage(...) as stage`"""
+
+    __slots__ = ('profiler', 'name', 'item', 'wall', 'cpu', 'records', 'bytes', 'peak')
+
+    def __init__(self, profiler, name, item):
+        self.profiler = profiler
+        self.name = name
+        self.item = item
+        self.records = self.bytes = 0
+        self.peak = None
+
+    def add(self, records=0, bytes=0):
+        """Count records and bytes processed by this stage"""
+        self.records += records
+        self.bytes += bytes
+
+    def add_file(self, path):
+        """Count the size of a file read or written by this stage"""
+        try:
+            self.bytes += os.path.getsize(path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        self.profiler.begin(self)
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+        self.profiler.end(self)
+        return False
+
+
+class Profiler:
+    """
+    Collects stage timings per stage and per class
+
+    Usage:
+        profiler = instrument.enable()
+        ...run...
+        instrument.finish('profile.json')
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}   # name -> StageTotals
+        self.classes = {}  # item -> {name: StageTotals}
+        self.open = []     # running stages, innermost last
+        self.started = datetime.now()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.elapsed = None  # (wall, cpu) once stopped
+        self.peak = None
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    def stage(self, name, item=None):
+        return StageTiming(self, name, item)
+
+    def begin(self, timing):
+        if self.trace_memory:
+            # The peak is reset for the new stage, so hand the peak so far to
+            # the stage it interrupts first
+            if self.open:
+                outer = self.open[-1]
+                outer.peak = max(outer.peak or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.open.append(timing)
+
+    def end(self, timing):
+        self.open.pop()
+        if self.trace_memory:
+            timing.peak = max(timing.peak or 0, tracemalloc.get_traced_memory()[1])
+            self.peak = max(self.peak or 0, timing.peak)
+            if self.open:
+                outer = self.open[-1]
+                outer.peak = max(outer.peak or 0, timing.peak)
+        self.stages.setdefault(timing.name, StageTotals()).add(timing)
+        if timing.item is not None:
+            self.classes.setdefault(timing.item, {}).setdefault(timing.name, StageTotals()).add(timing)
+
+    def stop(self):
+        """Fix the run's wall and CPU time and stop tracemalloc if it was started here"""
+        if self.elapsed is not None:
+            return
+        self.elapsed = self.run_time()
+        if self.started_tracing:
+            tracemalloc.stop()
+
+    def run_time(self):
+        """(wall, CPU) seconds of the run so far, or of the whole run once stopped"""
+        if self.elapsed is not None:
+            return self.elapsed
+        return time.perf_counter() - self.wall_start, time.process_time() - self.cpu_start
+
+    def totals(self):
+        """(records, bytes) of the run's input stages"""
+        inputs = [self.stages[name] for name in INPUT_STAGES if name in self.stages]
+        return sum(t.records for t in inputs), sum(t.bytes for t in inputs)
+
+    def report(self):
+        """
+        The measurements as JSON-ready data
+
+        Returns:
+            dict: Run totals, 'stages' (name -> totals) and 'classes'
+            (item -> name -> totals)
+        """
+        records, num_bytes = self.totals()
+        wall, cpu = self.run_time()
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'wall_seconds': round(wall, 6),
+            'cpu_seconds': round(cpu, 6),
+            'trace_memory': self.trace_memory,
+            'peak_memory_bytes': self.peak,
+            'classes_processed': len(self.classes),
+            'records': records,
+            'bytes': num_bytes,
+            'records_per_second': round(records / wall, 1) if wall > 0 else None,
+            'bytes_per_second': round(num_bytes / wall, 1) if wall > 0 else None,
+            'stages': {name: totals.as_dict() for name, totals in self.stages.items()},
+            'classes': {item: {name: totals.as_dict() for name, totals in stages.items()}
+                        for item, stages in self.classes.items()},
+        }
+
+    def write_report(self, path):
+        """Write report() to a JSON file (atomically); returns the path"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=1)
+        os.replace(tmp_path, path)
+        return path
+
+    def summary_line(self):
+        """One line: classes, records, MB, time, throughput and the slowest stage"""
+        report = self.report()
+        wall = report['wall_seconds']
+        megabytes = report['bytes'] / 1e6
+        classes = report['classes_processed']
+        line = (f"Profile: {classes} class{'es' if classes != 1 else ''}, {report['records']:,} records, "
+                f"{megabytes:.1f} MB in {wall:.2f}s wall / {report['cpu_seconds']:.2f}s CPU")
+        if wall > 0:
+            line += f" ({report['records'] / wall:,.0f} records/s, {megabytes / wall:.1f} MB/s)"
+        if self.stages:
+            name, slowest = max(self.stages.items(), key=lambda item: item[1].wall)
+            line += f"; slowest stage {name} {slowest.wall:.2f}s"
+        if self.peak is not None:
+            line += f"; peak traced memory {self.peak / 1e6:.1f} MB"
+        return line
+
+
+def add_profile_arguments(parser):
+    """Add the --profile and --profile-memory options to an argument parser"""
+    parser.add_argument('--profile', metavar='REPORT_JSON',
+                        help="time each stage and class and write the measurements to this JSON file")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile, also record peak memory per stage (tracemalloc, slower)")
+
+
+def start(args):
+    """Enable instrumentation if the command line asked for it; returns the profiler or None"""
+    if not args.profile:
+        return None
+    return enable(args.profile_memory)
+
+
+def finish(report_path):
+    """
+    Stop instrumentation, write the JSON report and print the summary line
+
+    Args:
+        report_path: Where to write the report
+
+    Returns:
+        Profiler: The profiler that was active, or None if none was
+    """
+    profiler = disable()
+    if profiler is None:
+        return None
+    print(profiler.summary_line())
+    print(f"Profile report: {profiler.write_report(report_path)}")
+    return profiler
@@ -0,0 +1,150 @@
+"""
+Incremental conversion manifest
+
+Records, per class, the size, mtime and SHA-256 of the .rec and .txt inputs
+and of every CSV written, together with the class summary. A rerun only
+re-converts classes whose inputs changed or whose outputs are missing or
+modified, and takes the summary of the others from the manifest.
+"""
+
+import hashlib
+import json
+import os
+
+
+MANIFEST_NAME = '_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path):
+    """
+    Size, mtime and hash of a file
+
+    Args:
+        path: File to fingerprint
+
+    Returns:
+        dict: {'size', 'mtime_ns', 'sha256'}
+    """
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': file_hash(path)}
+
+
+def matches(path, recorded):
+    """
+    Check a file against a recorded fingerprint
+
+    Size and mtime are compared first; the file is only hashed when they
+    differ, so an untouched file costs a single stat. A file that was touched
+    but not changed still matches, and the recorded mtime is refreshed.
+
+    Args:
+        path: File to check
+        recorded: Fingerprint dict from fingerprint(), updated in place
+
+    Returns:
+        bool: True if the file exists with the recorded contents
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != recorded['size']:
+        return False
+    if st.st_mtime_ns == recorded['mtime_ns']:
+        return True
+    if file_hash(path) != recorded['sha256']:
+        return False
+    recorded['mtime_ns'] = st.st_mtime_ns
+    return True
+
+
+class ConversionManifest:
+    """
+    Per-class record of inputs, outputs and summaries in an output directory
+
+    Usage:
+        manifest = ConversionManifest(output_dir)
+        if manifest.is_current(rec_file, txt_file):
+            result = manifest.summary(rec_file)
+        else:
+            result = convert_class_to_csv(rec_file, txt_file, output_dir)
+            manifest.record(rec_file, txt_file, result, output_paths)
+        manifest.save()
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.classes = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.classes = data.get('classes', {})
+
+    @staticmethod
+    def key(rec_file):
+        return os.path.normcase(os.path.abspath(rec_file))
+
+    def is_current(self, rec_file, txt_file):
+        """
+        Check whether a class can be skipped
+
+        Args:
+            rec_file: Path to .rec binary file
+            txt_file: Path to .txt configuration file
+
+        Returns:
+            bool: True if neither input changed and every output is intact
+        """
+        entry = self.classes.get(self.key(rec_file))
+        if entry is None:
+            return False
+        inputs = entry['inputs']
+        if not (matches(rec_file, inputs['rec']) and matches(txt_file, inputs['txt'])):
+            return False
+        return all(matches(path, recorded) for path, recorded in entry['outputs'].items())
+
+    def summary(self, rec_file):
+        """Return the cached summary dict of a class (None if it had no students)"""
+        return self.classes[self.key(rec_file)]['summary']
+
+    def record(self, rec_file, txt_file, summary, output_paths=()):
+        """
+        Store the inputs, outputs and summary of a freshly converted class
+
+        Args:
+            rec_file: Path to .rec binary file
+            txt_file: Path to .txt configuration file
+            summary: Result of convert_class_to_csv (None if no students)
+            output_paths: Files written for the class
+        """
+        outputs = {path: fingerprint(path) for path in output_paths}
+        self.classes[self.key(rec_file)] = {
+            'inputs': {'rec': fingerprint(rec_file), 'txt': fingerprint(txt_file)},
+            'outputs': outputs,
+            'summary': summary,
+        }
+
+    def forget(self, rec_file):
+        """Drop a class, e.g. after its conversion failed"""
+        self.classes.pop(self.key(rec_file), None)
+
+    def save(self):
+        """Write the manifest to the output directory"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'classes': self.classes}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
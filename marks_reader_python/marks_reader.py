@@ -5,56 +5,25 @@ Converts Delphi/Turbo Pascal .rec files to CSV format
 Based on ReadMarks.pas from S:\\Chn\\classes\\pascal_reader\\
 """
 
+import argparse
+import mmap
 import struct
 import csv
 import os
+import sys
+import warnings
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
+from collections import deque, namedtuple
+from collections.abc import Mapping
+from itertools import chain, islice
 from pathlib import Path
 
-
-def decode_turbo_real(bytes_data):
-    """
-    Decode Turbo Pascal/Delphi 48-bit real (6 bytes)
-    Format: (-1)^s * (1.m) * 2^(exp-129)
-
-    Byte 0: 8-bit exponent
-    Bytes 1-5: 39-bit mantissa with sign bit
-
-    Args:
-        bytes_data: 6 bytes representing a Turbo Pascal Real48
-
-    Returns:
-        float: Decoded value, or -1.0 for no mark, or None for invalid input
-    """
-    if len(bytes_data) != 6:
-        return None
-
-    exp_byte = bytes_data[0]
-    mantissa_bytes = bytes_data[1:6]
-
-    # Special case: exponent = 0 means the number is 0
-    if exp_byte == 0:
-        return -1.0  # Use -1 to indicate "no mark"
-
-    # Convert mantissa bytes to integer (little-endian)
-    mantissa_int = int.from_bytes(mantissa_bytes, 'little')
-
-    # Extract sign bit (bit 39, which is bit 7 of the 5th byte)
-    sign = 1 if (mantissa_int & 0x8000000000) == 0 else -1
-
-    # Clear the sign bit to get the actual mantissa value
-    mantissa_int = mantissa_int & 0x7FFFFFFFFF
-
-    # Calculate the real exponent (bias is 129 for Turbo Pascal real)
-    exponent = exp_byte - 129
-
-    # The mantissa is normalized with implicit leading 1: (1.m)
-    # This is the CRITICAL fix - we must add 1.0
-    mantissa_value = 1.0 + (mantissa_int / (2.0 ** 39))
-
-    # Calculate the floating point value: (-1)^s * (1.m) * 2^(exp-129)
-    value = sign * mantissa_value * (2.0 ** exponent)
-
-    return value
+import instrument
+import real48
+from manifest import ConversionManifest
+from real48 import decode_turbo_real, encode_mark
 
 
 def read_pascal_string(f, max_len):
@@ -86,7 +55,20 @@ def read_config_file(config_path):
         dict: Configuration data including categories, marks, etc.
     """
     with open(config_path, 'r') as f:
-        lines = f.readlines()
+        return parse_config_text(f.read())
+
+
+def parse_config_text(text):
+    """
+    Parse the contents of a .txt configuration file
+
+    Args:
+        text: The file's contents
+
+    Returns:
+        dict: Configuration data, as from read_config_file
+    """
+    lines = text.splitlines()
 
     # Parse version
     version = float(lines[0].strip())
@@ -140,7 +122,471 @@ def read_config_file(config_path):
     }
 
 
-def read_student_record(f):
+# studentrec40 layout: (field name, Pascal type, length)
+# Strings give their maximum length, arrays their element count and
+# scalars None. The whole record is 796 bytes.
+STUDENTREC40_LAYOUT = (
+    ('name', 'string', 20),
+    ('studentno', 'string', 10),
+    ('homeform', 'string', 10),
+    ('marks', 'real', 100),
+    ('catmarks', 'real', 10),
+    ('termmarks', 'real', 10),
+    ('finalmark', 'real', None),
+    ('telno', 'string', 12),
+    ('absences', 'integer', None),
+    ('lates', 'integer', None),
+    ('comments', 'integer', 5),
+)
+
+RecordField = namedtuple('RecordField', 'name kind length offset size index nitems unpacker')
+
+
+def compile_record_layout(layout):
+    """
+    Compile a record layout into a single struct unpacker
+
+    Strings become a length byte plus the fixed character block, each real
+    array one block of 6-byte values, and integers little-endian shorts.
+    A 'pad' entry of length bytes is skipped by the unpacker ('x') and has
+    no RecordField.
+
+    Args:
+        layout: Sequence of (name, kind, length) tuples
+
+    Returns:
+        tuple: (struct.Struct for the whole record, tuple of RecordField)
+    """
+    fields = []
+    pieces = []
+    offset = 0
+    index = 0
+    for name, kind, length in layout:
+        count = 1 if length is None else length
+        if kind == 'string':
+            fmt, nitems = f'B{length}s', 2
+        elif kind == 'real':
+            fmt, nitems = f'{6 * count}s', 1
+        elif kind == 'integer':
+            fmt, nitems = f'{count}h', count
+        elif kind == 'pad':
+            pieces.append(f'{length}x')
+            offset += length
+            continue
+        else:
+            raise ValueError(f"Unknown field type {kind!r} for {name}")
+        unpacker = struct.Struct('<' + fmt)
+        fields.append(RecordField(name, kind, length, offset, unpacker.size, index, nitems, unpacker))
+        pieces.append(fmt)
+        offset += unpacker.size
+        index += nitems
+    return struct.Struct('<' + ''.join(pieces)), tuple(fields)
+
+
+STUDENTREC40, STUDENTREC40_FIELDS = compile_record_layout(STUDENTREC40_LAYOUT)
+RECORD_SIZE = STUDENTREC40.size
+FIELDS_BY_NAME = {field.name: field for field in STUDENTREC40_FIELDS}
+
+# Config entry giving the number of slots in use of each mark array
+USED_SLOTS = {'marks': 'num_marks', 'catmarks': 'num_cat', 'termmarks': 'num_terms'}
+
+RecordProjection = namedtuple('RecordProjection', 'unpacker fields ends')
+
+
+@lru_cache(maxsize=64)
+def compile_projection(num_marks=None, num_cat=None, num_terms=None, fields=None):
+    """
+    Compile a studentrec40 unpacker that decodes only some of the record
+
+    Mark slots past the given counts and fields not asked for become pad
+    bytes, which struct skips without building a bytes object, and whose
+    Real48 values are never decoded. The record stays RECORD_SIZE bytes.
+
+    Args:
+        num_marks, num_cat, num_terms: Slots in use of marks, catmarks and
+            termmarks (None keeps all of that array)
+        fields: frozenset of field names to decode (None for every field)
+
+    Returns:
+        RecordProjection: (struct.Struct, tuple of RecordField, end of the
+        marks, catmarks and termmarks among the decoded reals)
+    """
+    used = {'marks': num_marks, 'catmarks': num_cat, 'termmarks': num_terms}
+    layout = []
+    for field in STUDENTREC40_FIELDS:
+        if fields is not None and field.name not in fields:
+            layout.append((None, 'pad', field.size))
+            continue
+        count = used.get(field.name)
+        if count is None or count >= field.length:
+            layout.append((field.name, field.kind, field.length))
+        else:
+            count = max(count, 0)
+            layout.append((field.name, field.kind, count))
+            layout.append((None, 'pad', 6 * (field.length - count)))
+    unpacker, projected = compile_record_layout(layout)
+    counts = [field.length for name in USED_SLOTS for field in projected if field.name == name]
+    ends = tuple(sum(counts[:i + 1]) for i in range(len(counts)))
+    return RecordProjection(unpacker, projected, ends)
+
+
+def record_projection(config=None, fields=None):
+    """
+    The unpacker decoding just what a class's outputs use
+
+    Usage:
+        projection = record_projection(config, fields=('name', 'marks'))
+        record = record_from_items(projection.unpacker.unpack_from(data), projection.fields)
+
+    Args:
+        config: Configuration dict; only its num_marks, num_cat and
+                num_terms slots of the mark arrays are decoded (None, or a
+                config without the counts, decodes all 100/10/10)
+        fields: Iterable of field names to decode (None for every field)
+
+    Returns:
+        RecordProjection: As from compile_projection (cached per class shape)
+    """
+    counts = [None if config is None else config.get(key) for key in USED_SLOTS.values()]
+    return compile_projection(*counts, fields=None if fields is None else frozenset(fields))
+
+
+FULL_RECORD = record_projection()
+
+
+def decode_reals(raw):
+    """
+    Decode a block of consecutive Real48 values
+
+    Uses the fastest conforming backend of the real48 codec.
+
+    Args:
+        raw: bytes holding a whole number of 6-byte reals
+
+    Returns:
+        list: Decoded values
+    """
+    return real48.decode_many(raw)
+
+
+def field_value(field, items):
+    """
+    Convert the unpacked struct items of one field to its Python value
+
+    Args:
+        field: RecordField describing the field
+        items: The field's items from the unpacked record tuple
+
+    Returns:
+        The decoded value (str, float, int or list)
+    """
+    if field.kind == 'string':
+        length, raw = items
+        return raw[:min(length, field.length)].decode('latin-1').strip()
+    if field.kind == 'real':
+        values = decode_reals(items[0])
+    else:
+        values = list(items)
+    return values[0] if field.length is None else values
+
+
+def encode_field(field, value):
+    """
+    Encode a field value into its on-disk bytes (the inverse of field_value)
+
+    Strings are truncated to the field length and padded with spaces; real
+    values of None, below 0 or 999 and above encode as the all-zero "no
+    mark" pattern (encode_mark), so a decoded record encodes back unchanged.
+
+    Args:
+        field: RecordField describing the field
+        value: str, float, int or list, as in the record dict
+
+    Returns:
+        bytes: field.size bytes
+
+    Raises:
+        ValueError: If an array value has the wrong number of elements
+    """
+    if field.kind == 'string':
+        raw = value.encode('latin-1')[:field.length]
+        return field.unpacker.pack(len(raw), raw.ljust(field.length, b' '))
+    values = [value] if field.length is None else list(value)
+    if len(values) != (field.length or 1):
+        raise ValueError(f"{field.name} needs {field.length} values, got {len(values)}")
+    if field.kind == 'real':
+        return b''.join(encode_mark(v) for v in values)
+    return field.unpacker.pack(*values)
+
+
+def unpack_field(buffer, field, offset=0):
+    """
+    Decode a single field of a record without touching the others
+
+    Args:
+        buffer: bytes-like object holding the record
+        field: RecordField to decode
+        offset: Byte offset of the record within the buffer
+
+    Returns:
+        The decoded value, as in the record dict
+    """
+    return field_value(field, field.unpacker.unpack_from(buffer, offset + field.offset))
+
+
+def record_from_items(items, fields=STUDENTREC40_FIELDS):
+    """
+    Build a student record dict from one unpacked studentrec40 tuple
+
+    Args:
+        items: Tuple from the unpacker
+        fields: The unpacker's RecordFields (those of a RecordProjection
+                for a projected unpack)
+
+    Returns:
+        dict: The decoded fields
+    """
+    return {
+        field.name: field_value(field, items[field.index:field.index + field.nitems])
+        for field in fields
+    }
+
+
+class StudentRecord(Mapping):
+    """
+    Compact read-only student record
+
+    Holds the fields of a record dict in slots instead of a dict. The marks,
+    catmarks and termmarks in use (the config's num_marks, num_cat and
+    num_terms, not all 120 slots as boxed floats) and the final mark are
+    decoded into one array('d'), and comments is an array('h'). String
+    fields are interned, so a homeform shared across the board is stored
+    once. A whole board of these takes about a quarter of the memory of
+    record dicts, and decodes faster because unused marks are skipped.
+
+    Existing callers keep working: record['marks'][i], get, keys, items,
+    'name' in record and dict(record) behave as for the dict. marks,
+    catmarks and termmarks are array('d') slices supporting indexing,
+    slicing, len and iteration like the lists they replace; to_dict() gives
+    a read_student_record-style dict with lists.
+    """
+
+    __slots__ = ('name', 'studentno', 'homeform', 'telno', 'absences', 'lates', 'comments',
+                 '_reals', '_ends')
+
+    fields = tuple(field.name for field in STUDENTREC40_FIELDS)
+
+    @classmethod
+    def from_items(cls, items, projection=FULL_RECORD):
+        """
+        Build a record from one unpacked studentrec40 tuple
+
+        Args:
+            items: Tuple from the projection's unpacker
+            projection: RecordProjection that unpacked the items; it must
+                        keep every field (record_projection(config) does)
+
+        Returns:
+            StudentRecord
+        """
+        record = cls.__new__(cls)
+        reals = []
+        for field in projection.fields:
+            if field.kind == 'string':
+                length, raw = items[field.index], items[field.index + 1]
+                setattr(record, field.name, sys.intern(raw[:min(length, field.length)].decode('latin-1').strip()))
+            elif field.kind == 'real':
+                reals.append(items[field.index])  # marks, catmarks, termmarks, finalmark, in layout order
+            elif field.length is None:
+                setattr(record, field.name, items[field.index])
+            else:
+                setattr(record, field.name, array('h', items[field.index:field.index + field.nitems]))
+        record._reals = array('d', decode_reals(b''.join(reals)))
+        record._ends = projection.ends
+        return record
+
+    @property
+    def marks(self):
+        return self._reals[:self._ends[0]]
+
+    @property
+    def catmarks(self):
+        return self._reals[self._ends[0]:self._ends[1]]
+
+    @property
+    def termmarks(self):
+        return self._reals[self._ends[1]:self._ends[2]]
+
+    @property
+    def finalmark(self):
+        return self._reals[-1]
+
+    def __getitem__(self, key):
+        if key not in FIELDS_BY_NAME:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return f"StudentRecord(name={self.name!r}, studentno={self.studentno!r})"
+
+    def to_dict(self):
+        """The record as a dict, with lists for the array fields"""
+        return {name: list(value) if isinstance(value, array) else value for name, value in self.items()}
+
+
+def unpack_student_record(buffer, offset=0, config=None, fields=None):
+    """
+    Parse one studentrec40 record from a buffer with a single unpack call
+
+    Args:
+        buffer: bytes-like object holding the record
+        offset: Byte offset of the record within the buffer
+        config, fields: Optional projection, as for record_projection: only
+                        the config's mark slots and the named fields are decoded
+
+    Returns:
+        dict: Student record data (same keys and values as read_student_record)
+    """
+    if config is None and fields is None:
+        return record_from_items(STUDENTREC40.unpack_from(buffer, offset))
+    projection = record_projection(config, fields)
+    return record_from_items(projection.unpacker.unpack_from(buffer, offset), projection.fields)
+
+
+def iter_student_records(buffer, config=None, fields=None):
+    """
+    Parse every complete studentrec40 record in a buffer
+
+    A trailing partial record is ignored, as the file readers always have.
+
+    Args:
+        buffer: bytes-like object holding the contents of a .rec file
+        config, fields: Optional projection, as for record_projection: only
+                        the config's mark slots and the named fields are decoded
+
+    Yields:
+        dict: Student record data, including empty records
+    """
+    projection = record_projection(config, fields)
+    view = memoryview(buffer)
+    whole = len(view) - len(view) % RECORD_SIZE
+    for items in projection.unpacker.iter_unpack(view[:whole]):
+        yield record_from_items(items, projection.fields)
+
+
+class PartialRecordWarning(UserWarning):
+    """
+    A .rec file ends part way through a record (a truncated copy, or a save
+    still in progress); the partial record is ignored
+
+    Attributes:
+        path: The .rec file (None if unknown)
+        num_records: Number of whole records before the partial one
+        trailing_bytes: Size of the partial record
+    """
+
+    def __init__(self, path, num_records, trailing_bytes):
+        self.path = path
+        self.num_records = num_records
+        self.trailing_bytes = trailing_bytes
+        super().__init__(f"{path or '.rec data'}: {trailing_bytes} bytes after the last of "
+                         f"{num_records} records ignored")
+
+
+def record_count(size, path=None):
+    """
+    Number of whole records in a .rec file, from its size
+
+    Issues a PartialRecordWarning if the size is not a multiple of RECORD_SIZE.
+
+    Args:
+        size: File size in bytes
+        path: File path, for the warning
+
+    Returns:
+        int: Number of complete records
+    """
+    count, trailing = divmod(size, RECORD_SIZE)
+    if trailing:
+        warnings.warn(PartialRecordWarning(path, count, trailing), stacklevel=3)
+    return count
+
+
+ClassRecords = namedtuple('ClassRecords', 'config records students')
+
+
+PROGRESS_EVERY = 1000
+
+
+def decode_class(data, config, path=None, progress=None, compact=False):
+    """
+    Decode every record of a class
+
+    The number of records is known from the size of the data, so the record
+    list is allocated once; a trailing partial record raises a
+    PartialRecordWarning instead of being found by a failed read.
+
+    Args:
+        data: Contents of the .rec file
+        config: Configuration dict from read_config_file
+        path: The .rec file, for the warning
+        progress: Optional callable(done, total), called every PROGRESS_EVERY
+                  records and once at the end
+        compact: Decode StudentRecords instead of record dicts (less memory,
+                 for callers that only read the records)
+
+    Returns:
+        ClassRecords: (config, every record including empty ones, the
+        non-empty student records); only the config's num_marks, num_cat
+        and num_terms slots of the mark arrays are decoded
+    """
+    total = record_count(len(data), path)
+    records = [None] * total
+    view = memoryview(data)[:total * RECORD_SIZE]
+    projection = record_projection(config)
+    if compact:
+        make_record = partial(StudentRecord.from_items, projection=projection)
+    else:
+        make_record = partial(record_from_items, fields=projection.fields)
+    for i, items in enumerate(projection.unpacker.iter_unpack(view)):
+        records[i] = make_record(items)
+        if progress is not None and (i + 1) % PROGRESS_EVERY == 0:
+            progress(i + 1, total)
+    if progress is not None:
+        progress(total, total)
+    students = [record for record in records if record['name']]  # Skip empty records
+    return ClassRecords(config, records, students)
+
+
+def open_class(rec_file, txt_file, progress=None, compact=False):
+    """
+    Read a class's configuration and student records
+
+    Usage:
+        config, records, students = open_class(rec_file, txt_file)
+
+    Args:
+        rec_file: Path to .rec binary file
+        txt_file: Path to .txt configuration file
+        progress: Optional callable(done, total), as for decode_class
+        compact: Decode StudentRecords, as for decode_class
+
+    Returns:
+        ClassRecords: (config, every record, the non-empty student records)
+    """
+    config = read_config_file(txt_file)
+    with open(rec_file, 'rb') as f:
+        data = f.read()
+    return decode_class(data, config, rec_file, progress, compact)
+
+
+def read_student_record(f, config=None, fields=None):
     """
     Read one studentrec40 record from the file
 
@@ -159,74 +605,17 @@ def read_student_record(f):
 
     Args:
         f: Binary file handle
+        config: Optional configuration dict; only its num_marks, num_cat and
+                num_terms slots of the mark arrays are decoded
+        fields: Optional field names to decode (the others are skipped)
 
     Returns:
         dict: Student record data
-    """
-    # Read name (string[20])
-    name = read_pascal_string(f, 20)
-
-    # Read student number (string[10])
-    studentno = read_pascal_string(f, 10)
-
-    # Read homeform (string[10])
-    homeform = read_pascal_string(f, 10)
 
-    # Read marks array (100 reals - Delphi real = 6 bytes, 48-bit float)
-    marks = []
-    for i in range(100):
-        real_bytes = f.read(6)
-        mark = decode_turbo_real(real_bytes)
-        marks.append(mark if mark is not None else 999.0)
-
-    # Read category marks (10 reals)
-    catmarks = []
-    for i in range(10):
-        real_bytes = f.read(6)
-        catmark = decode_turbo_real(real_bytes)
-        catmarks.append(catmark if catmark is not None else 999.0)
-
-    # Read term marks (10 reals)
-    termmarks = []
-    for i in range(10):
-        real_bytes = f.read(6)
-        termmark = decode_turbo_real(real_bytes)
-        termmarks.append(termmark if termmark is not None else 999.0)
-
-    # Read final mark (real)
-    real_bytes = f.read(6)
-    finalmark = decode_turbo_real(real_bytes)
-    if finalmark is None:
-        finalmark = 999.0
-
-    # Read telno (string[12])
-    telno = read_pascal_string(f, 12)
-
-    # Read absences (integer = 2 bytes)
-    absences = struct.unpack('h', f.read(2))[0]
-
-    # Read lates (integer = 2 bytes)
-    lates = struct.unpack('h', f.read(2))[0]
-
-    # Read comments (5 integers)
-    comments = []
-    for i in range(5):
-        comment = struct.unpack('h', f.read(2))[0]
-        comments.append(comment)
-
-    return {
-        'name': name,
-        'studentno': studentno,
-        'homeform': homeform,
-        'marks': marks,
-        'catmarks': catmarks,
-        'termmarks': termmarks,
-        'finalmark': finalmark,
-        'telno': telno,
-        'absences': absences,
-        'lates': lates,
-        'comments': comments
-    }
+    Raises:
+        struct.error: If fewer than RECORD_SIZE bytes remain
+    """
+    return unpack_student_record(f.read(RECORD_SIZE), 0, config, fields)
 
 
 def format_mark(m):
@@ -244,107 +633,233 @@ def format_mark(m):
     return f'{m:.1f}'
 
 
-def convert_class_to_csv(rec_file, txt_file, output_dir):
+class MarkCellCache:
     """
-    Convert a single class .rec file to CSV
+    Bounded cache from raw Real48 byte patterns to formatted mark cells
+
+    Gradebook values repeat heavily (the same scores out of 10/20/40, and
+    the all-zero "no mark" pattern), so decoding and formatting each
+    distinct 6-byte pattern once saves most of the work of an export.
+
+    Args:
+        maxsize: Maximum number of patterns kept (least recently used are dropped)
+        no_mark: Cell text for "no mark": '' as in the CSV export, or '__'
+                 as in read_class_marks.format_mark
+    """
+
+    def __init__(self, maxsize=4096, no_mark=''):
+        self.no_mark = no_mark
+        self.format = lru_cache(maxsize=maxsize)(self._format)
+
+    def _format(self, raw):
+        value = decode_turbo_real(raw)
+        if value is None:
+            value = 999.0
+        if value < 0 or value >= 999:
+            return self.no_mark
+        return f'{value:.1f}'
+
+    def stats(self):
+        """
+        Hit/miss statistics
+
+        Returns:
+            dict: hits, misses, size, maxsize and hit_rate (0.0 to 1.0)
+        """
+        info = self.format.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Empty the cache and reset its statistics"""
+        self.format.cache_clear()
+
+
+def mark_columns(config):
+    """
+    List the record fields behind each mark column, in CSV order
+
+    Args:
+        config: Configuration dict from read_config_file
+
+    Returns:
+        list: (field name, index) pairs; index is None for the final mark
+    """
+    columns = [('marks', i) for i in range(config['num_marks'])]
+    columns += [('catmarks', i) for i in range(config['num_cat'])]
+    columns += [('termmarks', i) for i in range(config['num_terms'])]
+    columns.append(('finalmark', None))
+    return columns
+
+
+def marks_csv_header(config):
+    """
+    Build the header row of the marks CSV
+
+    Args:
+        config: Configuration dict from read_config_file
+
+    Returns:
+        list: Column titles
+    """
+    header = ['Student Name', 'Student Number', 'Homeform']
+
+    # Add assignment columns
+    for mark in config['marks']:
+        header.append(f"{mark['name']} ({mark['date']})")
+
+    # Add category columns
+    for cat_name, cat_weight in config['categories']:
+        header.append(f"{cat_name} %")
+
+    # Add term columns
+    for i in range(config['num_terms']):
+        header.append(f"Term {i+1} %")
+
+    header.append('Final Mark %')
+    return header
+
+
+def transposed_row_labels(config):
+    """
+    Build the first column of the transposed marks CSV
+
+    Args:
+        config: Configuration dict from read_config_file
+
+    Returns:
+        list: One label per row, matching mark_columns(config)
+    """
+    labels = [f"{mark['name']} ({mark['date']}) - {mark['total']} pts" for mark in config['marks']]
+    labels += [f"{cat_name} % (weight: {cat_weight}%)" for cat_name, cat_weight in config['categories']]
+    labels += [f"Term {i+1} %" for i in range(config['num_terms'])]
+    labels.append('Final Mark %')
+    return labels
+
+
+def class_output_paths(output_dir, class_code):
+    """
+    Paths of the CSV files written for one class
 
     Args:
-        rec_file: Path to .rec binary file
-        txt_file: Path to .txt configuration file
         output_dir: Output directory for CSV files
+        class_code: Class code from the configuration file
 
     Returns:
-        dict: Summary information about conversion
+        tuple: (marks CSV, attendance CSV, transposed marks CSV)
     """
-    # Read configuration
-    print(f"Processing {os.path.basename(rec_file)}...")
-    config = read_config_file(txt_file)
+    return (
+        os.path.join(output_dir, f"{class_code}_marks.csv"),
+        os.path.join(output_dir, f"{class_code}_attendance.csv"),
+        os.path.join(output_dir, f"{class_code}_marks_transposed.csv"),
+    )
 
-    class_code = config['class_code']
 
-    # Create CSV filenames
-    csv_filename = os.path.join(output_dir, f"{class_code}_marks.csv")
-    csv_attendance = os.path.join(output_dir, f"{class_code}_attendance.csv")
-    csv_transpose = os.path.join(output_dir, f"{class_code}_marks_transposed.csv")
+ATTENDANCE_HEADER = ['Student Name', 'Student Number', 'Homeform', 'Phone', 'Absences', 'Lates']
 
-    # Read all students
-    students = []
-    with open(rec_file, 'rb') as f:
-        while True:
-            try:
-                student = read_student_record(f)
-                if student['name']:  # Skip empty records
-                    students.append(student)
-            except:
-                break
 
-    if not students:
-        print(f"  No students found in {rec_file}")
-        return None
+def marks_row(student, config):
+    """
+    Build one student's row of the marks CSV
 
-    # Write main marks CSV
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
-        # Build header
-        header = ['Student Name', 'Student Number', 'Homeform']
+    Args:
+        student: Student record (dict or RecordView)
+        config: Configuration dict from read_config_file
 
-        # Add assignment columns
-        for mark in config['marks']:
-            header.append(f"{mark['name']} ({mark['date']})")
+    Returns:
+        list: Name, student number, homeform and formatted marks
+    """
+    row = [student['name'], student['studentno'], student['homeform']]
 
-        # Add category columns
-        for cat_name, cat_weight in config['categories']:
-            header.append(f"{cat_name} %")
+    # Add assignment marks
+    marks = student['marks']
+    for i in range(config['num_marks']):
+        row.append(format_mark(marks[i]))
 
-        # Add term columns
-        for i in range(config['num_terms']):
-            header.append(f"Term {i+1} %")
+    # Add category marks
+    catmarks = student['catmarks']
+    for i in range(config['num_cat']):
+        row.append(format_mark(catmarks[i]))
 
-        header.append('Final Mark %')
+    # Add term marks
+    termmarks = student['termmarks']
+    for i in range(config['num_terms']):
+        row.append(format_mark(termmarks[i]))
 
-        writer = csv.writer(f)
-        writer.writerow(header)
+    row.append(format_mark(student['finalmark']))
+    return row
 
-        # Write student data
-        for student in students:
-            row = [student['name'], student['studentno'], student['homeform']]
 
-            # Add assignment marks
-            for i in range(config['num_marks']):
-                row.append(format_mark(student['marks'][i]))
+def attendance_row(student):
+    """
+    Build one student's row of the attendance CSV
 
-            # Add category marks
-            for i in range(config['num_cat']):
-                row.append(format_mark(student['catmarks'][i]))
+    Args:
+        student: Student record (dict or RecordView)
 
-            # Add term marks
-            for i in range(config['num_terms']):
-                row.append(format_mark(student['termmarks'][i]))
+    Returns:
+        list: Name, student number, homeform, phone, absences and lates
+    """
+    return [
+        student['name'],
+        student['studentno'],
+        student['homeform'],
+        student['telno'],
+        student['absences'] if student['absences'] >= 0 else '',
+        student['lates'] if student['lates'] >= 0 else ''
+    ]
 
-            row.append(format_mark(student['finalmark']))
 
-            writer.writerow(row)
+def write_marks_csv(students, config, path):
+    """
+    Write the marks CSV (students as rows)
 
-    print(f"  Created {csv_filename} ({len(students)} students)")
+    Args:
+        students: List of student records
+        config: Configuration dict from read_config_file
+        path: Output CSV path
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(marks_csv_header(config))
 
-    # Write attendance CSV
-    with open(csv_attendance, 'w', newline='', encoding='utf-8') as f:
+        # Write student data
+        for student in students:
+            writer.writerow(marks_row(student, config))
+
+
+def write_attendance_csv(students, path):
+    """
+    Write the attendance CSV
+
+    Args:
+        students: List of student records
+        path: Output CSV path
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
-        writer.writerow(['Student Name', 'Student Number', 'Homeform', 'Phone', 'Absences', 'Lates'])
+        writer.writerow(ATTENDANCE_HEADER)
 
         for student in students:
-            writer.writerow([
-                student['name'],
-                student['studentno'],
-                student['homeform'],
-                student['telno'],
-                student['absences'] if student['absences'] >= 0 else '',
-                student['lates'] if student['lates'] >= 0 else ''
-            ])
+            writer.writerow(attendance_row(student))
 
-    print(f"  Created {csv_attendance}")
 
-    # Write transposed version (students as columns)
-    with open(csv_transpose, 'w', newline='', encoding='utf-8') as f:
+def write_transposed_csv(students, config, path):
+    """
+    Write the transposed marks CSV (students as columns)
+
+    Args:
+        students: List of student records
+        config: Configuration dict from read_config_file
+        path: Output CSV path
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
 
         # Header row with student names
@@ -353,83 +868,536 @@ def convert_class_to_csv(rec_file, txt_file, output_dir):
             header.append(student['name'])
         writer.writerow(header)
 
-        # Assignment rows
-        for i, mark in enumerate(config['marks']):
-            row = [f"{mark['name']} ({mark['date']}) - {mark['total']} pts"]
+        # One row per assignment, category, term and the final mark
+        for label, (field, i) in zip(transposed_row_labels(config), mark_columns(config)):
+            row = [label]
             for student in students:
-                row.append(format_mark(student['marks'][i]))
+                value = student[field] if i is None else student[field][i]
+                row.append(format_mark(value))
             writer.writerow(row)
 
-        # Category rows
-        for i, (cat_name, cat_weight) in enumerate(config['categories']):
-            row = [f"{cat_name} % (weight: {cat_weight}%)"]
-            for student in students:
-                row.append(format_mark(student['catmarks'][i]))
-            writer.writerow(row)
 
-        # Term rows
-        for i in range(config['num_terms']):
-            row = [f"Term {i+1} %"]
-            for student in students:
-                row.append(format_mark(student['termmarks'][i]))
-            writer.writerow(row)
+def csv_cell(text):
+    """Quote a cell the way csv.writer does with the default dialect"""
+    if any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
 
-        # Final mark row
-        row = ['Final Mark %']
-        for student in students:
-            row.append(format_mark(student['finalmark']))
-        writer.writerow(row)
 
+def write_streamed_row(f, cells):
+    """
+    Write one CSV row cell by cell, without building the row in memory
+
+    Args:
+        f: Text file opened with newline=''
+        cells: Iterable of str cells
+    """
+    separator = ''
+    for cell in cells:
+        f.write(separator)
+        f.write(csv_cell(cell))
+        separator = ','
+    f.write('\r\n')
+
+
+def stream_class_to_csv(rec_file, config, csv_paths, cache=None):
+    """
+    Write a class's three CSV files without materializing its records
+
+    The marks and attendance CSVs are written together in one pass over a
+    record generator. The transposed CSV is then produced row by row (one
+    mark column of every student at a time) straight from the memory-mapped
+    file. Apart from the file offsets of non-empty records (8 bytes each),
+    memory use does not grow with the number of records. Mark cells are
+    formatted through a MarkCellCache, so only the active mark slots are
+    read and repeated byte patterns are decoded once.
+
+    Args:
+        rec_file: Path to .rec binary file
+        config: Configuration dict from read_config_file
+        csv_paths: (marks, attendance, transposed) CSV paths
+        cache: MarkCellCache to use (a new one by default)
+
+    Returns:
+        int: Number of students written
+    """
+    csv_filename, csv_attendance, csv_transpose = csv_paths
+    if cache is None:
+        cache = MarkCellCache()
+    format_cell = cache.format
+    slot_starts = [FIELDS_BY_NAME[name].offset + 6 * (i or 0) for name, i in mark_columns(config)]
+    text_fields = [FIELDS_BY_NAME[name] for name in ('name', 'studentno', 'homeform', 'telno')]
+    name_field = text_fields[0]
+
+    with open(rec_file, 'rb') as rec:
+        size = record_count(os.fstat(rec.fileno()).st_size, rec_file) * RECORD_SIZE
+        if not size:
+            return 0
+        with mmap.mmap(rec.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            offsets = array('q')
+
+            with open(csv_filename, 'w', newline='', encoding='utf-8') as f_marks, \
+                    open(csv_attendance, 'w', newline='', encoding='utf-8') as f_attendance:
+                marks_writer = csv.writer(f_marks)
+                attendance_writer = csv.writer(f_attendance)
+                marks_writer.writerow(marks_csv_header(config))
+                attendance_writer.writerow(ATTENDANCE_HEADER)
+
+                for offset in range(0, size, RECORD_SIZE):
+                    name = unpack_field(buffer, name_field, offset)
+                    if not name:  # Skip empty records
+                        continue
+                    offsets.append(offset)
+                    studentno, homeform, telno = (unpack_field(buffer, field, offset) for field in text_fields[1:])
+                    cells = [format_cell(buffer[offset + start:offset + start + 6]) for start in slot_starts]
+                    marks_writer.writerow([name, studentno, homeform] + cells)
+                    attendance_writer.writerow(attendance_row({
+                        'name': name,
+                        'studentno': studentno,
+                        'homeform': homeform,
+                        'telno': telno,
+                        'absences': unpack_field(buffer, FIELDS_BY_NAME['absences'], offset),
+                        'lates': unpack_field(buffer, FIELDS_BY_NAME['lates'], offset),
+                    }))
+
+            if not offsets:
+                os.remove(csv_filename)
+                os.remove(csv_attendance)
+                return 0
+
+            with open(csv_transpose, 'w', newline='', encoding='utf-8') as f:
+                names = (unpack_field(buffer, name_field, offset) for offset in offsets)
+                write_streamed_row(f, chain(['Assignment'], names))
+
+                # One row per assignment, category, term and the final mark
+                for label, start in zip(transposed_row_labels(config), slot_starts):
+                    cells = (format_cell(buffer[offset + start:offset + start + 6]) for offset in offsets)
+                    write_streamed_row(f, chain([label], cells))
+
+    return len(offsets)
+
+
+def class_summary_stats(rec_file, config, data=None):
+    """
+    Statistics of a class for the extended _summary.csv (needs NumPy)
+
+    Args:
+        rec_file: Path to .rec binary file
+        config: Configuration dict from read_config_file
+        data: The .rec contents if already read
+
+    Returns:
+        tuple: (class_stats.summary_stats result, class_stats.class_stats result)
+    """
+    import class_stats
+    with instrument.stage('class_stats', rec_file):
+        if data is None:
+            with open(rec_file, 'rb') as f:
+                data = f.read()
+        return class_stats.class_summary_stats(data, config)
+
+
+def convert_class_to_csv(rec_file, txt_file, output_dir, stream=False, preloaded=None, stats=False):
+    """
+    Convert a single class .rec file to CSV
+
+    Args:
+        rec_file: Path to .rec binary file
+        txt_file: Path to .txt configuration file
+        output_dir: Output directory for CSV files
+        stream: Write the CSVs with stream_class_to_csv, keeping memory flat
+                for very large (merged or board-level) .rec files
+        preloaded: Optional (rec bytes, config text) already read from the
+                   two files, e.g. by read_ahead; the .rec bytes are not
+                   used when streaming
+        stats: Also compute the class statistics (see class_stats) and add
+               them to the summary as 'stats' and 'column_stats'
+
+    Returns:
+        dict: Summary information about conversion
+    """
+    # Read configuration
+    print(f"Processing {os.path.basename(rec_file)}...")
+    with instrument.stage('read_config', rec_file) as step:
+        if preloaded is not None:
+            data, config_text = preloaded
+            config = parse_config_text(config_text)
+            step.add(bytes=len(config_text))
+        else:
+            data = None
+            config = read_config_file(txt_file)
+            step.add_file(txt_file)
+
+    class_code = config['class_code']
+
+    # Create CSV filenames
+    csv_filename, csv_attendance, csv_transpose = class_output_paths(output_dir, class_code)
+
+    if stream:
+        cache = MarkCellCache()
+        with instrument.stage('stream_csv', rec_file) as step:
+            num_students = stream_class_to_csv(rec_file, config, class_output_paths(output_dir, class_code), cache)
+            step.add(records=num_students)
+            step.add_file(rec_file)
+        if not num_students:
+            print(f"  No students found in {rec_file}")
+            return None
+        print(f"  Created {csv_filename} ({num_students} students)")
+        print(f"  Created {csv_attendance}")
+        print(f"  Created {csv_transpose}")
+        cache_stats = cache.stats()
+        print(f"  Mark cell cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']:.0%})")
+        result = {
+            'class_code': class_code,
+            'class_desc': config['class_desc'],
+            'num_students': num_students,
+            'num_marks': config['num_marks']
+        }
+        if stats:
+            result['stats'], result['column_stats'] = class_summary_stats(rec_file, config)
+        return result
+
+    # Read all students
+    if data is None:
+        with instrument.stage('read_rec', rec_file) as step:
+            with open(rec_file, 'rb') as f:
+                data = f.read()
+            step.add(bytes=len(data))
+    with instrument.stage('decode', rec_file) as step:
+        records = decode_class(data, config, rec_file, compact=True)
+        step.add(records=len(records.records), bytes=len(data))
+    students = records.students
+
+    if not students:
+        print(f"  No students found in {rec_file}")
+        return None
+
+    # Write main marks CSV
+    with instrument.stage('write_marks_csv', rec_file) as step:
+        write_marks_csv(students, config, csv_filename)
+        step.add(records=len(students))
+        step.add_file(csv_filename)
+    print(f"  Created {csv_filename} ({len(students)} students)")
+
+    # Write attendance CSV
+    with instrument.stage('write_attendance_csv', rec_file) as step:
+        write_attendance_csv(students, csv_attendance)
+        step.add(records=len(students))
+        step.add_file(csv_attendance)
+    print(f"  Created {csv_attendance}")
+
+    # Write transposed version (students as columns)
+    with instrument.stage('write_transposed_csv', rec_file) as step:
+        write_transposed_csv(students, config, csv_transpose)
+        step.add(records=len(students))
+        step.add_file(csv_transpose)
     print(f"  Created {csv_transpose}")
 
-    return {
+    result = {
         'class_code': class_code,
         'class_desc': config['class_desc'],
         'num_students': len(students),
         'num_marks': config['num_marks']
     }
+    if stats:
+        result['stats'], result['column_stats'] = class_summary_stats(rec_file, config, data)
+    return result
+
+
+def find_class_files(classes_dir, recursive=False):
+    """
+    Pair every .rec file in a directory with its .txt configuration
+
+    Each directory is listed once with os.scandir, whose entries already
+    say whether they are files, so no per-file stat or exists call is
+    made (each is a round trip on a network share). Extensions and stems
+    are matched case-insensitively, e.g. Ics4m1-1.REC with ICS4M1-1.txt.
 
+    Args:
+        classes_dir: Directory holding the class files
+        recursive: Also search subdirectories (per-teacher, per-year folders)
+
+    Returns:
+        list: (rec_path, txt_path) tuples, sorted by path within each
+        directory, subdirectories after their parent
+    """
+    rec_paths = {}
+    txt_paths = {}
+    subdirs = []
+    with os.scandir(classes_dir) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            ext = ext.lower()
+            if ext in ('.rec', '.txt'):
+                if entry.is_file():
+                    (rec_paths if ext == '.rec' else txt_paths)[stem.lower()] = entry.path
+            elif recursive and entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+
+    rec_files = sorted((rec_path, txt_paths[stem]) for stem, rec_path in rec_paths.items() if stem in txt_paths)
+    for subdir in sorted(subdirs):
+        rec_files.extend(find_class_files(subdir, recursive=True))
+    return rec_files
+
+
+def load_class_files(rec_file, txt_file):
+    """
+    Read a class's .rec and .txt files whole, one read each
 
-def main():
+    Returns:
+        tuple: (rec bytes, config text), the preloaded argument of convert_class_to_csv
+    """
+    with open(rec_file, 'rb') as f:
+        data = f.read()
+    with open(txt_file, 'r') as f:
+        text = f.read()
+    return data, text
+
+
+def read_ahead(rec_files, workers=4):
+    """
+    Read classes' files on a thread pool ahead of their conversion
+
+    Up to `workers` classes beyond the one being converted are read in the
+    background, so network-share latency overlaps with decoding while
+    memory stays bounded.
+
+    Args:
+        rec_files: List of (rec_path, txt_path) tuples
+        workers: Number of reader threads and classes read ahead
+
+    Yields:
+        concurrent.futures.Future: One per class, in order, resolving to
+        load_class_files's result (or raising its error)
+    """
+    pairs = iter(rec_files)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = deque(executor.submit(load_class_files, *pair) for pair in islice(pairs, workers))
+        while futures:
+            future = futures.popleft()
+            for pair in islice(pairs, 1):
+                futures.append(executor.submit(load_class_files, *pair))
+            yield future
+
+
+def convert_classes(rec_files, output_dir, jobs=1, convert=convert_class_to_csv, manifest=None, prefetch=0,
+                    stats=False):
+    """
+    Convert several classes, optionally over a process pool
+
+    Results come back in the order of rec_files whatever order the workers
+    finish in, so the summary is the same as a serial run. A class that
+    raises is reported and skipped; the others still convert.
+
+    Args:
+        rec_files: List of (rec_path, txt_path) tuples
+        output_dir: Output directory for CSV files
+        jobs: Number of worker processes (1 converts in this process)
+        convert: Conversion function with convert_class_to_csv's signature
+        manifest: Optional ConversionManifest; classes it reports as current
+                  are not converted again and their cached summary is used
+        prefetch: When converting in this process, read this many classes
+                  ahead on a thread pool and pass their contents to convert
+                  as preloaded= (0 lets convert read its own files)
+        stats: Have convert compute each class's statistics (stats=True);
+               a manifest summary without them does not count as current
+
+    Returns:
+        tuple: (list of summary dicts, list of (rec_path, error message))
+    """
+    results = [None] * len(rec_files)
+    failures = []
+    if stats:
+        convert = partial(convert, stats=True)
+
+    pending = []
+    for index, (rec_file, txt_file) in enumerate(rec_files):
+        if manifest is not None and manifest.is_current(rec_file, txt_file):
+            cached = manifest.summary(rec_file)
+            if not stats or cached is None or 'column_stats' in cached:
+                results[index] = cached
+                continue
+        pending.append(index)
+    if manifest is not None and len(pending) < len(rec_files):
+        print(f"Skipping {len(rec_files) - len(pending)} unchanged classes\n")
+
+    def collect(index, get_result):
+        rec_file, txt_file = rec_files[index]
+        try:
+            result = get_result()
+        except Exception as e:
+            print(f"  Error converting {rec_file}: {e}")
+            failures.append((rec_file, str(e)))
+            if manifest is not None:
+                manifest.forget(rec_file)
+            return
+        results[index] = result
+        if manifest is not None:
+            outputs = class_output_paths(output_dir, result['class_code']) if result else ()
+            manifest.record(rec_file, txt_file, result, outputs)
+
+    if jobs <= 1 and prefetch:
+        loads = read_ahead([rec_files[index] for index in pending], prefetch)
+        for index, load in zip(pending, loads):
+            rec_file, txt_file = rec_files[index]
+            with instrument.stage('read_ahead_wait', rec_file):
+                wait([load])
+            collect(index, lambda: convert(rec_file, txt_file, output_dir, preloaded=load.result()))
+            print()
+    elif jobs <= 1:
+        for index in pending:
+            rec_file, txt_file = rec_files[index]
+            collect(index, lambda: convert(rec_file, txt_file, output_dir))
+            print()
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [(index, executor.submit(convert, *rec_files[index], output_dir))
+                       for index in pending]
+            for index, future in futures:
+                collect(index, future.result)
+        print()
+
+    if manifest is not None:
+        manifest.save()
+
+    summary = [result for result in results if result]
+    return summary, failures
+
+
+SUMMARY_STATS_HEADER = ['Students With Final Mark', 'Mean Final %', 'Median Final %', 'Std Dev Final %',
+                        'Completion Rate', 'Assignments Off Config Average']
+
+
+def summary_stats_cells(stats):
+    """Cells of the statistics columns of _summary.csv (see class_stats.summary_stats)"""
+    if stats is None:
+        return [''] * len(SUMMARY_STATS_HEADER)
+    return [stats['final_count']] + \
+        ['' if stats[key] is None else f'{stats[key]:.1f}' for key in ('final_mean', 'final_median', 'final_std')] + \
+        [f"{stats['completion']:.3f}", ' '.join(stats['off_average'])]
+
+
+def write_summary_csv(summary, output_dir, stats=False):
+    """
+    Write _summary.csv for a list of conversion results
+
+    With stats, the file is extended with the final mark statistics,
+    completion rate and the assignments whose mean differs from the config
+    average, from the 'stats' dict of summaries converted with stats=True.
+
+    Args:
+        summary: List of summary dicts from convert_class_to_csv
+        output_dir: Output directory for CSV files
+        stats: Add the statistics columns
+
+    Returns:
+        str: Path of the summary file
+    """
+    summary_file = os.path.join(output_dir, '_summary.csv')
+    with open(summary_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        header = ['Class Code', 'Class Description', 'Number of Students', 'Number of Assignments']
+        if stats:
+            header += SUMMARY_STATS_HEADER
+        writer.writerow(header)
+        for item in summary:
+            row = [item['class_code'], item['class_desc'], item['num_students'], item['num_marks']]
+            if stats:
+                row += summary_stats_cells(item.get('stats'))
+            writer.writerow(row)
+    return summary_file
+
+
+def parse_batch_args(argv, classes_dir, output_dir, streaming=False, stats=False, prefetch=False, profile=False):
+    """
+    Parse the command line of a batch conversion entry point
+
+    Args:
+        argv: Argument list (None for sys.argv)
+        classes_dir: Default directory holding the class files
+        output_dir: Default output directory
+        streaming: Offer the --stream option
+        stats: Offer the --stats option
+        prefetch: Offer the --prefetch option
+        profile: Offer the --profile and --profile-memory options
+
+    Returns:
+        argparse.Namespace: classes_dir, output_dir, recursive, jobs, force
+        (and stream, stats, prefetch, profile, profile_memory)
+    """
+    parser = argparse.ArgumentParser(description="Convert gradebook .rec files to CSV")
+    parser.add_argument('--classes-dir', default=classes_dir, help="directory holding .rec/.txt pairs")
+    parser.add_argument('--output-dir', default=output_dir, help="directory for the CSV files")
+    parser.add_argument('--recursive', action='store_true',
+                        help="also find classes in subdirectories of the classes directory")
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help="convert classes over N worker processes (default 1)")
+    parser.add_argument('--force', action='store_true',
+                        help="convert every class, even those the manifest says are unchanged")
+    if streaming:
+        parser.add_argument('--stream', action='store_true',
+                            help="stream records to the CSVs with flat memory use")
+    if stats:
+        parser.add_argument('--stats', action='store_true',
+                            help="add class statistics to _summary.csv and write _assessment_stats.csv (needs NumPy)")
+    if prefetch:
+        parser.add_argument('--prefetch', type=int, default=4, metavar='N',
+                            help="read N classes ahead on background threads (default 4, 0 to disable)")
+    if profile:
+        instrument.add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main entry point for batch conversion"""
     # Setup paths
-    classes_dir = r'S:\Chn\classes'
-    output_dir = r'S:\Chn\classes\csv_exports_python'
+    args = parse_batch_args(argv, r'S:\Chn\classes', r'S:\Chn\classes\csv_exports_python',
+                            streaming=True, stats=True, prefetch=True, profile=True)
+    instrument.start(args)
+    classes_dir = args.classes_dir
+    output_dir = args.output_dir
 
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     print(f"Output directory: {output_dir}\n")
 
     # Find all .rec files
-    rec_files = []
-    for file in os.listdir(classes_dir):
-        if file.endswith('.rec'):
-            rec_path = os.path.join(classes_dir, file)
-            txt_path = os.path.join(classes_dir, file.replace('.rec', '.txt'))
-            if os.path.exists(txt_path):
-                rec_files.append((rec_path, txt_path))
+    with instrument.stage('find_class_files'):
+        rec_files = find_class_files(classes_dir, args.recursive)
 
     print(f"Found {len(rec_files)} class files to convert\n")
 
     # Convert each class
-    summary = []
-    for rec_file, txt_file in rec_files:
-        result = convert_class_to_csv(rec_file, txt_file, output_dir)
-        if result:
-            summary.append(result)
-        print()
+    manifest = ConversionManifest(output_dir)
+    if args.force:
+        manifest.classes.clear()
+    convert = partial(convert_class_to_csv, stream=True) if args.stream else convert_class_to_csv
+    # Streaming keeps memory flat, so it reads the .rec itself rather than preloading it
+    prefetch = 0 if args.stream else args.prefetch
+    summary, failures = convert_classes(rec_files, output_dir, args.jobs, convert=convert, manifest=manifest,
+                                        prefetch=prefetch, stats=args.stats)
 
     # Write summary CSV
-    summary_file = os.path.join(output_dir, '_summary.csv')
-    with open(summary_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Class Code', 'Class Description', 'Number of Students', 'Number of Assignments'])
-        for item in summary:
-            writer.writerow([item['class_code'], item['class_desc'], item['num_students'], item['num_marks']])
-
+    with instrument.stage('write_summary'):
+        summary_file = write_summary_csv(summary, output_dir, stats=args.stats)
     print(f"Created summary file: {summary_file}")
+
+    if args.stats:
+        from class_stats import write_stats_csv
+        with instrument.stage('write_stats'):
+            stats_file = write_stats_csv([(item['class_code'], item['column_stats']) for item in summary],
+                                         output_dir)
+        print(f"Created statistics file: {stats_file}")
+
     print(f"\nTotal classes converted: {len(summary)}")
+    if failures:
+        print(f"Classes that failed: {len(failures)}")
+        for rec_file, error in failures:
+            print(f"  {rec_file}: {error}")
     print(f"All CSV files saved to: {output_dir}")
+    if args.profile:
+        instrument.finish(args.profile)
 
 
 if __name__ == '__main__':
@@ -1,43 +1,8 @@
 import struct
 import sys
 
-def decode_turbo_real(bytes_data):
-    """
-    Decode Turbo Pascal/Delphi 48-bit real (6 bytes)
-    Format: (-1)^s * (1.m) * 2^(exp-129)
-    Byte 0: 8-bit exponent
-    Bytes 1-5: 39-bit mantissa with sign bit
-    """
-    if len(bytes_data) != 6:
-        return None
-
-    exp_byte = bytes_data[0]
-    mantissa_bytes = bytes_data[1:6]
-
-    # Special case: exponent = 0 means the number is 0
-    if exp_byte == 0:
-        return -1.0  # Use -1 to indicate "no mark"
-
-    # Convert mantissa bytes to integer (little-endian)
-    mantissa_int = int.from_bytes(mantissa_bytes, 'little')
-
-    # Extract sign bit (bit 39, which is bit 7 of the 5th byte)
-    sign = 1 if (mantissa_int & 0x8000000000) == 0 else -1
-
-    # Clear the sign bit to get the actual mantissa value
-    mantissa_int = mantissa_int & 0x7FFFFFFFFF
-
-    # Calculate the real exponent (bias is 129 for Turbo Pascal real)
-    exponent = exp_byte - 129
-
-    # The mantissa is normalized with implicit leading 1: (1.m)
-    # So we add 1.0 to the fractional part
-    mantissa_value = 1.0 + (mantissa_int / (2.0 ** 39))
-
-    # Calculate the floating point value: (-1)^s * (1.m) * 2^(exp-129)
-    value = sign * mantissa_value * (2.0 ** exponent)
-
-    return value
+from marks_reader import decode_class
+from real48 import decode_turbo_real
 
 def read_pascal_string(f, max_len):
     """Read a Pascal-style string (length byte + characters)"""
@@ -210,56 +175,53 @@ def main():
     print(f"{'='*80}\n")
 
     with open(rec_file, 'rb') as f:
-        student_num = 0
-        while True:
-            try:
-                student = read_student_record(f)
-                student_num += 1
-
-                # Skip empty records
-                if not student['name']:
-                    continue
-
-                print(f"Student #{student_num}: {student['name']}")
-                print(f"  Student No: {student['studentno']}")
-                print(f"  Homeform:   {student['homeform']}")
-                print(f"  Phone:      {student['telno']}")
-                print(f"  Absences:   {student['absences']}")
-                print(f"  Lates:      {student['lates']}")
-                print()
-
-                # Display assignment marks
-                print("  Assignment Marks:")
-                for i in range(config['num_marks']):
-                    mark_info = config['marks'][i]
-                    mark_val = student['marks'][i]
-                    print(f"    {mark_info['name']:4s} ({mark_info['date']:10s}): {format_mark(mark_val):>5s} / {mark_info['total']:.1f}")
-                print()
-
-                # Display category marks
-                print("  Category Marks:")
-                for i in range(config['num_cat']):
-                    cat_name = config['categories'][i][0]
-                    cat_mark = student['catmarks'][i]
-                    print(f"    {cat_name:12s}: {format_mark(cat_mark):>5s}%")
-                print()
-
-                # Display term marks
-                if config['num_terms'] > 0:
-                    print("  Term Marks:")
-                    for i in range(config['num_terms']):
-                        term_mark = student['termmarks'][i]
-                        if term_mark > 0 and term_mark < 999:
-                            print(f"    Term {i+1}: {format_mark(term_mark):>5s}%")
-                    print()
-
-                # Display final mark
-                print(f"  FINAL MARK: {format_mark(student['finalmark'])}%")
-                print(f"\n{'-'*80}\n")
-
-            except Exception as e:
-                # End of file or error
-                break
+        records = decode_class(f.read(), config, rec_file)
+    print(f"{len(records.students)} students in {len(records.records)} records\n")
+
+    student_num = 0
+    for student in records.records:
+        student_num += 1
+
+        # Skip empty records
+        if not student['name']:
+            continue
+
+        print(f"Student #{student_num}: {student['name']}")
+        print(f"  Student No: {student['studentno']}")
+        print(f"  Homeform:   {student['homeform']}")
+        print(f"  Phone:      {student['telno']}")
+        print(f"  Absences:   {student['absences']}")
+        print(f"  Lates:      {student['lates']}")
+        print()
+
+        # Display assignment marks
+        print("  Assignment Marks:")
+        for i in range(config['num_marks']):
+            mark_info = config['marks'][i]
+            mark_val = student['marks'][i]
+            print(f"    {mark_info['name']:4s} ({mark_info['date']:10s}): {format_mark(mark_val):>5s} / {mark_info['total']:.1f}")
+        print()
+
+        # Display category marks
+        print("  Category Marks:")
+        for i in range(config['num_cat']):
+            cat_name = config['categories'][i][0]
+            cat_mark = student['catmarks'][i]
+            print(f"    {cat_name:12s}: {format_mark(cat_mark):>5s}%")
+        print()
+
+        # Display term marks
+        if config['num_terms'] > 0:
+            print("  Term Marks:")
+            for i in range(config['num_terms']):
+                term_mark = student['termmarks'][i]
+                if term_mark > 0 and term_mark < 999:
+                    print(f"    Term {i+1}: {format_mark(term_mark):>5s}%")
+            print()
+
+        # Display final mark
+        print(f"  FINAL MARK: {format_mark(student['finalmark'])}%")
+        print(f"\n{'-'*80}\n")
 
     print(f"\nTotal students read: {student_num}")
 
@@ -0,0 +1,453 @@
+"""
+Turbo Pascal Real48 codec
+
+The single home of the Real48 decoder (and its inverse, encode_turbo_real,
+with encode_mark for writing marks) used by every script in this folder.
+Several interchangeable backends are registered:
+
+    reference - the original pure-Python decoder, the definition of correct
+    intmath   - integer-math fast path using a precomputed exponent table
+    numpy     - batch decoder for whole buffers (when NumPy is installed)
+
+The fastest available backend is chosen at import time with a quick
+known-value check and micro-benchmark (set MARKS_REAL48_BACKEND to force
+one). Run
+`python real48.py` to check every backend against the reference over an
+exhaustive sweep of exponent bytes and print the benchmark.
+"""
+
+import math
+import os
+import random
+import struct
+import sys
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the batch backend
+    np = None
+
+
+REAL48_SIZE = 6
+
+
+def decode_turbo_real(bytes_data):
+    """
+    Decode Turbo Pascal/Delphi 48-bit real (6 bytes)
+    Format: (-1)^s * (1.m) * 2^(exp-129)
+
+    Byte 0: 8-bit exponent
+    Bytes 1-5: 39-bit mantissa with sign bit
+
+    This is the reference implementation every backend is checked against.
+
+    Args:
+        bytes_data: 6 bytes representing a Turbo Pascal Real48
+
+    Returns:
+        float: Decoded value, or -1.0 for no mark, or None for invalid input
+    """
+    if len(bytes_data) != 6:
+        return None
+
+    exp_byte = bytes_data[0]
+    mantissa_bytes = bytes_data[1:6]
+
+    # Special case: exponent = 0 means the number is 0
+    if exp_byte == 0:
+        return -1.0  # Use -1 to indicate "no mark"
+
+    # Convert mantissa bytes to integer (little-endian)
+    mantissa_int = int.from_bytes(mantissa_bytes, 'little')
+
+    # Extract sign bit (bit 39, which is bit 7 of the 5th byte)
+    sign = 1 if (mantissa_int & 0x8000000000) == 0 else -1
+
+    # Clear the sign bit to get the actual mantissa value
+    mantissa_int = mantissa_int & 0x7FFFFFFFFF
+
+    # Calculate the real exponent (bias is 129 for Turbo Pascal real)
+    exponent = exp_byte - 129
+
+    # The mantissa is normalized with implicit leading 1: (1.m)
+    # This is the CRITICAL fix - we must add 1.0
+    mantissa_value = 1.0 + (mantissa_int / (2.0 ** 39))
+
+    # Calculate the floating point value: (-1)^s * (1.m) * 2^(exp-129)
+    value = sign * mantissa_value * (2.0 ** exponent)
+
+    return value
+
+
+NO_MARK = bytes(REAL48_SIZE)
+
+
+def encode_turbo_real(value):
+    """
+    Encode a float as a Turbo Pascal/Delphi 48-bit real (6 bytes)
+
+    The inverse of decode_turbo_real: decode_turbo_real(encode_turbo_real(x))
+    gives back x for every value with a 39-bit mantissa, and other values are
+    rounded to the nearest Real48. None and 0.0 encode to the all-zero
+    pattern, which decodes to -1.0 ("no mark").
+
+    Args:
+        value: float to encode, or None for no mark
+
+    Returns:
+        bytes: 6-byte Real48
+
+    Raises:
+        OverflowError: If the value is too large for a Real48
+    """
+    if value is None or value == 0:
+        return NO_MARK
+
+    mantissa, exponent = math.frexp(abs(value))  # abs(value) = mantissa * 2^exponent, 0.5 <= mantissa < 1
+    fraction = round((mantissa * 2 - 1) * 2 ** 39)
+    if fraction == 2 ** 39:  # rounded up to the next power of two
+        fraction = 0
+        exponent += 1
+
+    exp_byte = exponent + 128
+    if exp_byte <= 0:
+        return NO_MARK  # underflows to zero
+    if exp_byte > 255:
+        raise OverflowError(f"{value} is too large for a Real48")
+
+    if value < 0:
+        fraction |= 0x8000000000
+    return bytes([exp_byte]) + fraction.to_bytes(5, 'little')
+
+
+def encode_mark(value):
+    """
+    Encode a gradebook mark as a Real48, writing "no mark" as the gradebook does
+
+    The reader shows None, negative values (-1.0 is how a blank decodes) and
+    values of 999 or more as blank (see format_mark); all of them are written
+    as the all-zero NO_MARK pattern, never as a literal -1.0 the Delphi
+    program would display. So decoding a blank and encoding it again leaves
+    its bytes unchanged.
+
+    Args:
+        value: Mark, or None for no mark
+
+    Returns:
+        bytes: 6-byte Real48
+    """
+    if value is None or value < 0 or value >= 999:
+        return NO_MARK
+    return encode_turbo_real(value)
+
+
+def _reference_many(data):
+    return [decode_turbo_real(data[i:i + REAL48_SIZE]) for i in range(0, len(data), REAL48_SIZE)]
+
+
+# (1.m) * 2^(exp-129) == (2^39 + m) * 2^(exp-129-39); both products are exact
+# in float64, so this matches the reference bit for bit.
+_SCALE = [0.0] + [2.0 ** (exp - 168) for exp in range(1, 256)]
+_IMPLICIT_ONE = 0x8000000000
+
+
+def _intmath_decode(bytes_data):
+    if len(bytes_data) != 6:
+        return None
+    exp_byte = bytes_data[0]
+    if exp_byte == 0:
+        return -1.0
+    mantissa = int.from_bytes(bytes_data[1:6], 'little')
+    if mantissa & _IMPLICIT_ONE:
+        return -(mantissa * _SCALE[exp_byte])  # sign bit doubles as the leading 1
+    return (mantissa | _IMPLICIT_ONE) * _SCALE[exp_byte]
+
+
+_INTMATH_STRUCTS = {}
+
+
+def _intmath_many(data):
+    count = len(data) // REAL48_SIZE
+    unpacker = _INTMATH_STRUCTS.get(count)
+    if unpacker is None:
+        # exponent byte, low 32 mantissa bits, top byte (7 bits + sign)
+        unpacker = _INTMATH_STRUCTS[count] = struct.Struct('<' + 'BIB' * count)
+    items = unpacker.unpack(data)
+    scale = _SCALE
+    values = []
+    for i in range(0, 3 * count, 3):
+        exp_byte = items[i]
+        if exp_byte == 0:
+            values.append(-1.0)
+            continue
+        top = items[i + 2]
+        value = ((((top & 0x7F) | 0x80) << 32) | items[i + 1]) * scale[exp_byte]
+        values.append(-value if top & 0x80 else value)
+    return values
+
+
+def decode_real48_array(data):
+    """
+    Decode a contiguous buffer of Real48 values into a float64 array
+
+    Uses the same formula as decode_turbo_real, (-1)^s * (1.m) * 2^(exp-129),
+    and the same "no mark" convention: an exponent byte of 0 decodes to -1.0.
+    Every step is exact in float64, so the results match decode_turbo_real
+    bit for bit.
+
+    Args:
+        data: bytes-like object holding N * 6 bytes, or a uint8 array whose
+              last axis has length 6 (e.g. the marks block of many records)
+
+    Returns:
+        numpy.ndarray: float64 values, shape (N,) for a flat buffer or the
+        input shape without its last axis for an array
+    """
+    if np is None:
+        raise ImportError("decode_real48_array requires NumPy")
+
+    if isinstance(data, np.ndarray):
+        raw = data
+    else:
+        raw = np.frombuffer(data, dtype=np.uint8)
+        if raw.size % REAL48_SIZE:
+            raise ValueError(f"Buffer length {raw.size} is not a multiple of {REAL48_SIZE}")
+        raw = raw.reshape(-1, REAL48_SIZE)
+
+    if raw.shape[-1] != REAL48_SIZE:
+        raise ValueError(f"Last axis must have length {REAL48_SIZE}, got {raw.shape[-1]}")
+
+    exp_byte = raw[..., 0].astype(np.int64)
+
+    # 39-bit mantissa from bytes 1-5 (little-endian), sign bit is bit 7 of byte 5
+    mantissa = raw[..., 1].astype(np.int64)
+    mantissa |= raw[..., 2].astype(np.int64) << 8
+    mantissa |= raw[..., 3].astype(np.int64) << 16
+    mantissa |= raw[..., 4].astype(np.int64) << 24
+    mantissa |= (raw[..., 5] & 0x7F).astype(np.int64) << 32
+    negative = (raw[..., 5] & 0x80) != 0
+
+    # (1.m) * 2^(exp-129), with the implicit leading 1
+    values = np.ldexp(1.0 + mantissa * (2.0 ** -39), exp_byte - 129)
+    values = np.where(negative, -values, values)
+
+    # Exponent = 0 means "no mark"
+    return np.where(exp_byte == 0, -1.0, values)
+
+
+def _numpy_many(data):
+    return decode_real48_array(data).tolist()
+
+
+# decode(6 bytes) -> float or None; decode_many(N*6 bytes) -> list of floats
+Backend = namedtuple('Backend', 'name decode decode_many')
+
+BACKENDS = {}
+
+
+def register_backend(name, decode, decode_many):
+    """
+    Register a Real48 decoding backend
+
+    A new backend is only used after it passes conformance() and wins the
+    benchmark in select_backend().
+
+    Args:
+        name: Backend name
+        decode: Function decoding one 6-byte value (None for invalid input)
+        decode_many: Function decoding a buffer of N * 6 bytes to a list
+    """
+    BACKENDS[name] = Backend(name, decode, decode_many)
+
+
+register_backend('reference', decode_turbo_real, _reference_many)
+register_backend('intmath', _intmath_decode, _intmath_many)
+if np is not None:
+    register_backend('numpy', _intmath_decode, _numpy_many)
+
+
+def _sweep_values(mantissas_per_exponent=16, seed=129):
+    """Every exponent byte with edge-case and random mantissas (both signs)"""
+    rng = random.Random(seed)
+    edge = [0, 1, 0x7FFFFFFFFF, 0x4000000000, 0x0800000000]
+    values = []
+    for exp_byte in range(256):
+        mantissas = edge + [rng.getrandbits(39) for _ in range(mantissas_per_exponent)]
+        for mantissa in mantissas:
+            for sign in (0, 0x8000000000):
+                values.append(bytes([exp_byte]) + (mantissa | sign).to_bytes(5, 'little'))
+    return values
+
+
+# Known values from the gradebooks; (m) instead of (1.m) halves them
+_KNOWN_VALUES = [
+    (bytes.fromhex('810000000000'), 1.0),
+    (bytes.fromhex('850000000008'), 17.0),
+    (bytes.fromhex('850000000068'), 29.0),
+    (bytes.fromhex('000000000000'), -1.0),
+]
+
+
+def conformance(names=None, mantissas_per_exponent=16):
+    """
+    Check backends against the reference decoder
+
+    Sweeps all 256 exponent bytes, each with edge-case and random mantissas
+    of both signs, and compares results bit for bit, through both decode
+    and decode_many. Known gradebook values are also checked, so a backend
+    that drops the implicit leading 1 (the halved-marks bug) always fails.
+
+    Args:
+        names: Backend names to check (all registered by default)
+        mantissas_per_exponent: Random mantissas per exponent byte
+
+    Returns:
+        dict: Backend name -> list of (hex bytes, expected, got) mismatches
+    """
+    return _compare(names, _sweep_values(mantissas_per_exponent))
+
+
+def known_value_check(names=None):
+    """
+    Quick check of backends against the reference, cheap enough for import time
+
+    Compares the known gradebook values and a few edge-case exponents and
+    mantissas of both signs; conformance() is the exhaustive version.
+
+    Args:
+        names: Backend names to check (all registered by default)
+
+    Returns:
+        dict: Backend name -> list of (hex bytes, expected, got) mismatches
+    """
+    values = [bytes([exp_byte]) + (mantissa | sign).to_bytes(5, 'little')
+              for exp_byte in (0x01, 0x7F, 0x81, 0x87, 0xFF)
+              for mantissa in (0, 1, 0x7FFFFFFFFF, 0x4000000000)
+              for sign in (0, 0x8000000000)]
+    return _compare(names, values)
+
+
+def _compare(names, values):
+    """Mismatches of each backend against the reference on values plus the known values"""
+    expected = [decode_turbo_real(raw) for raw in values]
+    values = values + [raw for raw, _ in _KNOWN_VALUES]
+    expected += [value for _, value in _KNOWN_VALUES]
+
+    report = {}
+    for name in names or BACKENDS:
+        backend = BACKENDS[name]
+        mismatches = []
+        many = backend.decode_many(b''.join(values))
+        if len(many) != len(values):
+            mismatches.append(('decode_many', len(values), len(many)))
+        for raw, want, got_one, got_many in zip(values, expected, map(backend.decode, values), many):
+            for got in (got_one, got_many):
+                if got is None or struct.pack('<d', got) != struct.pack('<d', want):
+                    mismatches.append((raw.hex(), want, got))
+                    break
+        if backend.decode(b'\x81\x00') is not None:
+            mismatches.append(('8100', None, backend.decode(b'\x81\x00')))
+        report[name] = mismatches
+    return report
+
+
+def benchmark(names=None, records=8, repeat=3):
+    """
+    Time decode_many of each backend on a gradebook-like workload
+
+    The workload mirrors how records are decoded: per record, one call each
+    for the 100 marks, 10 category marks, 10 term marks and the final mark.
+    Small calls matter, since per-call overhead can outweigh batch speed.
+
+    Args:
+        names: Backend names to time (all registered by default)
+        records: Number of records in the workload
+        repeat: Timing runs per backend (the best is kept)
+
+    Returns:
+        dict: Backend name -> best time in seconds
+    """
+    rng = random.Random(48)
+
+    def block(count):
+        return b''.join(
+            b'\x00' * 6 if rng.random() < 0.3 else
+            bytes([rng.randrange(0x81, 0x88)]) + rng.getrandbits(39).to_bytes(5, 'little')
+            for _ in range(count)
+        )
+
+    blocks = [block(count) for _ in range(records) for count in (100, 10, 10, 1)]
+    timings = {}
+    for name in names or BACKENDS:
+        decode_many = BACKENDS[name].decode_many
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for data in blocks:
+                decode_many(data)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    return timings
+
+
+_selected = BACKENDS['reference']
+
+
+def select_backend(name=None):
+    """
+    Choose the backend used by decode() and decode_many()
+
+    Args:
+        name: Backend to use, or None to pick the fastest by benchmark() of
+              the backends that pass known_value_check()
+
+    Returns:
+        str: Name of the selected backend
+    """
+    global _selected
+    if name is None:
+        passing = [backend for backend, mismatches in known_value_check().items() if not mismatches]
+        timings = benchmark(passing or ['reference'])
+        name = min(timings, key=timings.get)
+    _selected = BACKENDS[name]
+    return name
+
+
+def selected_backend():
+    """Return the name of the backend in use"""
+    return _selected.name
+
+
+def decode(bytes_data):
+    """Decode one Real48 value with the selected backend"""
+    return _selected.decode(bytes_data)
+
+
+def decode_many(data):
+    """
+    Decode a buffer of consecutive Real48 values with the selected backend
+
+    Args:
+        data: bytes holding a whole number of 6-byte reals
+
+    Returns:
+        list: Decoded floats (-1.0 for no mark)
+    """
+    return _selected.decode_many(data)
+
+
+select_backend(os.environ.get('MARKS_REAL48_BACKEND') or None)
+
+
+if __name__ == '__main__':
+    failed = False
+    for name, mismatches in conformance(mantissas_per_exponent=256).items():
+        status = 'OK' if not mismatches else f'FAILED ({len(mismatches)} mismatches, e.g. {mismatches[0]})'
+        failed = failed or bool(mismatches)
+        print(f"{name:10s} conformance: {status}")
+    for name, seconds in sorted(benchmark().items(), key=lambda item: item[1]):
+        print(f"{name:10s} {seconds * 1e6:9.1f} us per 8 records")
+    print(f"Selected backend: {selected_backend()}")
+    sys.exit(1 if failed else 0)
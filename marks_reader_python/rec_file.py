@@ -0,0 +1,192 @@
+"""
+Memory-mapped random access to studentrec40 records
+
+RecFile maps a .rec file and behaves like a sequence of records. Records
+are found by their fixed 796-byte stride, so indexing is O(1), and each
+RecordView decodes a field only when it is accessed. Opened with
+writable=True, fields can be patched in place: a single mark is one 6-byte
+write into the mapping and the rest of the file is never rewritten.
+"""
+
+import mmap
+import os
+
+from marks_reader import (FIELDS_BY_NAME, RECORD_SIZE, decode_turbo_real,
+                          encode_field, encode_mark, unpack_field,
+                          unpack_student_record)
+
+
+class RecordView:
+    """
+    Lazy view of one studentrec40 record
+
+    Supports the same key access as the dicts returned by read_student_record,
+    e.g. view['name'] or view['marks'][3], but only decodes the fields used.
+    In a writable RecFile, view['name'] = ... and set_element() write
+    straight into the file.
+    """
+
+    __slots__ = ('_buffer', 'index', 'offset', '_cache')
+
+    def __init__(self, buffer, index, offset):
+        self._buffer = buffer
+        self.index = index
+        self.offset = offset
+        self._cache = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        try:
+            field = FIELDS_BY_NAME[name]
+        except KeyError:
+            raise KeyError(name) from None
+        value = unpack_field(self._buffer, field, self.offset)
+        self._cache[name] = value
+        return value
+
+    def __setitem__(self, name, value):
+        try:
+            field = FIELDS_BY_NAME[name]
+        except KeyError:
+            raise KeyError(name) from None
+        start = self.offset + field.offset
+        self._buffer[start:start + field.size] = encode_field(field, value)
+        self._cache.pop(name, None)
+
+    def __contains__(self, name):
+        return name in FIELDS_BY_NAME
+
+    def __iter__(self):
+        return iter(FIELDS_BY_NAME)
+
+    def __len__(self):
+        return len(FIELDS_BY_NAME)
+
+    def __repr__(self):
+        return f"<RecordView #{self.index} at offset {self.offset}>"
+
+    def keys(self):
+        return FIELDS_BY_NAME.keys()
+
+    def get(self, name, default=None):
+        return self[name] if name in FIELDS_BY_NAME else default
+
+    def element(self, name, i):
+        """
+        Decode one element of a real array field (e.g. a single mark)
+
+        Args:
+            name: Field name ('marks', 'catmarks' or 'termmarks')
+            i: Zero-based element index
+
+        Returns:
+            float: Decoded value (999.0 for invalid input)
+        """
+        field = FIELDS_BY_NAME[name]
+        if field.kind != 'real' or field.length is None:
+            raise KeyError(f"{name} is not a real array field")
+        if not 0 <= i < field.length:
+            raise IndexError(f"{name} index {i} out of range")
+        start = self.offset + field.offset + 6 * i
+        value = decode_turbo_real(self._buffer[start:start + 6])
+        return value if value is not None else 999.0
+
+    def set_element(self, name, i, value):
+        """
+        Overwrite one element of a real array field (e.g. a single mark)
+
+        Writes exactly the element's 6 bytes. The RecFile must be writable.
+
+        Args:
+            name: Field name ('marks', 'catmarks' or 'termmarks')
+            i: Zero-based element index
+            value: New value, or None (or -1.0) for no mark
+        """
+        field = FIELDS_BY_NAME[name]
+        if field.kind != 'real' or field.length is None:
+            raise KeyError(f"{name} is not a real array field")
+        if not 0 <= i < field.length:
+            raise IndexError(f"{name} index {i} out of range")
+        start = self.offset + field.offset + 6 * i
+        self._buffer[start:start + 6] = encode_mark(value)
+        self._cache.pop(name, None)
+
+    def raw(self):
+        """Return the record's 796 bytes as a memoryview (no copy)"""
+        return memoryview(self._buffer)[self.offset:self.offset + RECORD_SIZE]
+
+    def to_dict(self):
+        """Decode the whole record into a read_student_record-style dict"""
+        return unpack_student_record(self._buffer, self.offset)
+
+
+class RecFile:
+    """
+    Sequence of studentrec40 records in a memory-mapped .rec file
+
+    len() gives the number of complete records; indexing returns a RecordView
+    and slicing a list of them. Use as a context manager, or call close().
+    A trailing partial record is not counted.
+
+    The file is read-only unless opened with writable=True. Writes go
+    through the shared mapping; flush() (or close()) pushes them to disk.
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        self._file = open(path, 'r+b' if writable else 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            # mmap cannot map an empty file
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=access) if size else b''
+        except Exception:
+            self._file.close()
+            raise
+        self.size = size
+        self._count = size // RECORD_SIZE
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        return self._view(index)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._view(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _view(self, index):
+        return RecordView(self._buffer, index, index * RECORD_SIZE)
+
+    @property
+    def trailing_bytes(self):
+        """Number of bytes after the last complete record"""
+        return self.size % RECORD_SIZE
+
+    def flush(self):
+        """Write patched records back to the file"""
+        if self.writable and isinstance(self._buffer, mmap.mmap) and not self._buffer.closed:
+            self._buffer.flush()
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self.flush()
+            self._buffer.close()
+        self._file.close()
@@ -0,0 +1,300 @@
+"""
+Per-record change detection and change feed
+
+Next to each class's CSVs, `{class_code}_records.json` keeps a hash of every
+796-byte studentrec40 slot of the .rec file last exported. When the .rec is
+saved again, only the slots whose hash changed are decoded; each changed
+cell is appended to `_change_feed.csv` as (student, column, old value, new
+value), and just those students' rows of the marks and attendance CSVs are
+replaced (every other line is copied unchanged). The transposed CSV has a
+column per student, so its changed columns are patched in every row. A
+class whose students were added, removed or reordered, whose config
+changed, or whose CSVs no longer match is converted in full instead.
+
+Usage:
+    py record_diff.py [--classes-dir DIR] [--output-dir DIR] [--recursive]
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+
+from manifest import ConversionManifest, fingerprint, matches
+from marks_reader import (ATTENDANCE_HEADER, RECORD_SIZE, attendance_row, class_output_paths,
+                          convert_class_to_csv, convert_classes, find_class_files, marks_csv_header,
+                          marks_row, parse_config_text, unpack_student_record, write_summary_csv)
+
+
+RECORDS_VERSION = 1
+FEED_NAME = '_change_feed.csv'
+FEED_HEADER = ['Time', 'Class Code', 'Student', 'Column', 'Old', 'New']
+
+
+def record_hashes(data):
+    """
+    Hash every complete studentrec40 slot of a .rec file
+
+    Args:
+        data: Contents of the .rec file
+
+    Returns:
+        list: 16-digit hex BLAKE2b digest per slot (a trailing partial record is ignored)
+    """
+    view = memoryview(data)
+    return [hashlib.blake2b(view[offset:offset + RECORD_SIZE], digest_size=8).hexdigest()
+            for offset in range(0, len(view) - RECORD_SIZE + 1, RECORD_SIZE)]
+
+
+def records_path(output_dir, class_code):
+    """Path of a class's record fingerprints"""
+    return os.path.join(output_dir, f"{class_code}_records.json")
+
+
+def load_records(path):
+    """Read a record fingerprint file (None if missing, unreadable or outdated)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get('version') == RECORDS_VERSION else None
+
+
+def save_records(path, config_text, hashes, rows, output_paths):
+    """
+    Write a class's record fingerprints
+
+    Args:
+        path: Fingerprint file path
+        config_text: Contents of the .txt config the CSVs were written from
+        hashes: record_hashes of the .rec file
+        rows: Slot index of each CSV row (the non-empty records, in order)
+        output_paths: The class's CSV files, fingerprinted so edits are noticed
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': RECORDS_VERSION,
+            'config_sha256': hashlib.sha256(config_text.encode('utf-8')).hexdigest(),
+            'hashes': hashes,
+            'rows': rows,
+            'outputs': {path: fingerprint(path) for path in output_paths},
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def csv_line(cells):
+    """Format one row exactly as csv.writer writes it"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(cells)
+    return buffer.getvalue()
+
+
+def parse_line(line):
+    return next(csv.reader([line]))
+
+
+def read_lines(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return f.readlines()
+
+
+def write_lines(path, lines):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        f.writelines(lines)
+    os.replace(tmp_path, path)
+
+
+def student_cells(student, config):
+    """A student's marks CSV row followed by the attendance-only cells, as strings"""
+    return marks_row(student, config) + [str(cell) for cell in attendance_row(student)[3:]]
+
+
+def diff_cells(key, labels, old, new):
+    """
+    Changes between one student's old and new cells
+
+    Args:
+        key: Student number (or name when it has none)
+        labels: Column title of each cell
+        old, new: Lists of cells, or None for a student added or removed
+
+    Returns:
+        list: (student, column, old value, new value) per changed cell
+    """
+    if old is None:
+        return [(key, labels[0], '', new[0])]
+    if new is None:
+        return [(key, labels[0], old[0], '')]
+    return [(key, label, a, b) for label, a, b in zip(labels, old, new) if a != b]
+
+
+def update_class(rec_file, txt_file, output_dir, preloaded=None, feed=True):
+    """
+    Bring a class's CSVs up to date, rewriting only the rows that changed
+
+    Args:
+        rec_file: Path to .rec binary file
+        txt_file: Path to .txt configuration file
+        output_dir: Output directory for CSV files
+        preloaded: Optional (rec bytes, config text), as for convert_class_to_csv
+        feed: Append the changes to the output directory's change feed
+
+    Returns:
+        tuple: (summary dict as from convert_class_to_csv (None if no
+        students), list of (student, column, old, new) changes, True if the
+        CSVs were written in full)
+    """
+    if preloaded is None:
+        with open(rec_file, 'rb') as f:
+            data = f.read()
+        with open(txt_file, 'r') as f:
+            config_text = f.read()
+    else:
+        data, config_text = preloaded
+    config = parse_config_text(config_text)
+    class_code = config['class_code']
+    output_paths = class_output_paths(output_dir, class_code)
+    fingerprint_path = records_path(output_dir, class_code)
+    hashes = record_hashes(data)
+
+    previous = load_records(fingerprint_path)
+    if (previous is None
+            or previous['config_sha256'] != hashlib.sha256(config_text.encode('utf-8')).hexdigest()
+            or not all(matches(path, recorded) for path, recorded in previous['outputs'].items())):
+        return full_rewrite(rec_file, txt_file, output_dir, data, config_text, hashes), [], True
+
+    old_hashes = previous['hashes']
+    old_rows = previous['rows']
+    changed = [slot for slot in range(max(len(hashes), len(old_hashes)))
+               if slot >= len(hashes) or slot >= len(old_hashes) or hashes[slot] != old_hashes[slot]]
+    summary = {
+        'class_code': class_code,
+        'class_desc': config['class_desc'],
+        'num_students': len(old_rows),
+        'num_marks': config['num_marks']
+    }
+    print(f"Processing {os.path.basename(rec_file)}...")
+    if not changed:
+        print("  No records changed")
+        return summary if old_rows else None, [], False
+
+    # Decode only the changed slots, and read their old cells from the CSVs
+    marks_lines = read_lines(output_paths[0])
+    attendance_lines = read_lines(output_paths[1])
+    row_of = {slot: row for row, slot in enumerate(old_rows)}
+    labels = marks_csv_header(config) + ATTENDANCE_HEADER[3:]
+    old_cells = {}
+    new_cells = {}
+    changes = []
+    for slot in changed:
+        old = new = None
+        if slot in row_of:
+            line = row_of[slot] + 1  # after the header line
+            old = parse_line(marks_lines[line]) + parse_line(attendance_lines[line])[3:]
+        if slot < len(hashes):
+            student = unpack_student_record(data, slot * RECORD_SIZE, config)
+            if student['name']:
+                new = student_cells(student, config)
+        old_cells[slot] = old
+        new_cells[slot] = new
+        if old is not None or new is not None:
+            cells = new or old
+            changes.extend(diff_cells(cells[1] or cells[0], labels, old, new))
+    if changes and feed:
+        append_feed(changes, class_code, output_dir)
+
+    rows = sorted([slot for slot in old_rows if slot not in new_cells] +
+                  [slot for slot, cells in new_cells.items() if cells is not None])
+    if rows != old_rows:
+        # Students were added, removed or emptied, so every row moves
+        return full_rewrite(rec_file, txt_file, output_dir, data, config_text, hashes), changes, True
+
+    width = len(marks_csv_header(config))
+    patched = [(row_of[slot], cells) for slot, cells in new_cells.items() if cells != old_cells[slot]]
+    if patched:
+        transposed = [parse_line(line) for line in read_lines(output_paths[2])]
+        for row, cells in patched:
+            marks_lines[row + 1] = csv_line(cells[:width])
+            attendance_lines[row + 1] = csv_line(cells[:3] + cells[width:])
+            transposed[0][row + 1] = cells[0]
+            for line, cell in zip(transposed[1:], cells[3:width]):
+                line[row + 1] = cell
+        write_lines(output_paths[0], marks_lines)
+        write_lines(output_paths[1], attendance_lines)
+        write_lines(output_paths[2], [csv_line(line) for line in transposed])
+    print(f"  Updated {len(patched)} rows of {output_paths[0]} and its attendance and transposed CSVs")
+    print(f"  {len(changes)} changed cells")
+    save_records(fingerprint_path, config_text, hashes, rows, output_paths)
+    return summary, changes, False
+
+
+def full_rewrite(rec_file, txt_file, output_dir, data, config_text, hashes):
+    """Convert a class in full and fingerprint the result"""
+    summary = convert_class_to_csv(rec_file, txt_file, output_dir, preloaded=(data, config_text))
+    if summary is not None:
+        rows = [slot for slot in range(len(hashes))
+                if unpack_student_record(data, slot * RECORD_SIZE, fields=('name',))['name']]
+        save_records(records_path(output_dir, summary['class_code']), config_text, hashes, rows,
+                     class_output_paths(output_dir, summary['class_code']))
+    return summary
+
+
+def append_feed(changes, class_code, output_dir, now=None):
+    """
+    Append changes to the output directory's change feed
+
+    Args:
+        changes: List of (student, column, old, new)
+        class_code: Class the changes belong to
+        output_dir: Output directory
+        now: Timestamp (the current time by default)
+
+    Returns:
+        str: Path of the feed file
+    """
+    path = os.path.join(output_dir, FEED_NAME)
+    stamp = (now or datetime.now()).isoformat(timespec='seconds')
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(FEED_HEADER)
+        writer.writerows([stamp, class_code] + list(change) for change in changes)
+    return path
+
+
+def update_class_csv(rec_file, txt_file, output_dir, preloaded=None):
+    """
+    Drop-in replacement for convert_class_to_csv that writes only changed
+    rows and appends the changes to the change feed
+
+    Returns:
+        dict: Summary information about conversion
+    """
+    return update_class(rec_file, txt_file, output_dir, preloaded)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update class CSVs record by record and log the changes")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--output-dir', default=r'S:\Chn\classes\csv_exports_python')
+    parser.add_argument('--recursive', action='store_true')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    rec_files = find_class_files(args.classes_dir, args.recursive)
+    summary, failures = convert_classes(rec_files, args.output_dir, convert=update_class_csv,
+                                        manifest=ConversionManifest(args.output_dir))
+    print(f"Created summary file: {write_summary_csv(summary, args.output_dir)}")
+    for rec_file, error in failures:
+        print(f"  {rec_file}: {error}")
+
+
+if __name__ == '__main__':
+    main()
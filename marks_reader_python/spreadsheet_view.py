@@ -0,0 +1,395 @@
+"""
+Terminal spreadsheet renderer
+
+Renders a class (or every student of the board) as a text spreadsheet.
+Each frame is built as one string and written with a single write, and
+only the rows and columns that fit on the screen are formatted: column
+widths are fixed by the column's kind rather than measured from the data,
+and records are memory-mapped RecordViews whose marks are decoded one cell
+at a time, only for the columns on screen. Column groups
+(assignments, categories, terms, final mark) come from the class config.
+The student name, number and homeform stay on screen while the mark
+columns scroll.
+
+Usage:
+    py spreadsheet_view.py CLASS.rec [--page] [--width N]
+    py spreadsheet_view.py --board [--classes-dir DIR] [--page]
+"""
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+
+from marks_reader import find_class_files, format_mark, read_config_file
+from rec_file import RecFile
+
+
+# Column widths by kind; name and number cells longer than these are cut
+KEY_WIDTHS = {'name': 25, 'studentno': 12, 'homeform': 5, 'class': 10}
+MARK_WIDTH = 7
+MISSING = '--'
+
+# Lines of a frame that are not student rows: title, rules, group and
+# column headings, status line and the pager prompt
+FRAME_LINES = 8
+
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+
+
+class Column:
+    """One spreadsheet column: heading, width and the group it belongs to"""
+
+    __slots__ = ('label', 'width', 'group', 'key')
+
+    def __init__(self, label, width, group, key=False):
+        self.label = label
+        self.width = width
+        self.group = group
+        self.key = key  # key columns are left-aligned and never scroll away
+
+
+def short_label(title):
+    """Shorten a marks CSV column title: 'A1 (SEP 12)' -> 'A1', 'TESTS %' -> 'TESTS', 'Term 1 %' -> 'T1'"""
+    if title == 'Final Mark %':
+        return 'FINAL'
+    if title.startswith('Term ') and title.endswith(' %'):
+        return 'T' + title[5:-2]
+    return title.split('(')[0].replace(' %', '').strip()
+
+
+def student_views(rec):
+    """Lazy views of the non-empty records of an open RecFile"""
+    return [view for view in rec if view['name']]
+
+
+def class_columns(config):
+    """
+    The columns of a class's marks spreadsheet, grouped as in its config
+
+    Args:
+        config: Configuration dict from read_config_file
+
+    Returns:
+        list: Column per marks CSV cell
+    """
+    columns = [Column('Student Name', KEY_WIDTHS['name'], 'Student', True),
+               Column('ID', KEY_WIDTHS['studentno'], 'Student', True),
+               Column('HF', KEY_WIDTHS['homeform'], 'Student', True)]
+    columns += [Column(short_label(mark['name']), MARK_WIDTH, 'Assignments') for mark in config['marks']]
+    columns += [Column(short_label(name), max(MARK_WIDTH, len(name) + 1), 'Categories')
+                for name, _ in config['categories']]
+    columns += [Column(f'T{i + 1}', MARK_WIDTH, 'Terms') for i in range(config['num_terms'])]
+    columns.append(Column('FINAL', MARK_WIDTH, 'Final'))
+    return columns
+
+
+def class_cells(config):
+    """
+    Cell functions matching class_columns(config)
+
+    Each function formats one cell of a student's row from a RecordView,
+    decoding just that mark, so columns that are not drawn are never
+    decoded or formatted.
+
+    Args:
+        config: Configuration dict from read_config_file
+
+    Returns:
+        list: Function(student) -> str per column
+    """
+    cells = [lambda student, key=key: student[key] for key in ('name', 'studentno', 'homeform')]
+    for name, count in (('marks', config['num_marks']), ('catmarks', config['num_cat']),
+                        ('termmarks', config['num_terms'])):
+        cells += [lambda student, name=name, i=i: format_mark(student.element(name, i)) for i in range(count)]
+    cells.append(lambda student: format_mark(student['finalmark']))
+    return cells
+
+
+def pick_cells(row, indexes):
+    """The cells of a ready-made row at the given column indexes ('' past its end)"""
+    return [row[i] if i < len(row) else '' for i in indexes]
+
+
+def header_columns(header):
+    """
+    Columns for a marks CSV read without its config
+
+    The groups are recovered from the titles marks_csv_header writes.
+
+    Args:
+        header: Header row of a marks CSV
+
+    Returns:
+        list: Column per cell
+    """
+    columns = [Column('Student Name', KEY_WIDTHS['name'], 'Student', True),
+               Column('ID', KEY_WIDTHS['studentno'], 'Student', True),
+               Column('HF', KEY_WIDTHS['homeform'], 'Student', True)]
+    for title in header[3:]:
+        if title == 'Final Mark %':
+            group = 'Final'
+        elif title.startswith('Term ') and title.endswith(' %'):
+            group = 'Terms'
+        elif title.endswith(' %'):
+            group = 'Categories'
+        else:
+            group = 'Assignments'
+        label = short_label(title)
+        columns.append(Column(label, max(MARK_WIDTH, len(label) + 1), group))
+    return columns
+
+
+def config_legend(config):
+    """
+    Legend lines for a class: assignment point values and category weights
+
+    Args:
+        config: Configuration dict from read_config_file
+
+    Returns:
+        str: The legend, ending with a newline
+    """
+    points = ', '.join(f"{short_label(mark['name'])}={mark['total']:g}" for mark in config['marks'])
+    weights = ', '.join(f"{name}={weight:g}%" for name, weight in config['categories'])
+    return (f"Legend:\n  HF = Homeform, T1.. = Term marks %, FINAL = Final Mark %, {MISSING} = no mark\n\n"
+            f"Assignment Point Values:\n  {points}\n\nCategory Weights:\n  {weights}\n")
+
+
+class SpreadsheetView:
+    """
+    A scrollable text view of rows of cells
+
+    Args:
+        title: First line of every frame
+        columns: List of Column
+        items: Sequence (len and indexing) of row sources
+        make_row: Called as make_row(item, indexes) for rows being drawn;
+                  returns the item's cells for just those column indexes
+        files: Open RecFiles the items read from, closed by close()
+        width: Frame width in characters (by default the terminal's when
+               paging, unlimited when writing every row)
+        height: Frame height in lines (the terminal's by default)
+    """
+
+    def __init__(self, title, columns, items, make_row=pick_cells, width=None, height=None, files=()):
+        size = shutil.get_terminal_size()
+        self.files = list(files)
+        self.title = title
+        self.columns = columns
+        self.items = items
+        self.make_row = make_row
+        self.fixed_width = width
+        self.width = width or size.columns
+        self.height = height or size.lines
+        self.key_columns = [i for i, column in enumerate(columns) if column.key]
+        self.scroll_columns = [i for i, column in enumerate(columns) if not column.key]
+
+    @classmethod
+    def from_class(cls, rec_file, txt_file, **kwargs):
+        """View of a class's marks, read from its .rec and .txt"""
+        config = read_config_file(txt_file)
+        rec = RecFile(rec_file)
+        students = student_views(rec)
+        title = f"{config['class_code']} - {config['class_desc']} - {len(students)} students"
+        cells = class_cells(config)
+        return cls(title, class_columns(config), students,
+                   lambda student, indexes: [cells[i](student) for i in indexes], files=[rec], **kwargs)
+
+    @classmethod
+    def from_csv(cls, csv_file, title=None, **kwargs):
+        """View of a marks CSV written by convert_class_to_csv"""
+        with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        header, students = rows[0], [row for row in rows[1:] if row and row[0]]
+        if title is None:
+            title = os.path.basename(csv_file).replace('_marks.csv', '') + f" - {len(students)} students"
+        return cls(title, header_columns(header), students, **kwargs)
+
+    @classmethod
+    def board(cls, rec_files, **kwargs):
+        """View of every student of many classes: class, student, category and final marks"""
+        items = []
+        files = []
+        max_cat = 0
+        for rec_file, txt_file in rec_files:
+            config = read_config_file(txt_file)
+            rec = RecFile(rec_file)
+            files.append(rec)
+            max_cat = max(max_cat, config['num_cat'])
+            items.extend((config, student) for student in student_views(rec))
+
+        columns = [Column('Class', KEY_WIDTHS['class'], 'Student', True),
+                   Column('Student Name', KEY_WIDTHS['name'], 'Student', True),
+                   Column('ID', KEY_WIDTHS['studentno'], 'Student', True),
+                   Column('HF', KEY_WIDTHS['homeform'], 'Student', True),
+                   Column('FINAL', MARK_WIDTH, 'Final')]
+        columns += [Column(f'C{i + 1}', MARK_WIDTH, 'Categories') for i in range(max_cat)]
+
+        cells = [lambda config, student: config['class_code'],
+                 lambda config, student: student['name'],
+                 lambda config, student: student['studentno'],
+                 lambda config, student: student['homeform'],
+                 lambda config, student: format_mark(student['finalmark'])]
+        cells += [lambda config, student, i=i: format_mark(student.element('catmarks', i))
+                  if i < config['num_cat'] else '' for i in range(max_cat)]
+
+        def make_row(item, indexes):
+            return [cells[i](*item) for i in indexes]
+
+        title = f"Board - {len(items)} students in {len(rec_files)} classes"
+        return cls(title, columns, items, make_row, files=files, **kwargs)
+
+    def close(self):
+        """Close the .rec files the view reads from"""
+        for rec in self.files:
+            rec.close()
+        self.files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def page_size(self):
+        """Number of student rows in a full-screen frame"""
+        return max(1, self.height - FRAME_LINES)
+
+    def visible_columns(self, left=0, width=None):
+        """Key columns plus as many scroll columns from `left` as fit the width"""
+        width = width or self.width
+        visible = list(self.key_columns)
+        used = sum(self.columns[i].width + 1 for i in visible)
+        for i in self.scroll_columns[left:]:
+            used += self.columns[i].width
+            if used > width and len(visible) > len(self.key_columns):
+                break
+            visible.append(i)
+        return visible
+
+    def render(self, top=0, rows=None, left=0, width=None):
+        """
+        Build one frame
+
+        Args:
+            top: Index of the first row shown
+            rows: Number of rows shown (all remaining rows by default)
+            left: Index (among the scrolling mark columns) of the first one shown
+            width: Frame width (self.width by default)
+
+        Returns:
+            str: The frame, ending with a newline
+        """
+        visible = self.visible_columns(left, width)
+        columns = [self.columns[i] for i in visible]
+        total = len(self.items)
+        end = total if rows is None else min(total, top + rows)
+
+        groups = []
+        headings = []
+        for column in columns:
+            if column.key:
+                headings.append(f"{column.label[:column.width]:<{column.width}} ")
+            else:
+                headings.append(f"{column.label[:column.width - 1]:>{column.width}}")
+            if groups and groups[-1][0] == column.group:
+                groups[-1][1] += len(headings[-1])
+            else:
+                groups.append([column.group, len(headings[-1])])
+        heading_line = ''.join(headings)
+        rule_width = max(len(heading_line), min(width or self.width, len(self.title)))
+
+        lines = [self.title, '=' * rule_width,
+                 ''.join(f"{name[:span - 1]:<{span}}" for name, span in groups).rstrip(),
+                 heading_line.rstrip(), '-' * rule_width]
+        for index in range(top, end):
+            row = self.make_row(self.items[index], visible)
+            cells = []
+            for value, column in zip(row, columns):
+                value = str(value)
+                if column.key:
+                    cells.append(f"{value[:column.width]:<{column.width}} ")
+                else:
+                    cells.append(f"{value or MISSING:>{column.width}}")
+            lines.append(''.join(cells).rstrip())
+        lines.append('=' * rule_width)
+
+        shown = visible[len(self.key_columns):]
+        first = self.scroll_columns.index(shown[0]) + 1 if shown else 0
+        lines.append(f"Rows {top + 1 if end > top else 0}-{end} of {total}, "
+                     f"columns {first}-{first + len(shown) - 1 if shown else 0} of {len(self.scroll_columns)}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, out=None):
+        """Write every row as one frame (for redirecting to a file, or small classes)"""
+        (out or sys.stdout).write(self.render(width=self.fixed_width or sys.maxsize))
+
+    def page(self, read_command=input, out=None):
+        """
+        Interactive pager: formats only the rows and columns on screen
+
+        Commands: Enter or n next page, p previous page, > and < scroll the
+        mark columns, g first page, G last page, q quit.
+
+        Args:
+            read_command: Called with the prompt to get each command
+            out: Stream to draw on (sys.stdout by default)
+        """
+        out = out or sys.stdout
+        clear = CLEAR_SCREEN if getattr(out, 'isatty', lambda: False)() else ''
+        top = left = 0
+        step = max(1, len(self.visible_columns()) - len(self.key_columns))
+        last_page = max(0, (len(self.items) - 1) // self.page_size * self.page_size)
+        while True:
+            out.write(clear + self.render(top, self.page_size, left))
+            out.flush()
+            try:
+                command = read_command("[Enter] next  p prev  < > columns  g/G first/last  q quit: ").strip()
+            except EOFError:
+                return
+            if command == 'q':
+                return
+            elif command in ('', 'n'):
+                if top >= last_page:
+                    return
+                top += self.page_size
+            elif command == 'p':
+                top = max(0, top - self.page_size)
+            elif command == '>':
+                left = min(max(0, len(self.scroll_columns) - 1), left + step)
+            elif command == '<':
+                left = max(0, left - step)
+            elif command == 'g':
+                top = 0
+            elif command == 'G':
+                top = last_page
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show a class or the whole board as a spreadsheet")
+    parser.add_argument('rec_file', nargs='?', help="class .rec file (its .txt is next to it)")
+    parser.add_argument('--board', action='store_true', help="every student of every class")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--page', action='store_true', help="page through the rows interactively")
+    parser.add_argument('--width', type=int, help="frame width (default: the terminal's)")
+    args = parser.parse_args(argv)
+
+    if args.board:
+        view = SpreadsheetView.board(find_class_files(args.classes_dir), width=args.width)
+    elif args.rec_file:
+        view = SpreadsheetView.from_class(args.rec_file, os.path.splitext(args.rec_file)[0] + '.txt',
+                                          width=args.width)
+    else:
+        parser.error("give a .rec file or --board")
+    with view:
+        if args.page:
+            view.page()
+        else:
+            view.write()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Export classes to a SQLite database
+
+Loads .rec/.txt pairs into normalized tables (classes, categories,
+assessments, students and their marks) so reports can query every class
+at once instead of re-parsing the marks CSVs. Each class is upserted: its
+rows are replaced, and a class whose .rec/.txt have not changed since the
+last load is skipped. A load runs in a single transaction with batched
+executemany inserts.
+
+Usage:
+    py sqlite_export.py [--classes-dir DIR] [--database marks.db] [--force]
+"""
+
+import argparse
+import os
+import sqlite3
+
+from marks_reader import find_class_files, iter_student_records, read_config_file
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classes (
+    class_code TEXT PRIMARY KEY,
+    class_desc TEXT,
+    version REAL,
+    num_marks INTEGER,
+    num_cat INTEGER,
+    num_terms INTEGER,
+    rec_file TEXT,
+    rec_size INTEGER,
+    rec_mtime_ns INTEGER,
+    txt_size INTEGER,
+    txt_mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS categories (
+    class_code TEXT NOT NULL,
+    category INTEGER NOT NULL,
+    name TEXT,
+    weight REAL,
+    PRIMARY KEY (class_code, category)
+);
+CREATE TABLE IF NOT EXISTS assessments (
+    class_code TEXT NOT NULL,
+    assessment INTEGER NOT NULL,
+    name TEXT,
+    date TEXT,
+    desc TEXT,
+    total REAL,
+    category INTEGER,
+    average REAL,
+    PRIMARY KEY (class_code, assessment)
+);
+CREATE TABLE IF NOT EXISTS students (
+    class_code TEXT NOT NULL,
+    student INTEGER NOT NULL,
+    name TEXT,
+    studentno TEXT,
+    homeform TEXT,
+    telno TEXT,
+    absences INTEGER,
+    lates INTEGER,
+    final_mark REAL,
+    PRIMARY KEY (class_code, student)
+);
+CREATE TABLE IF NOT EXISTS marks (
+    class_code TEXT NOT NULL,
+    student INTEGER NOT NULL,
+    assessment INTEGER NOT NULL,
+    mark REAL NOT NULL,
+    PRIMARY KEY (class_code, student, assessment)
+);
+CREATE TABLE IF NOT EXISTS category_marks (
+    class_code TEXT NOT NULL,
+    student INTEGER NOT NULL,
+    category INTEGER NOT NULL,
+    mark REAL NOT NULL,
+    PRIMARY KEY (class_code, student, category)
+);
+CREATE TABLE IF NOT EXISTS term_marks (
+    class_code TEXT NOT NULL,
+    student INTEGER NOT NULL,
+    term INTEGER NOT NULL,
+    mark REAL NOT NULL,
+    PRIMARY KEY (class_code, student, term)
+);
+CREATE INDEX IF NOT EXISTS idx_students_studentno ON students (studentno);
+CREATE INDEX IF NOT EXISTS idx_students_homeform ON students (homeform);
+CREATE INDEX IF NOT EXISTS idx_marks_assessment ON marks (class_code, assessment);
+"""
+
+# Tables holding rows that belong to one class, cleared before it is reloaded
+CLASS_TABLES = ('categories', 'assessments', 'students', 'marks', 'category_marks', 'term_marks')
+
+
+def open_database(path):
+    """
+    Open (and create if needed) a marks database
+
+    Args:
+        path: Database file path, or ':memory:'
+
+    Returns:
+        sqlite3.Connection
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def mark_value(m):
+    """A mark as stored in the database, or None for no mark"""
+    if m < 0 or m >= 999:
+        return None
+    return m
+
+
+def source_stats(rec_file, txt_file):
+    """(rec size, rec mtime_ns, txt size, txt mtime_ns) for change detection"""
+    rec = os.stat(rec_file)
+    txt = os.stat(txt_file)
+    return rec.st_size, rec.st_mtime_ns, txt.st_size, txt.st_mtime_ns
+
+
+def is_loaded(conn, class_code, rec_file, txt_file):
+    """True if the class was loaded from these files and they have not changed since"""
+    row = conn.execute("SELECT rec_file, rec_size, rec_mtime_ns, txt_size, txt_mtime_ns FROM classes "
+                       "WHERE class_code = ?", (class_code,)).fetchone()
+    return row is not None and row == (os.path.abspath(rec_file),) + source_stats(rec_file, txt_file)
+
+
+def class_rows(config, data):
+    """
+    Build the rows of every table for one class
+
+    Args:
+        config: Configuration dict from read_config_file
+        data: Contents of the .rec file
+
+    Returns:
+        dict: table name -> list of row tuples
+    """
+    code = config['class_code']
+    rows = {table: [] for table in CLASS_TABLES}
+    rows['categories'] = [(code, i, name, weight) for i, (name, weight) in enumerate(config['categories'], 1)]
+    rows['assessments'] = [(code, i, mark['name'], mark['date'], mark['desc'], mark['total'],
+                            mark['category'], mark['average'])
+                           for i, mark in enumerate(config['marks'], 1)]
+
+    for student, record in enumerate(iter_student_records(data, config), 1):
+        if not record['name']:  # Skip empty records
+            continue
+        rows['students'].append((code, student, record['name'], record['studentno'], record['homeform'],
+                                 record['telno'], record['absences'], record['lates'],
+                                 mark_value(record['finalmark'])))
+        for table, field, count in (('marks', 'marks', config['num_marks']),
+                                    ('category_marks', 'catmarks', config['num_cat']),
+                                    ('term_marks', 'termmarks', config['num_terms'])):
+            for i, m in enumerate(record[field][:count], 1):
+                value = mark_value(m)
+                if value is not None:
+                    rows[table].append((code, student, i, value))
+    return rows
+
+
+def upsert_class(conn, rec_file, txt_file, config=None):
+    """
+    Replace one class's rows (call inside a transaction)
+
+    Args:
+        conn: sqlite3.Connection
+        rec_file: Path to .rec binary file
+        txt_file: Path to .txt configuration file
+        config: Configuration dict (read from txt_file if omitted)
+
+    Returns:
+        int: Number of students loaded
+    """
+    if config is None:
+        config = read_config_file(txt_file)
+    code = config['class_code']
+    with open(rec_file, 'rb') as f:
+        data = f.read()
+    rows = class_rows(config, data)
+
+    conn.execute(
+        "INSERT INTO classes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (class_code) DO UPDATE SET class_desc = excluded.class_desc, "
+        "version = excluded.version, num_marks = excluded.num_marks, num_cat = excluded.num_cat, "
+        "num_terms = excluded.num_terms, rec_file = excluded.rec_file, rec_size = excluded.rec_size, "
+        "rec_mtime_ns = excluded.rec_mtime_ns, txt_size = excluded.txt_size, txt_mtime_ns = excluded.txt_mtime_ns",
+        (code, config['class_desc'], config['version'], config['num_marks'], config['num_cat'],
+         config['num_terms'], os.path.abspath(rec_file)) + source_stats(rec_file, txt_file))
+    for table in CLASS_TABLES:
+        conn.execute(f"DELETE FROM {table} WHERE class_code = ?", (code,))
+        if rows[table]:
+            placeholders = ', '.join('?' * len(rows[table][0]))
+            conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows[table])
+    return len(rows['students'])
+
+
+def load_classes(conn, rec_files, force=False):
+    """
+    Load several classes in one transaction
+
+    Args:
+        conn: sqlite3.Connection from open_database
+        rec_files: List of (rec_path, txt_path) tuples
+        force: Reload classes whose files have not changed
+
+    Returns:
+        tuple: (list of (class_code, number of students) loaded,
+        list of class codes skipped as unchanged)
+    """
+    loaded = []
+    skipped = []
+    with conn:
+        for rec_file, txt_file in rec_files:
+            config = read_config_file(txt_file)
+            if not force and is_loaded(conn, config['class_code'], rec_file, txt_file):
+                skipped.append(config['class_code'])
+                continue
+            loaded.append((config['class_code'], upsert_class(conn, rec_file, txt_file, config)))
+    return loaded, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load classes into a SQLite database")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--database', default=r'S:\Chn\classes\marks.db')
+    parser.add_argument('--force', action='store_true', help="reload unchanged classes too")
+    args = parser.parse_args(argv)
+
+    conn = open_database(args.database)
+    try:
+        loaded, skipped = load_classes(conn, sorted(find_class_files(args.classes_dir)), args.force)
+    finally:
+        conn.close()
+    for class_code, count in loaded:
+        print(f"  Loaded {class_code} ({count} students)")
+    if skipped:
+        print(f"  Skipped {len(skipped)} unchanged classes")
+    print(f"Database: {args.database}")
+
+
+if __name__ == '__main__':
+    main()
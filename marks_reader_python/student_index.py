@@ -0,0 +1,195 @@
+"""
+Board-wide student index
+
+Maps every student number to the (file, record offset) of each of the
+student's records, and every homeform to its students, across all the
+.rec files of a directory. The index is saved as JSON next to the class
+files; updating it re-reads only the .rec files that changed since the last
+update, and a lookup is one dictionary probe plus one seek into the
+memory-mapped .rec file.
+
+Usage:
+    py student_index.py STUDENTNO [--classes-dir DIR]
+    py student_index.py --homeform 10A [--classes-dir DIR]
+"""
+
+import argparse
+import json
+import mmap
+import os
+
+from manifest import fingerprint, matches
+from marks_reader import (FIELDS_BY_NAME, RECORD_SIZE, find_class_files, format_mark,
+                          read_config_file, unpack_field)
+from rec_file import RecFile
+
+
+INDEX_NAME = '_student_index.json'
+INDEX_VERSION = 1
+
+
+def scan_rec_file(rec_file):
+    """
+    Read the identifying fields of every non-empty record in a .rec file
+
+    Only the name, student number and homeform of each record are decoded.
+
+    Args:
+        rec_file: Path to .rec binary file
+
+    Returns:
+        list: [offset, studentno, homeform, name] per student
+    """
+    fields = [FIELDS_BY_NAME[name] for name in ('name', 'studentno', 'homeform')]
+    students = []
+    with open(rec_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < RECORD_SIZE:
+            return students
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for offset in range(0, size - RECORD_SIZE + 1, RECORD_SIZE):
+                name, studentno, homeform = (unpack_field(buffer, field, offset) for field in fields)
+                if name:  # Skip empty records
+                    students.append([offset, studentno, homeform, name])
+    return students
+
+
+class StudentIndex:
+    """
+    Persistent student number and homeform index over many .rec files
+
+    Usage:
+        index = StudentIndex(os.path.join(classes_dir, INDEX_NAME))
+        index.update(find_class_files(classes_dir))
+        index.save()
+        for class_code, record in index.records('300000001'):
+            ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('version') == INDEX_VERSION:
+            self.files = data.get('files', {})
+        self._build()
+
+    @staticmethod
+    def key(rec_file):
+        return os.path.normcase(os.path.abspath(rec_file))
+
+    def _build(self):
+        """Rebuild the in-memory lookup tables from the per-file entries"""
+        self.by_studentno = {}
+        self.by_homeform = {}
+        for rec_file, entry in self.files.items():
+            for offset, studentno, homeform, name in entry['students']:
+                if not studentno:
+                    continue
+                self.by_studentno.setdefault(studentno, []).append((rec_file, offset))
+                self.by_homeform.setdefault(homeform, set()).add(studentno)
+
+    def update(self, rec_files):
+        """
+        Bring the index up to date with a set of classes
+
+        Files whose .rec and .txt are unchanged keep their entries; changed
+        or new files are re-scanned and files not in rec_files are dropped.
+
+        Args:
+            rec_files: List of (rec_path, txt_path) tuples
+
+        Returns:
+            tuple: (list of re-indexed rec paths, list of dropped rec paths)
+        """
+        reindexed = []
+        current = set()
+        for rec_file, txt_file in rec_files:
+            key = self.key(rec_file)
+            current.add(key)
+            entry = self.files.get(key)
+            if entry is not None and matches(rec_file, entry['rec']) and matches(txt_file, entry['txt']):
+                continue
+            self.files[key] = {
+                'rec': fingerprint(rec_file),
+                'txt': fingerprint(txt_file),
+                'class_code': read_config_file(txt_file)['class_code'],
+                'students': scan_rec_file(rec_file),
+            }
+            reindexed.append(rec_file)
+        dropped = [key for key in self.files if key not in current]
+        for key in dropped:
+            del self.files[key]
+        self._build()
+        return reindexed, dropped
+
+    def lookup(self, studentno):
+        """
+        Locate a student's records
+
+        Args:
+            studentno: Student number
+
+        Returns:
+            list: (rec_path, record offset, class_code) per class the student is in
+        """
+        return [(rec_file, offset, self.files[rec_file]['class_code'])
+                for rec_file, offset in self.by_studentno.get(studentno, [])]
+
+    def homeform(self, homeform):
+        """Return the sorted student numbers of a homeform"""
+        return sorted(self.by_homeform.get(homeform, ()))
+
+    def records(self, studentno):
+        """
+        Decode a student's records
+
+        Each record is read with a single seek into the memory-mapped file.
+
+        Args:
+            studentno: Student number
+
+        Yields:
+            tuple: (class_code, record dict as from read_student_record)
+        """
+        for rec_file, offset, class_code in self.lookup(studentno):
+            with RecFile(rec_file) as rec:
+                yield class_code, rec[offset // RECORD_SIZE].to_dict()
+
+    def save(self):
+        """Write the index file"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'files': self.files}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find a student's classes or a homeform's students")
+    parser.add_argument('studentno', nargs='?')
+    parser.add_argument('--homeform')
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--index', help=f"index file (default CLASSES_DIR/{INDEX_NAME})")
+    args = parser.parse_args(argv)
+
+    index = StudentIndex(args.index or os.path.join(args.classes_dir, INDEX_NAME))
+    reindexed, dropped = index.update(find_class_files(args.classes_dir))
+    if reindexed or dropped:
+        index.save()
+        print(f"Re-indexed {len(reindexed)} files, dropped {len(dropped)}")
+
+    if args.homeform:
+        for studentno in index.homeform(args.homeform):
+            print(studentno)
+    if args.studentno:
+        for class_code, record in index.records(args.studentno):
+            final = format_mark(record['finalmark']) or '-'
+            print(f"{class_code}: {record['name']} ({record['homeform']}), final mark {final}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+Synthetic gradebook generator
+
+Writes valid .rec/.txt pairs that read_config_file and read_student_record
+accept, with configurable class, student and mark counts, for testing and
+benchmarking the reader beyond the six real classes.
+
+Usage:
+    py synth_gradebook.py OUTPUT_DIR [--classes N] [--students N] [--marks N]
+"""
+
+import argparse
+import os
+import random
+import struct
+
+from marks_reader import RECORD_SIZE
+from real48 import encode_mark
+
+
+FIRST_NAMES = ['BOBBY', 'KEVIN', 'KATHY', 'JOHNNY', 'ANTHONY', 'DAVID', 'JIMMY', 'GARY',
+               'TIAN XING', 'JIAN YONG', 'DESMOND', 'KENNY', 'CALVIN', 'LILY', 'WENDY', 'ANNA']
+LAST_NAMES = ['CHAN', 'CHOU', 'FOU', 'HOANG', 'LAM', 'LU', 'LUC', 'PHUNG', 'SHAO', 'SHI',
+              'SIU', 'TRAN', 'YAN', 'YIP', 'NG', 'WU', 'XU', 'LEE', 'MACH', 'SETO']
+CATEGORY_NAMES = ['TESTS', 'ASSIGN', 'NOTEBOOK', 'DEC EXAM', 'FINAL PROJ',
+                  'QUIZZES', 'LABS', 'PRESENT', 'JOURNAL', 'PARTICIP']
+MONTHS = ['SEP', 'OCT', 'NOV', 'DEC', 'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUNE']
+TOTALS = [3, 8, 10, 10, 11, 20, 20, 30, 31, 35, 40, 40, 78]
+
+STUDENT_TAIL = struct.Struct('<hh5h')
+
+
+def pascal_string(text, max_len):
+    """Encode a Pascal string[max_len] (length byte + padded characters)"""
+    raw = text.encode('latin-1')[:max_len]
+    return bytes([len(raw)]) + raw.ljust(max_len, b' ')
+
+
+def make_config(class_code, class_desc, num_marks, num_cat, num_terms=1, rng=None):
+    """
+    Build a configuration dict in read_config_file's format
+
+    Args:
+        class_code: Class code, e.g. 'SYN001-1'
+        class_desc: Class description
+        num_marks: Number of assessments (at most 100)
+        num_cat: Number of categories (at most 10)
+        num_terms: Number of terms (at most 10)
+        rng: random.Random instance
+
+    Returns:
+        dict: Configuration data; each mark's 'average' is filled in by
+        generate_class once the marks are known
+    """
+    rng = rng or random.Random()
+    weights = [rng.randint(1, 6) for _ in range(num_cat)]
+    scale = 100.0 / sum(weights)
+    categories = [(CATEGORY_NAMES[i], round(w * scale, 1)) for i, w in enumerate(weights)]
+    marks = []
+    for i in range(num_marks):
+        category = i % num_cat + 1 if i < num_cat else rng.randint(1, num_cat)
+        marks.append({
+            'name': f"{categories[category - 1][0][0]}{i + 1}",
+            'date': f"{MONTHS[i * len(MONTHS) // max(num_marks, 1)]} {rng.randint(1, 28)}",
+            'desc': f"Assessment {i + 1}",
+            'total': float(rng.choice(TOTALS)),
+            'category': category,
+            'average': 0.0,
+        })
+    return {
+        'version': 4.0,
+        'class_code': class_code,
+        'class_desc': class_desc,
+        'num_cat': num_cat,
+        'num_marks': num_marks,
+        'num_terms': num_terms,
+        'categories': categories,
+        'marks': marks,
+    }
+
+
+def write_config_file(config, path):
+    """
+    Write a configuration dict as a .txt file read_config_file accepts
+
+    Args:
+        config: Configuration dict
+        path: Output .txt path
+    """
+    lines = [str(config['version']), '', config['class_code'], config['class_desc'], '0', '0',
+             str(config['num_terms']), str(config['num_cat']), str(config['num_marks'])]
+    for cat_name, cat_weight in config['categories']:
+        lines += [cat_name, str(cat_weight)]
+    for mark in config['marks']:
+        lines += [mark['name'], mark['date'], mark['desc'], str(mark['total']),
+                  str(mark['category']), str(mark['average'])]
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def category_marks(marks, config):
+    """
+    Weighted category, term and final marks the way the gradebook stores them
+
+    Each category mark is weight * (marks earned / marks possible), where a
+    blank mark earns 0 of the assessment's total; a category with no marks
+    at all is blank. The final is the sum of category marks scaled to the
+    weights of categories that have marks.
+
+    Args:
+        marks: List of num_marks values (None for no mark)
+        config: Configuration dict
+
+    Returns:
+        tuple: (list of category marks or None, final mark or None)
+    """
+    earned = [0.0] * config['num_cat']
+    possible = [0.0] * config['num_cat']
+    marked = [False] * config['num_cat']
+    for value, mark in zip(marks, config['marks']):
+        possible[mark['category'] - 1] += mark['total']
+        if value is not None:
+            earned[mark['category'] - 1] += value
+            marked[mark['category'] - 1] = True
+    catmarks = []
+    for (cat_name, weight), e, p, m in zip(config['categories'], earned, possible, marked):
+        catmarks.append(weight * e / p if p and m else None)
+    used_weight = sum(w for (_, w), c in zip(config['categories'], catmarks) if c is not None)
+    final = sum(c for c in catmarks if c is not None) * 100 / used_weight if used_weight else None
+    return catmarks, final
+
+
+def student_record(name, studentno, homeform, marks, catmarks, termmarks, finalmark,
+                   telno='', absences=0, lates=0, comments=(0, 0, 0, 0, 0)):
+    """
+    Encode one 796-byte studentrec40 record
+
+    Mark lists are padded with "no mark" up to the record's 100/10/10 slots.
+
+    Returns:
+        bytes: The encoded record
+    """
+    reals = (list(marks) + [None] * 100)[:100]
+    reals += (list(catmarks) + [None] * 10)[:10]
+    reals += (list(termmarks) + [None] * 10)[:10]
+    reals.append(finalmark)
+    record = (pascal_string(name, 20) + pascal_string(studentno, 10) + pascal_string(homeform, 10)
+              + b''.join(encode_mark(value) for value in reals)
+              + pascal_string(telno, 12) + STUDENT_TAIL.pack(absences, lates, *comments))
+    assert len(record) == RECORD_SIZE
+    return record
+
+
+def generate_class(directory, class_code, num_students=30, num_marks=15, num_cat=5, num_terms=1,
+                   seed=None, missing_rate=0.05, empty_every=0, file_stem=None):
+    """
+    Write a synthetic class as a .rec/.txt pair
+
+    Marks are whole or half points out of each assessment's total. The
+    stored category, term and final marks are computed from them, and each
+    assessment's config 'average' is the class mean percentage, as in the
+    real gradebooks.
+
+    Args:
+        directory: Output directory
+        class_code: Class code, e.g. 'SYN001-1'
+        num_students: Number of students
+        num_marks: Number of assessments (at most 100)
+        num_cat: Number of categories (at most 10)
+        num_terms: Number of terms (at most 10)
+        seed: Random seed, for reproducible files
+        missing_rate: Chance that a mark is missing
+        empty_every: If > 0, write an empty record after every N students
+        file_stem: File name without extension (class code in mixed case by default)
+
+    Returns:
+        tuple: (rec_path, txt_path)
+    """
+    rng = random.Random(seed)
+    config = make_config(class_code, f"SYNTHETIC {class_code}", num_marks, num_cat, num_terms, rng)
+    stem = file_stem or class_code.capitalize()
+    rec_path = os.path.join(directory, f"{stem}.rec")
+    txt_path = os.path.join(directory, f"{stem}.txt")
+
+    sums = [0.0] * num_marks
+    counts = [0] * num_marks
+    with open(rec_path, 'wb') as f:
+        for n in range(num_students):
+            ability = rng.uniform(0.5, 1.0)
+            marks = []
+            for i, mark in enumerate(config['marks']):
+                if rng.random() < missing_rate:
+                    marks.append(None)
+                    continue
+                # Whole or half points; 0 cannot be stored (it reads as "no mark")
+                score = round(min(1.0, rng.gauss(ability, 0.1)) * mark['total'] * 2) / 2
+                score = max(score, 0.5)
+                marks.append(score)
+                sums[i] += score / mark['total'] * 100
+                counts[i] += 1
+            catmarks, final = category_marks(marks, config)
+            termmarks = [final] * num_terms
+            name = f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}"
+            f.write(student_record(name, str(300000000 + n), f"{rng.randint(9, 12)}{chr(65 + rng.randint(0, 15))}",
+                                   marks, catmarks, termmarks, final,
+                                   telno=f"416-555-{n % 10000:04d}",
+                                   absences=rng.randint(0, 10), lates=rng.randint(0, 5)))
+            if empty_every and (n + 1) % empty_every == 0:
+                f.write(bytes(RECORD_SIZE))
+
+    for i, mark in enumerate(config['marks']):
+        mark['average'] = round(sums[i] / counts[i], 1) if counts[i] else 0.0
+    write_config_file(config, txt_path)
+    return rec_path, txt_path
+
+
+def generate_board(directory, num_classes, num_students=30, num_marks=15, num_cat=5, num_terms=1, seed=0):
+    """
+    Write several synthetic classes
+
+    Args:
+        directory: Output directory (created if missing)
+        num_classes: Number of classes
+        num_students, num_marks, num_cat, num_terms: Per-class sizes
+        seed: Base random seed
+
+    Returns:
+        list: (rec_path, txt_path) tuples
+    """
+    os.makedirs(directory, exist_ok=True)
+    return [generate_class(directory, f"SYN{n:03d}-1", num_students, num_marks, num_cat, num_terms, seed=seed + n)
+            for n in range(num_classes)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic .rec/.txt gradebooks")
+    parser.add_argument('output_dir')
+    parser.add_argument('--classes', type=int, default=6)
+    parser.add_argument('--students', type=int, default=30, help="students per class")
+    parser.add_argument('--marks', type=int, default=15, help="assessments per class (max 100)")
+    parser.add_argument('--categories', type=int, default=5, help="categories per class (max 10)")
+    parser.add_argument('--terms', type=int, default=1, help="terms per class (max 10)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pairs = generate_board(args.output_dir, args.classes, args.students, args.marks,
+                           args.categories, args.terms, args.seed)
+    print(f"Wrote {len(pairs)} classes of {args.students} students to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import math
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+
+def encode_real(value):
+    """Encode a positive float as Real48 (0 or None give the no-mark pattern)"""
+    if not value:
+        return b'\x00' * 6
+    m, e = math.frexp(value)
+    mantissa = int(round((m * 2 - 1) * 2 ** 39))
+    return bytes([e - 1 + 129]) + mantissa.to_bytes(5, 'little')
+
+
+def pascal_string(text, max_len):
+    raw = text.encode('latin-1')
+    return bytes([len(raw)]) + raw.ljust(max_len, b' ')
+
+
+def make_record(name, studentno, homeform, marks, catmarks, termmarks, finalmark,
+                telno='', absences=0, lates=0):
+    reals = (list(marks) + [None] * 100)[:100] + (list(catmarks) + [None] * 10)[:10]
+    reals += (list(termmarks) + [None] * 10)[:10] + [finalmark]
+    return (pascal_string(name, 20) + pascal_string(studentno, 10) + pascal_string(homeform, 10)
+            + b''.join(encode_real(v) for v in reals) + pascal_string(telno, 12)
+            + struct.pack('<hh5h', absences, lates, 0, 0, 0, 0, 0))
+
+
+CONFIG_LINES = ['4.0', 'secret', 'ICS4M1-1', 'CS 12 - PERIOD 3', '0', '0', '1', '2', '3',
+                'TESTS', '60', 'ASSIGN', '40',
+                'A1', 'SEP 14', 'Assignment 1', '20', '2', '83.9',
+                'T1', 'OCT 18', 'Test 1', '35', '1', '80.0',
+                'A2', 'OCT 16', 'Assignment 2', '3', '2', '90.0']
+
+
+class TestClassFrame(unittest.TestCase):
+    """Test cases for the columnar class representation"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rec = os.path.join(self.tmp, 'Ics4m1-1.rec')
+        self.txt = os.path.join(self.tmp, 'Ics4m1-1.txt')
+        with open(self.txt, 'w') as f:
+            f.write('\n'.join(CONFIG_LINES) + '\n')
+        with open(self.rec, 'wb') as f:
+            f.write(make_record('CHAN BOBBY', '309031771', '12K', [17.0, 29.0, 2.0],
+                                [45.6, 30.0], [88.0], 88.0, '555-1234', 2, 1))
+            f.write(make_record('', '', '', [], [], [], None))
+            f.write(make_record('YAN KENNY', '309000001', '12F', [19.0, None, 3.0],
+                                [50.5, 40.0], [93.3], 93.3))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_columns(self):
+        """Test that the frame holds only the active slots of non-empty records"""
+        from class_frame import ClassFrame
+        frame = ClassFrame.from_files(self.rec, self.txt)
+
+        self.assertEqual(len(frame), 2)
+        self.assertEqual(frame.names.tolist(), ['CHAN BOBBY', 'YAN KENNY'])
+        self.assertEqual(frame.marks.shape, (2, 3))
+        self.assertEqual(frame.marks.tolist(), [[17.0, 29.0, 2.0], [19.0, -1.0, 3.0]])
+        self.assertEqual(frame.catmarks.shape, (2, 2))
+        self.assertEqual(frame.termmarks.shape, (2, 1))
+        self.assertAlmostEqual(frame.finalmarks[1], 93.3)
+        self.assertEqual(frame.telnos[0], '555-1234')
+        self.assertEqual(frame.absences.tolist(), [2, 0])
+
+    def test_csv_matches_convert_class_to_csv(self):
+        """Test that the frame writers reproduce the CSV export byte for byte"""
+        from class_frame import ClassFrame
+        from marks_reader import convert_class_to_csv
+
+        convert_class_to_csv(self.rec, self.txt, self.tmp)
+        frame = ClassFrame.from_files(self.rec, self.txt)
+        frame.write_marks_csv(os.path.join(self.tmp, 'frame_marks.csv'))
+        frame.write_transposed_csv(os.path.join(self.tmp, 'frame_transposed.csv'))
+
+        for expected, actual in [('ICS4M1-1_marks.csv', 'frame_marks.csv'),
+                                 ('ICS4M1-1_marks_transposed.csv', 'frame_transposed.csv')]:
+            with open(os.path.join(self.tmp, expected), 'rb') as f1, open(os.path.join(self.tmp, actual), 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+    def test_format_marks(self):
+        """Test vectorized formatting against format_mark"""
+        from class_frame import format_marks
+        from marks_reader import format_mark
+        values = [17.0, 8.5, -1.0, 999.0, 17.123, 0.05, 12.25]
+        self.assertEqual(format_marks(values).tolist(), [format_mark(v) for v in values])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestClassStats(unittest.TestCase):
+    """Test cases for the class statistics pass"""
+
+    def setUp(self):
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.rec, self.txt = generate_class(self.tmp, 'SYN001-1', num_students=40, num_marks=10,
+                                            num_cat=4, seed=6, missing_rate=0.1, empty_every=9)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_matches_direct_computation(self):
+        """Test the statistics of one assessment against a plain Python computation"""
+        import statistics
+        from class_frame import ClassFrame
+        from class_stats import class_stats
+
+        frame = ClassFrame.from_files(self.rec, self.txt)
+        columns = class_stats(frame)
+        self.assertEqual(len(columns), 10 + 4 + 1)
+        self.assertEqual([column['kind'] for column in columns[9:12]], ['assessment', 'category', 'category'])
+
+        total = frame.config['marks'][3]['total']
+        values = [m * 100 / total for m in frame.marks[:, 3].tolist() if m >= 0]
+        column = columns[3]
+        self.assertEqual(column['count'], len(values))
+        self.assertAlmostEqual(column['completion'], len(values) / 40)
+        self.assertAlmostEqual(column['mean'], statistics.fmean(values))
+        self.assertAlmostEqual(column['median'], statistics.median(values))
+        self.assertAlmostEqual(column['std'], statistics.pstdev(values))
+        self.assertEqual(sum(column['histogram']), len(values))
+        self.assertEqual(column['histogram'][9], sum(1 for v in values if v >= 90))
+
+    def test_config_average_check(self):
+        """Test that only an assessment whose config average is wrong is flagged"""
+        from class_frame import ClassFrame
+        from class_stats import class_stats
+        from synth_gradebook import write_config_file
+        from marks_reader import read_config_file
+
+        frame = ClassFrame.from_files(self.rec, self.txt)
+        self.assertEqual([c['label'] for c in class_stats(frame) if c['off_average']], [])
+
+        config = read_config_file(self.txt)
+        config['marks'][2]['average'] += 1.5
+        write_config_file(config, self.txt)
+        frame = ClassFrame.from_files(self.rec, self.txt)
+        flagged = [c['label'] for c in class_stats(frame) if c['off_average']]
+        self.assertEqual(flagged, [frame.config['marks'][2]['name'] + ' (' + frame.config['marks'][2]['date'] + ')'])
+
+    def test_extended_summary(self):
+        """Test that --stats extends _summary.csv and writes _assessment_stats.csv"""
+        import csv
+        from marks_reader import main
+
+        out = os.path.join(self.tmp, 'out')
+        main(['--classes-dir', self.tmp, '--output-dir', out, '--stats'])
+        with open(os.path.join(out, '_summary.csv'), newline='') as f:
+            header, row = list(csv.reader(f))
+        self.assertEqual(header[4:6], ['Students With Final Mark', 'Mean Final %'])
+        self.assertEqual(row[:3] + row[4:5], ['SYN001-1', 'SYNTHETIC SYN001-1', '40', '40'])
+        with open(os.path.join(out, '_assessment_stats.csv'), newline='') as f:
+            self.assertEqual(len(list(csv.reader(f))), 1 + 15)
+
+        main(['--classes-dir', self.tmp, '--output-dir', out])
+        with open(os.path.join(out, '_summary.csv'), newline='') as f:
+            self.assertEqual(len(next(csv.reader(f))), 4)
+
+
+    def test_failed_class_does_not_stop_summary(self):
+        """Test that a class with a broken config is reported and the others still get stats"""
+        import csv
+        from synth_gradebook import generate_class
+        from marks_reader import main
+
+        generate_class(self.tmp, 'SYN002-1', num_students=5, num_marks=3, num_cat=2, seed=7)
+        with open(os.path.join(self.tmp, 'CCC-1.rec'), 'wb') as f:
+            f.write(b'\x00' * 796)
+        with open(os.path.join(self.tmp, 'CCC-1.txt'), 'w') as f:
+            f.write('4.0\n\nCCC-1\n')
+
+        out = os.path.join(self.tmp, 'out')
+        main(['--classes-dir', self.tmp, '--output-dir', out, '--stats'])
+        with open(os.path.join(out, '_summary.csv'), newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual([row[0] for row in rows[1:]], ['SYN001-1', 'SYN002-1'])
+        with open(os.path.join(out, '_assessment_stats.csv'), newline='') as f:
+            self.assertEqual({row[0] for row in list(csv.reader(f))[1:]}, {'SYN001-1', 'SYN002-1'})
+
+    def test_unchanged_classes_reuse_cached_stats(self):
+        """Test that an incremental --stats run takes unchanged classes' statistics from the manifest"""
+        import csv
+        from unittest import mock
+        from marks_reader import main
+
+        out = os.path.join(self.tmp, 'out')
+        main(['--classes-dir', self.tmp, '--output-dir', out])  # a manifest without statistics
+        main(['--classes-dir', self.tmp, '--output-dir', out, '--stats'])
+        with open(os.path.join(out, '_assessment_stats.csv'), newline='') as f:
+            first = list(csv.reader(f))
+        with mock.patch('class_stats.ClassFrame.from_buffer', side_effect=AssertionError('decoded again')):
+            main(['--classes-dir', self.tmp, '--output-dir', out, '--stats'])
+        with open(os.path.join(out, '_assessment_stats.csv'), newline='') as f:
+            self.assertEqual(list(csv.reader(f)), first)
+        with open(os.path.join(out, '_summary.csv'), newline='') as f:
+            self.assertEqual(list(csv.reader(f))[1][4], '40')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,25 +1,6 @@
 import struct
 
-def decode_turbo_real(bytes_data):
-    """
-    Decode Turbo Pascal/Delphi 48-bit real (6 bytes)
-    """
-    if len(bytes_data) != 6:
-        return None
-
-    exp_byte = bytes_data[0]
-    mantissa_bytes = bytes_data[1:6]
-
-    if exp_byte == 0:
-        return -1.0
-
-    mantissa_int = int.from_bytes(mantissa_bytes, 'little')
-    sign = 1 if (mantissa_int & 0x8000000000) == 0 else -1
-    mantissa_int = mantissa_int & 0x7FFFFFFFFF
-    exponent = exp_byte - 129
-
-    value = sign * (mantissa_int / (2.0 ** 39)) * (2.0 ** exponent)
-    return value
+from real48 import decode_turbo_real
 
 # Test the marks from the hex dump
 # A1 for CHAN BOBBY should be around 16-17 out of 20 (to get class avg of 83.9%)
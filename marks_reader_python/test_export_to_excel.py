@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+@unittest.skipIf(openpyxl is None, "openpyxl not installed")
+class TestWriteOnlyExport(unittest.TestCase):
+    """Test cases for the write-only Excel export"""
+
+    def setUp(self):
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.classes = [generate_class(self.tmp, f'SYN00{n}-1', num_students=12, num_marks=8,
+                                       num_cat=3, seed=n, empty_every=5) for n in range(2)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _rows(self, path, sheet=None):
+        wb = openpyxl.load_workbook(path)
+        ws = wb[sheet] if sheet else wb.active
+        return ws, [list(row) for row in ws.iter_rows(values_only=True)]
+
+    def _expected_rows(self, rec, txt):
+        """Rows of the marks CSV, with marks as numbers"""
+        import csv
+        from marks_reader import convert_class_to_csv
+
+        summary = convert_class_to_csv(rec, txt, self.tmp)
+        with open(os.path.join(self.tmp, f"{summary['class_code']}_marks.csv"), newline='') as f:
+            rows = list(csv.reader(f))
+        return [rows[0]] + [row[:3] + [float(v) if v else None for v in row[3:]] for row in rows[1:]]
+
+    def test_records_match_marks_csv(self):
+        """Test that a sheet built from records holds the marks CSV values"""
+        from export_to_excel import export_class
+        from marks_reader import iter_student_records, read_config_file
+
+        rec, txt = self.classes[0]
+        with open(rec, 'rb') as f:
+            data = f.read()
+        path = os.path.join(self.tmp, 'records.xlsx')
+        self.assertEqual(export_class(iter_student_records(data), path, read_config_file(txt)), 12)
+
+        ws, rows = self._rows(path)
+        self.assertEqual(rows, self._expected_rows(rec, txt))
+        self.assertEqual(ws.freeze_panes, 'D2')
+        self.assertEqual(ws['A1'].style, 'marks header')
+        self.assertEqual(ws['A2'].style, 'marks text')
+        self.assertEqual(ws['D2'].style, 'marks mark')
+        self.assertEqual(ws['D2'].number_format, '0.0')
+
+    def test_class_frame_matches_records(self):
+        """Test that a ClassFrame exports the same sheet as its records"""
+        from class_frame import ClassFrame
+        from export_to_excel import export_class
+
+        rec, txt = self.classes[1]
+        path = os.path.join(self.tmp, 'frame.xlsx')
+        export_class(ClassFrame.from_files(rec, txt), path)
+        self.assertEqual(self._rows(path)[1], self._expected_rows(rec, txt))
+
+    def test_board_workbook(self):
+        """Test that every class becomes one sheet of the board workbook"""
+        from export_to_excel import export_board
+
+        path = os.path.join(self.tmp, 'board.xlsx')
+        self.assertEqual(export_board(self.classes, path), [('SYN000-1', 12), ('SYN001-1', 12)])
+        self.assertEqual(openpyxl.load_workbook(path).sheetnames, ['SYN000-1', 'SYN001-1'])
+        for rec, txt in self.classes:
+            code = os.path.basename(rec)[:-4].upper()
+            self.assertEqual(self._rows(path, code)[1], self._expected_rows(rec, txt))
+
+
+    def test_board_warns_of_partial_record(self):
+        """Test that a class ending in a partial record is exported with a warning"""
+        from export_to_excel import export_board
+        from marks_reader import PartialRecordWarning
+
+        rec, _ = self.classes[0]
+        with open(rec, 'ab') as f:
+            f.write(b'\x05' * 100)
+        path = os.path.join(self.tmp, 'board.xlsx')
+        with self.assertWarns(PartialRecordWarning) as caught:
+            sheets = export_board(self.classes, path)
+        self.assertEqual(caught.warning.path, rec)
+        self.assertEqual(sheets, [('SYN000-1', 12), ('SYN001-1', 12)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestGradebookAPI(unittest.TestCase):
+    """Test cases for the read-only JSON API"""
+
+    def setUp(self):
+        from gradebook_api import GradebookAPI
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.rec, self.txt = generate_class(self.tmp, 'SYN001-1', num_students=5, num_marks=4, num_cat=2, seed=3)
+        generate_class(self.tmp, 'SYN002-1', num_students=3, num_marks=2, num_cat=1, seed=4)
+        self.now = 0.0
+        self.api = GradebookAPI(self.tmp, cache_size=1, clock=lambda: self.now)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def get(self, path, etag=None):
+        status, headers, body = self.api.handle(path, etag)
+        return status, headers, json.loads(body) if body else None
+
+    def test_resources(self):
+        """Test the class list, config, roster, student and mark matrix"""
+        from marks_reader import open_class
+        config, _, students = open_class(self.rec, self.txt)
+
+        status, _, classes = self.get('/classes')
+        self.assertEqual([item['class_code'] for item in classes], ['SYN001-1', 'SYN002-1'])
+
+        self.assertEqual(self.get('/classes/SYN001-1')[2]['categories'], [list(c) for c in config['categories']])
+        roster = self.get('/classes/SYN001-1/students')[2]
+        self.assertEqual([s['studentno'] for s in roster], [s['studentno'] for s in students])
+
+        student = self.get(f"/classes/SYN001-1/students/{students[2]['studentno']}")[2]
+        self.assertEqual(student['name'], students[2]['name'])
+        self.assertEqual(len(student['marks']), 4)
+
+        matrix = self.get('/classes/SYN001-1/marks')[2]
+        self.assertEqual(len(matrix['columns']), 4 + 2 + 1 + 1)
+        self.assertEqual(len(matrix['rows']), 5)
+        self.assertEqual(matrix['rows'][2]['marks'][:4], student['marks'])
+
+    def test_not_found(self):
+        """Test unknown classes, students and paths"""
+        self.assertEqual(self.get('/classes/NOPE')[0], 404)
+        self.assertEqual(self.get('/classes/SYN001-1/students/999')[0], 404)
+        self.assertEqual(self.get('/other')[0], 404)
+
+    def test_etag_and_invalidation(self):
+        """Test that a matching If-None-Match is a 304 and a changed file reloads"""
+        status, headers, _ = self.get('/classes/SYN001-1/marks')
+        etag = headers['ETag']
+        self.assertEqual(self.get('/classes/SYN001-1/marks', etag)[:2], (304, {'ETag': etag}))
+        self.get('/classes/SYN001-1/students')
+        self.assertEqual((self.api.hits, self.api.misses, self.api.not_modified), (1, 1, 1))
+
+        from synth_gradebook import generate_class
+        generate_class(self.tmp, 'SYN001-1', num_students=6, num_marks=4, num_cat=2, seed=8)
+        st = os.stat(self.rec)
+        os.utime(self.rec, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        status, headers, matrix = self.get('/classes/SYN001-1/marks', etag)
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers['ETag'], etag)
+        self.assertEqual(len(matrix['rows']), 6)
+
+    def test_lru_eviction_and_new_class(self):
+        """Test that the cache holds cache_size classes and new classes are found"""
+        from synth_gradebook import generate_class
+        self.get('/classes/SYN001-1')
+        self.get('/classes/SYN002-1')
+        self.assertEqual(list(self.api.cache), ['SYN002-1'])
+
+        generate_class(self.tmp, 'SYN003-1', num_students=2, num_marks=2, num_cat=1, seed=5)
+        self.assertEqual(self.get('/classes/SYN003-1')[0], 404)  # listed too recently
+        self.now += 10
+        self.assertEqual(self.get('/classes/SYN003-1')[0], 200)
+
+    def test_class_list_is_refreshed(self):
+        """Test that /classes picks up a new class once the listing is REFRESH_SECONDS old"""
+        from synth_gradebook import generate_class
+        generate_class(self.tmp, 'SYN003-1', num_students=2, num_marks=2, num_cat=1, seed=5)
+        codes = [item['class_code'] for item in self.get('/classes')[2]]
+        self.assertEqual(codes, ['SYN001-1', 'SYN002-1'])
+        self.now += 10
+        codes = [item['class_code'] for item in self.get('/classes')[2]]
+        self.assertEqual(codes, ['SYN001-1', 'SYN002-1', 'SYN003-1'])
+
+    def test_decode_does_not_hold_cache_lock(self):
+        """Test that a slow decode neither blocks other classes nor runs twice for one class"""
+        import threading
+        from unittest import mock
+        import gradebook_api
+
+        self.api.cache_size = 2
+        self.get('/classes/SYN002-1')
+        started = threading.Event()
+        release = threading.Event()
+        decodes = []
+
+        def slow_open_class(rec_file, txt_file, compact=False):
+            decodes.append(rec_file)
+            started.set()
+            release.wait(5)
+            return real_open_class(rec_file, txt_file, compact=compact)
+
+        real_open_class = gradebook_api.open_class
+        with mock.patch('gradebook_api.open_class', slow_open_class):
+            threads = [threading.Thread(target=self.get, args=('/classes/SYN001-1/marks',)) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            self.assertTrue(started.wait(5))
+            self.assertEqual(self.get('/classes/SYN002-1')[0], 200)  # served while SYN001-1 decodes
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(decodes, [self.rec])
+        self.assertEqual((self.api.hits, self.api.misses), (3, 2))
+
+    def test_http_keep_alive(self):
+        """Test the server over a kept-alive HTTP/1.1 connection"""
+        import http.client
+        import threading
+        from gradebook_api import make_server
+
+        server = make_server(self.tmp, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+            conn.request('GET', '/classes/SYN002-1/students')
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.getheader('Content-Type'), 'application/json')
+            self.assertEqual(len(json.loads(response.read())), 3)
+
+            conn.request('GET', '/classes/SYN002-1/students', headers={'If-None-Match': response.getheader('ETag')})
+            response = conn.getresponse()
+            self.assertEqual((response.status, response.read()), (304, b''))
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+import unittest
+
+
+class TestGradeBoard(unittest.TestCase):
+    """Test cases for vectorized grade recomputation"""
+
+    def setUp(self):
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.classes = [generate_class(self.tmp, f'SYN00{n}-1', num_students=15, num_marks=12,
+                                       num_cat=3 + n, seed=n, missing_rate=0.2, empty_every=7)
+                        for n in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_recompute_matches_stored_marks(self):
+        """Test that the recomputed marks agree with the ones in the .rec files"""
+        import numpy as np
+        from grades import GradeBoard
+
+        board = GradeBoard.from_files(self.classes)
+        self.assertEqual(board.size, 45)
+        self.assertEqual(board.mismatches(), [])
+        catmarks, finals = board.recompute()
+        self.assertTrue(np.allclose(finals, board.stored_finals, atol=1e-6, equal_nan=True))
+        self.assertTrue(np.allclose(catmarks, board.stored_catmarks, atol=1e-6, equal_nan=True))
+
+    def test_mismatch_is_flagged(self):
+        """Test that an edited stored final mark is reported"""
+        from grades import GradeBoard
+        from rec_file import RecFile
+
+        with RecFile(self.classes[1][0], writable=True) as rec:
+            name = rec[2]['name']
+            rec[2]['finalmark'] = 12.5
+        mismatches = GradeBoard.from_files(self.classes).mismatches()
+        self.assertEqual([(m[0], m[1], m[3], m[4]) for m in mismatches],
+                         [('SYN001-1', name, 'Final Mark %', 12.5)])
+
+    def test_what_if(self):
+        """Test reweighting by category name and by class"""
+        import numpy as np
+        from class_frame import ClassFrame
+        from grades import GradeBoard
+
+        config = {
+            'class_code': 'A', 'num_cat': 2, 'num_terms': 1,
+            'categories': [('TESTS', 60.0), ('ASSIGN', 40.0)],
+            'marks': [{'total': 10.0, 'category': 1}, {'total': 20.0, 'category': 2}],
+        }
+        marks = np.array([[5.0, 20.0], [10.0, -1.0]])
+        frame = ClassFrame(config, np.array(['X', 'Y']), np.array(['1', '2']), np.array(['', '']),
+                           np.array(['', '']), marks, np.full((2, 2), -1.0), np.full((2, 1), -1.0),
+                           np.full(2, -1.0), np.zeros(2, 'i2'), np.zeros(2, 'i2'))
+        board = GradeBoard([frame])
+
+        self.assertEqual(board.recompute()[1].tolist(), [70.0, 100.0])
+        # 20 * 5/10 + 40 * 20/20 out of 60
+        self.assertEqual(board.what_if(by_name={'TESTS': 20.0}).tolist(), [50 * 100 / 60, 100.0])
+        self.assertEqual(board.what_if(by_class={'A': [50.0, 50.0]}).tolist(), [75.0, 100.0])
+        # Unchanged weights give the same result
+        self.assertEqual(board.what_if().tolist(), board.recompute()[1].tolist())
+        self.assertEqual(board.class_averages(board.recompute()[1]), {'A': 85.0})
+
+    def test_blank_marks_score_zero_as_in_real_export(self):
+        """Test that the category marks stored in the ICS4M1-1 export are reproduced
+
+        Blanks count as 0 out of the assessment's total (LUC JIMMY's ASSIGN
+        is 14.5 with A6 blank, SIU DESMOND's 8.9 with A5 and A6 blank), and a
+        category with no marks at all stays blank (SIU DESMOND's FINAL PROJ).
+        """
+        import csv
+        import os
+        import re
+        import numpy as np
+        from class_frame import ClassFrame
+        from grades import GradeBoard
+
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'csv',
+                            'ICS4M1-1_marks_transposed.csv')
+        with open(path, newline='') as f:
+            rows = list(csv.reader(f))
+        names = rows[0][1:]
+        assessments = [row for row in rows[1:] if row[0].endswith(' pts')]
+        categories = [row for row in rows[1:] if '(weight:' in row[0]]
+        category_names = [row[0].split(' %')[0] for row in categories]
+        # The export does not say which category an assessment is in; its name does
+        category_of = {'Q': 'TESTS', 'T': 'TESTS', 'A': 'ASSIGN', 'N': 'NOTEBOOK', 'E': 'DEC EXAM',
+                       'C': 'FINAL PROJ'}
+        config = {
+            'class_code': 'ICS4M1-1', 'num_cat': len(categories), 'num_terms': 1,
+            'categories': [(name, float(re.search(r'weight: ([\d.]+)', row[0]).group(1)))
+                           for name, row in zip(category_names, categories)],
+            'marks': [{'total': float(re.search(r'- ([\d.]+) pts', row[0]).group(1)),
+                       'category': category_names.index(category_of[row[0][0]]) + 1}
+                      for row in assessments],
+        }
+
+        def values(table):
+            return np.array([[float(cell) if cell else -1.0 for cell in row[1:]] for row in table]).T
+
+        count = len(names)
+        stored = values(categories)
+        frame = ClassFrame(config, np.array(names), np.array([''] * count), np.array([''] * count),
+                           np.array([''] * count), values(assessments), stored, np.full((count, 1), -1.0),
+                           np.full(count, -1.0), np.zeros(count, 'i2'), np.zeros(count, 'i2'))
+        catmarks = GradeBoard([frame]).recompute()[0]
+
+        recomputed = np.where(np.isnan(catmarks), -1.0, np.round(catmarks, 1))
+        self.assertEqual(recomputed.tolist(), stored.tolist())
+        self.assertEqual(round(catmarks[names.index('LUC JIMMY'), 1], 2), 14.47)
+        self.assertEqual(round(catmarks[names.index('SIU DESMOND'), 1], 2), 8.94)
+        self.assertTrue(np.isnan(catmarks[names.index('SIU DESMOND'), category_names.index('FINAL PROJ')]))
+
+
+if __name__ == '__main__':
+    unittest.main()
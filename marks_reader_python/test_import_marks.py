@@ -0,0 +1,91 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestImportMarks(unittest.TestCase):
+    """Test cases for importing an edited marks CSV into a .rec file"""
+
+    def setUp(self):
+        from marks_reader import convert_class_to_csv
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.rec, self.txt = generate_class(self.tmp, 'SYN001-1', num_students=8, num_marks=6,
+                                            num_cat=3, seed=2, empty_every=3)
+        convert_class_to_csv(self.rec, self.txt, self.tmp)
+        self.csv = os.path.join(self.tmp, 'SYN001-1_marks.csv')
+        with open(self.rec, 'rb') as f:
+            self.original = f.read()
+        with open(self.csv, newline='') as f:
+            self.rows = list(csv.reader(f))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write_csv(self, rows):
+        with open(self.csv, 'w', newline='') as f:
+            csv.writer(f).writerows(rows)
+
+    def test_unedited_export_writes_nothing(self):
+        """Test that re-importing the exported CSV leaves the file untouched"""
+        from import_marks import import_marks_csv
+        result = import_marks_csv(self.rec, self.txt, self.csv)
+        self.assertEqual(result, {'changes': [], 'records': 0, 'unmatched': []})
+        with open(self.rec, 'rb') as f:
+            self.assertEqual(f.read(), self.original)
+
+    def test_changed_cells_are_patched(self):
+        """Test that edited and cleared marks are written and nothing else"""
+        from import_marks import import_marks_csv
+        from marks_reader import iter_student_records
+
+        rows = [row[:] for row in self.rows]
+        rows[3][4] = '12.5'
+        rows[3][5] = ''
+        rows[5][3] = rows[5][3].rstrip('0').rstrip('.')  # same value, different text
+        self._write_csv(rows)
+
+        result = import_marks_csv(self.rec, self.txt, self.csv)
+        self.assertEqual(result['records'], 1)
+        self.assertEqual([change[1:] for change in result['changes']],
+                         [(rows[0][4], self.rows[3][4], '12.5'), (rows[0][5], self.rows[3][5], '')])
+
+        with open(self.rec, 'rb') as f:
+            data = f.read()
+        changed = [i for i, (a, b) in enumerate(zip(self.original, data)) if a != b]
+        self.assertLessEqual(len(changed), 12)
+        students = [s for s in iter_student_records(data) if s['name']]
+        self.assertEqual(students[2]['marks'][1], 12.5)
+        self.assertEqual(students[2]['marks'][2], -1.0)
+
+    def test_dry_run(self):
+        """Test that a dry run reports changes without writing them"""
+        from import_marks import import_marks_csv
+
+        rows = [row[:] for row in self.rows]
+        rows[1][3] = '1.5'
+        self._write_csv(rows)
+        result = import_marks_csv(self.rec, self.txt, self.csv, dry_run=True)
+        self.assertEqual(len(result['changes']), 1)
+        with open(self.rec, 'rb') as f:
+            self.assertEqual(f.read(), self.original)
+
+    def test_unknown_student_and_bad_cell(self):
+        """Test unmatched rows are reported and non-numeric cells rejected"""
+        from import_marks import import_marks_csv
+
+        rows = [row[:] for row in self.rows] + [['NEW STUDENT', '999', '9A']]
+        self._write_csv(rows)
+        self.assertEqual(import_marks_csv(self.rec, self.txt, self.csv)['unmatched'], ['999'])
+
+        rows[1][3] = 'abs'
+        self._write_csv(rows)
+        with self.assertRaises(ValueError):
+            import_marks_csv(self.rec, self.txt, self.csv)
+
+
+if __name__ == '__main__':
+    unittest.main()
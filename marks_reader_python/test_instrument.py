@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+
+class TestInstrument(unittest.TestCase):
+    """Test cases for the opt-in stage instrumentation"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import instrument
+        instrument.disable()
+        shutil.rmtree(self.tmp)
+
+    def test_disabled_stage_is_shared_no_op(self):
+        """Test that stages cost nothing and record nothing while disabled"""
+        import instrument
+        self.assertIs(instrument.stage('decode', 'a.rec'), instrument.NULL_STAGE)
+        with instrument.stage('decode', 'a.rec') as step:
+            step.add(records=5, bytes=10)
+            step.add_file(__file__)
+        self.assertIsNone(instrument.disable())
+
+    def test_stage_totals_per_stage_and_class(self):
+        """Test that wall/CPU time, records and bytes add up per stage and per class"""
+        import instrument
+        profiler = instrument.enable()
+        for item in ('a.rec', 'b.rec'):
+            with instrument.stage('decode', item) as step:
+                step.add(records=10, bytes=7960)
+            with instrument.stage('write_marks_csv', item) as step:
+                step.add(records=8)
+        with instrument.stage('write_summary'):
+            pass
+        self.assertIs(instrument.disable(), profiler)
+
+        report = profiler.report()
+        self.assertEqual(report['stages']['decode']['calls'], 2)
+        self.assertEqual(report['stages']['decode']['records'], 20)
+        self.assertEqual(report['classes']['b.rec']['write_marks_csv']['records'], 8)
+        self.assertEqual(sorted(report['classes']), ['a.rec', 'b.rec'])
+        self.assertEqual((report['records'], report['bytes']), (20, 15920))  # input stages only
+        self.assertIsNone(report['peak_memory_bytes'])
+        self.assertGreaterEqual(report['wall_seconds'], report['stages']['decode']['wall_seconds'])
+
+    def test_memory_peak_per_stage(self):
+        """Test that tracemalloc peaks are kept per stage, including inside nested stages"""
+        import tracemalloc
+        import instrument
+        profiler = instrument.enable(trace_memory=True)
+        with instrument.stage('outer'):
+            held = bytearray(2_000_000)
+            del held
+            with instrument.stage('inner'):  # resets the peak, after handing it to 'outer'
+                pass
+        instrument.disable()
+        self.assertFalse(tracemalloc.is_tracing())
+        stages = profiler.report()['stages']
+        self.assertGreaterEqual(stages['outer']['peak_memory_bytes'], 2_000_000)
+        self.assertLess(stages['inner']['peak_memory_bytes'], 2_000_000)
+
+    def test_batch_main_writes_report(self):
+        """Test that --profile times a conversion and prints the throughput line"""
+        import marks_reader
+        from synth_gradebook import generate_class
+        classes = os.path.join(self.tmp, 'classes')
+        output = os.path.join(self.tmp, 'out')
+        os.makedirs(classes)
+        rec_file = generate_class(classes, 'SYN001-1', num_students=12, num_marks=4, num_cat=2, seed=1)[0]
+        report_path = os.path.join(self.tmp, 'profile.json')
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            marks_reader.main(['--classes-dir', classes, '--output-dir', output, '--prefetch', '0',
+                               '--profile', report_path])
+        last_lines = out.getvalue().splitlines()[-2:]
+        self.assertTrue(last_lines[0].startswith("Profile: 1 class, 12 records"), last_lines[0])
+        self.assertEqual(last_lines[1], f"Profile report: {report_path}")
+
+        with open(report_path) as f:
+            report = json.load(f)
+        stages = report['classes'][rec_file]
+        for name in ('read_config', 'read_rec', 'decode', 'write_marks_csv',
+                     'write_attendance_csv', 'write_transposed_csv'):
+            self.assertEqual(stages[name]['calls'], 1, name)
+        self.assertEqual(stages['decode']['bytes'], os.path.getsize(rec_file))
+        self.assertEqual(stages['write_marks_csv']['bytes'],
+                         os.path.getsize(os.path.join(output, 'SYN001-1_marks.csv')))
+        self.assertIn('write_summary', report['stages'])
+
+        import instrument
+        self.assertIs(instrument.stage('decode'), instrument.NULL_STAGE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestConversionManifest(unittest.TestCase):
+    """Test cases for the incremental conversion manifest"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.rec = os.path.join(self.tmp, 'a.rec')
+        self.txt = os.path.join(self.tmp, 'a.txt')
+        self.out = os.path.join(self.tmp, 'A_marks.csv')
+        for path, text in [(self.rec, 'rec'), (self.txt, 'txt'), (self.out, 'csv')]:
+            with open(path, 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _recorded(self):
+        from manifest import ConversionManifest
+        manifest = ConversionManifest(self.tmp)
+        manifest.record(self.rec, self.txt, {'class_code': 'A'}, [self.out])
+        manifest.save()
+        return ConversionManifest(self.tmp)
+
+    def test_round_trip(self):
+        """Test that a saved manifest reports the class as current"""
+        manifest = self._recorded()
+        self.assertTrue(manifest.is_current(self.rec, self.txt))
+        self.assertEqual(manifest.summary(self.rec), {'class_code': 'A'})
+
+    def test_touched_but_unchanged(self):
+        """Test that a new mtime with the same contents is still current"""
+        manifest = self._recorded()
+        os.utime(self.rec, ns=(0, 10 ** 9))
+        self.assertTrue(manifest.is_current(self.rec, self.txt))
+
+    def test_changed_input_or_missing_output(self):
+        """Test that changed inputs and missing outputs are detected"""
+        manifest = self._recorded()
+        with open(self.txt, 'w') as f:
+            f.write('TXT')
+        self.assertFalse(manifest.is_current(self.rec, self.txt))
+
+        manifest = self._recorded()
+        os.remove(self.out)
+        self.assertFalse(manifest.is_current(self.rec, self.txt))
+
+    def test_corrupt_manifest_is_ignored(self):
+        """Test that an unreadable manifest starts empty"""
+        from manifest import ConversionManifest, MANIFEST_NAME
+        with open(os.path.join(self.tmp, MANIFEST_NAME), 'w') as f:
+            f.write('{not json')
+        self.assertEqual(ConversionManifest(self.tmp).classes, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -100,6 +100,156 @@ class TestStudentRecord(unittest.TestCase):
         self.assertEqual(format_mark(17.123), '17.1')  # Should round to 1 decimal
 
 
+class TestMarkCellCache(unittest.TestCase):
+    """Test cases for the byte-pattern mark cell cache"""
+
+    def test_matches_decode_and_format(self):
+        """Test that cached cells equal format_mark(decode_turbo_real(...))"""
+        import random
+        from marks_reader import MarkCellCache, decode_turbo_real, format_mark
+
+        rng = random.Random(8)
+        cache = MarkCellCache()
+        for _ in range(500):
+            raw = bytes([rng.choice([0, 0x84, 0x85, 0x86, 0x87, 0x8A])]) + bytes(rng.randrange(256) for _ in range(5))
+            self.assertEqual(cache.format(raw), format_mark(decode_turbo_real(raw)))
+
+    def test_no_mark_conventions(self):
+        """Test the '' and '__' no-mark conventions"""
+        from marks_reader import MarkCellCache
+        from read_class_marks import format_mark as display_format_mark
+
+        no_mark = b'\x00\x00\x00\x00\x80\x81'
+        seventeen = b'\x85\x00\x00\x00\x00\x08'
+        self.assertEqual(MarkCellCache().format(no_mark), '')
+        display = MarkCellCache(no_mark='__')
+        self.assertEqual(display.format(no_mark), display_format_mark(-1.0))
+        self.assertEqual(display.format(seventeen), '17.0')
+
+    def test_stats_and_bound(self):
+        """Test hit/miss counting and the size bound"""
+        from marks_reader import MarkCellCache
+
+        cache = MarkCellCache(maxsize=2)
+        for raw in [b'\x85\x00\x00\x00\x00\x08'] * 3 + [b'\x00' * 6, b'\x81' + b'\x00' * 5]:
+            cache.format(raw)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 3, 2))
+        self.assertAlmostEqual(stats['hit_rate'], 0.4)
+
+
+class TestRecordLayout(unittest.TestCase):
+    """Test cases for the precompiled studentrec40 unpacker"""
+
+    def _random_records(self, count):
+        import random
+        rng = random.Random(796)
+        return bytes(rng.randrange(256) for _ in range(796 * count))
+
+    def test_record_size(self):
+        """Test that the compiled layout is the 796-byte studentrec40"""
+        from marks_reader import RECORD_SIZE
+        self.assertEqual(RECORD_SIZE, 796)
+
+    def test_matches_field_by_field_reader(self):
+        """Test that single-call unpacking matches per-field reads exactly"""
+        from marks_reader import unpack_student_record, iter_student_records
+        from read_class_marks import read_student_record as read_fields
+
+        data = self._random_records(5)
+        f = BytesIO(data)
+        expected = [read_fields(f) for _ in range(5)]
+
+        self.assertEqual([unpack_student_record(data, i * 796) for i in range(5)], expected)
+        self.assertEqual(list(iter_student_records(data)), expected)
+
+        first = unpack_student_record(data)
+        self.assertEqual(list(first), list(expected[0]))
+        self.assertEqual(len(first['marks']), 100)
+        self.assertEqual(len(first['comments']), 5)
+
+    def test_iter_ignores_partial_record(self):
+        """Test that a trailing partial record is skipped"""
+        from marks_reader import iter_student_records
+        data = self._random_records(2)
+        self.assertEqual(len(list(iter_student_records(data + data[:100]))), 2)
+
+    def test_decode_class_counts_and_warns(self):
+        """Test that the record count comes from the size and a partial record is a warning"""
+        from marks_reader import PartialRecordWarning, decode_class
+        data = self._random_records(3)
+        progress = []
+        records = decode_class(data, {}, 'x.rec', progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(len(records.records), 3)
+        self.assertEqual(records.students, [r for r in records.records if r['name']])
+        self.assertEqual(progress, [(3, 3)])
+
+        with self.assertWarns(PartialRecordWarning) as caught:
+            records = decode_class(data + data[:100], {}, 'x.rec')
+        self.assertEqual(len(records.records), 3)
+        self.assertEqual((caught.warning.path, caught.warning.num_records, caught.warning.trailing_bytes),
+                         ('x.rec', 3, 100))
+
+    def test_compact_records_match_dicts(self):
+        """Test that StudentRecords hold the dict values, trimmed to the config's counts"""
+        from marks_reader import StudentRecord, STUDENTREC40, decode_class, unpack_student_record
+        data = self._random_records(4)
+        config = {'num_marks': 7, 'num_cat': 3, 'num_terms': 2}
+        records = decode_class(data, config, compact=True).records
+        for i, record in enumerate(records):
+            expected = unpack_student_record(data, i * 796)
+            for key, count in (('marks', 7), ('catmarks', 3), ('termmarks', 2)):
+                expected[key] = expected[key][:count]
+            self.assertEqual(record.to_dict(), expected)
+            self.assertEqual(list(record), list(expected))
+            self.assertEqual(list(record.keys()), list(expected.keys()))
+            self.assertEqual([list(v) if hasattr(v, 'tolist') else v for v in record.values()],
+                             list(expected.values()))
+            self.assertEqual(len(record.items()), len(expected))
+            self.assertEqual(record['finalmark'], expected['finalmark'])
+            self.assertEqual(record.get('lates'), expected['lates'])
+            self.assertNotIn('values', record)
+            with self.assertRaises(KeyError):
+                record['values']
+
+        # Without a config every slot is kept
+        full = StudentRecord.from_items(STUDENTREC40.unpack_from(data))
+        self.assertEqual(full.to_dict(), unpack_student_record(data))
+        self.assertEqual(len(full['marks']), 100)
+
+    def test_projection_decodes_used_slots_and_fields(self):
+        """Test that a projection keeps the record size and decodes only what was asked for"""
+        from marks_reader import (RECORD_SIZE, iter_student_records, read_student_record, record_projection,
+                                  unpack_student_record)
+        data = self._random_records(3)
+        config = {'num_marks': 15, 'num_cat': 5, 'num_terms': 0}
+        projection = record_projection(config)
+        self.assertEqual(projection.unpacker.size, RECORD_SIZE)
+        self.assertEqual(projection.ends, (15, 20, 20))
+        self.assertIs(record_projection(dict(config)), projection)
+
+        full = list(iter_student_records(data))
+        for expected, record in zip(full, iter_student_records(data, config)):
+            self.assertEqual(record['marks'], expected['marks'][:15])
+            self.assertEqual(record['catmarks'], expected['catmarks'][:5])
+            self.assertEqual(record['termmarks'], [])
+            self.assertEqual({k: v for k, v in record.items() if not k.endswith('marks')},
+                             {k: v for k, v in expected.items() if not k.endswith('marks')})
+
+        names = unpack_student_record(data, RECORD_SIZE, fields=('name', 'lates'))
+        self.assertEqual(names, {'name': full[1]['name'], 'lates': full[1]['lates']})
+        self.assertEqual(read_student_record(BytesIO(data), config, ['finalmark']),
+                         {'finalmark': full[0]['finalmark']})
+
+    def test_read_student_record_at_eof(self):
+        """Test that reading past the end raises struct.error"""
+        from marks_reader import read_student_record
+        f = BytesIO(self._random_records(1))
+        read_student_record(f)
+        with self.assertRaises(struct.error):
+            read_student_record(f)
+
+
 class TestCSVConversion(unittest.TestCase):
     """Test cases for CSV conversion"""
 
@@ -119,5 +269,199 @@ class TestCSVConversion(unittest.TestCase):
         self.assertEqual(result['num_marks'], 15)
 
 
+class TestBatchConversion(unittest.TestCase):
+    """Test cases for converting several classes"""
+
+    def setUp(self):
+        import tempfile
+        from test_class_frame import CONFIG_LINES, make_record
+        self.tmp = tempfile.mkdtemp()
+        self.rec_files = []
+        for n in range(3):
+            rec = f'{self.tmp}/class{n}.rec'
+            txt = f'{self.tmp}/class{n}.txt'
+            lines = list(CONFIG_LINES)
+            lines[2] = f'CLASS-{n}'
+            with open(txt, 'w') as f:
+                f.write('\n'.join(lines if n != 1 else lines[:5]) + '\n')  # class 1 is broken
+            with open(rec, 'wb') as f:
+                for i in range(n + 2):
+                    f.write(make_record(f'STUDENT {i}', str(i), '12A', [10.0, 20.0, 3.0], [50.0, 40.0], [90.0], 90.0))
+            self.rec_files.append((rec, txt))
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp)
+
+    def test_parallel_matches_serial(self):
+        """Test that --jobs gives the same ordered summary and reports failures"""
+        from marks_reader import convert_classes
+
+        serial = convert_classes(self.rec_files, self.tmp)
+        parallel = convert_classes(self.rec_files, self.tmp, jobs=2)
+
+        self.assertEqual(serial, parallel)
+        summary, failures = parallel
+        self.assertEqual([item['class_code'] for item in summary], ['CLASS-0', 'CLASS-2'])
+        self.assertEqual([item['num_students'] for item in summary], [2, 4])
+        self.assertEqual([rec for rec, error in failures], [self.rec_files[1][0]])
+
+    def test_manifest_skips_unchanged_classes(self):
+        """Test that a rerun only converts classes whose inputs or outputs changed"""
+        import os
+        from manifest import ConversionManifest
+        from marks_reader import convert_class_to_csv, convert_classes
+
+        converted = []
+
+        def convert(rec_file, txt_file, output_dir):
+            converted.append(os.path.basename(rec_file))
+            return convert_class_to_csv(rec_file, txt_file, output_dir)
+
+        first = convert_classes(self.rec_files, self.tmp, convert=convert, manifest=ConversionManifest(self.tmp))
+        self.assertEqual(converted, ['class0.rec', 'class1.rec', 'class2.rec'])
+
+        converted.clear()
+        second = convert_classes(self.rec_files, self.tmp, convert=convert, manifest=ConversionManifest(self.tmp))
+        self.assertEqual(converted, ['class1.rec'])  # failed last time, so retried
+        self.assertEqual(first[0], second[0])
+
+        # A changed input and a deleted output are both converted again
+        with open(self.rec_files[0][0], 'ab') as f:
+            f.write(b'\x00' * 796)
+        os.remove(os.path.join(self.tmp, 'CLASS-2_marks_transposed.csv'))
+        converted.clear()
+        convert_classes(self.rec_files, self.tmp, convert=convert, manifest=ConversionManifest(self.tmp))
+        self.assertEqual(converted, ['class0.rec', 'class1.rec', 'class2.rec'])
+
+    def test_prefetch_matches_serial(self):
+        """Test that reading classes ahead gives the same summary, failures and CSVs"""
+        import os
+        from marks_reader import convert_classes
+
+        out_serial = os.path.join(self.tmp, 'serial')
+        out_prefetch = os.path.join(self.tmp, 'prefetch')
+        os.makedirs(out_serial)
+        os.makedirs(out_prefetch)
+        serial = convert_classes(self.rec_files, out_serial)
+        prefetched = convert_classes(self.rec_files, out_prefetch, prefetch=2)
+
+        self.assertEqual(serial, prefetched)
+        self.assertEqual(sorted(os.listdir(out_serial)), sorted(os.listdir(out_prefetch)))
+        for name in os.listdir(out_serial):
+            with open(os.path.join(out_serial, name)) as a, open(os.path.join(out_prefetch, name)) as b:
+                self.assertEqual(a.read(), b.read())
+
+    def test_prefetch_reports_missing_file(self):
+        """Test that a class whose files cannot be read is a failure, not an abort"""
+        import os
+        from marks_reader import convert_classes
+
+        os.remove(self.rec_files[2][0])
+        summary, failures = convert_classes(self.rec_files, self.tmp, prefetch=1)
+        self.assertEqual([item['class_code'] for item in summary], ['CLASS-0'])
+        self.assertEqual([rec for rec, error in failures], [self.rec_files[1][0], self.rec_files[2][0]])
+
+
+class TestFindClassFiles(unittest.TestCase):
+    """Test cases for discovering .rec/.txt pairs"""
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp)
+
+    def touch(self, *parts):
+        import os
+        path = os.path.join(self.tmp, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+        return path
+
+    def test_pairs_case_insensitively(self):
+        """Test that stems and extensions match regardless of case"""
+        from marks_reader import find_class_files
+        rec = self.touch('Ics4m1-1.REC')
+        txt = self.touch('ICS4M1-1.txt')
+        self.touch('lonely.rec')   # no config
+        self.touch('notes.txt')    # no .rec
+        self.touch('other.csv')
+
+        self.assertEqual(find_class_files(self.tmp), [(rec, txt)])
+
+    def test_recursive(self):
+        """Test that subdirectories are only searched when asked"""
+        from marks_reader import find_class_files
+        top = (self.touch('a.rec'), self.touch('a.txt'))
+        nested = (self.touch('teacher', '2024', 'b.rec'), self.touch('teacher', '2024', 'b.txt'))
+        # A .rec in one folder does not pair with a .txt in another
+        self.touch('teacher', 'c.rec')
+        self.touch('c.txt')
+
+        self.assertEqual(find_class_files(self.tmp), [top])
+        self.assertEqual(find_class_files(self.tmp, recursive=True), [top, nested])
+
+
+class TestStreamingConversion(unittest.TestCase):
+    """Test cases for the bounded-memory streaming conversion"""
+
+    def setUp(self):
+        import tempfile
+        from test_class_frame import CONFIG_LINES, make_record
+        self.tmp = tempfile.mkdtemp()
+        self.rec = f'{self.tmp}/class.rec'
+        self.txt = f'{self.tmp}/class.txt'
+        with open(self.txt, 'w') as f:
+            f.write('\n'.join(CONFIG_LINES) + '\n')
+        with open(self.rec, 'wb') as f:
+            f.write(make_record('SMITH, "JO"', '1', '12A', [10.0, None, 3.0], [50.0, 40.0], [90.0], 90.0, absences=-1))
+            f.write(make_record('', '', '', [], [], [], None))
+            f.write(make_record('LEE TED', '2', '12B', [12.5, 30.0, 1.0], [45.0, 35.0], [80.0], 80.0))
+            f.write(b'\x07PARTIAL')
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp)
+
+    def _read_outputs(self, output_dir):
+        import os
+        contents = {}
+        for name in sorted(os.listdir(output_dir)):
+            with open(os.path.join(output_dir, name), 'rb') as f:
+                contents[name] = f.read()
+        return contents
+
+    def test_stream_matches_in_memory(self):
+        """Test that streaming writes byte-identical CSVs"""
+        import os
+        from marks_reader import PartialRecordWarning, convert_class_to_csv
+
+        os.makedirs(f'{self.tmp}/a')
+        os.makedirs(f'{self.tmp}/b')
+        # The class ends with a partial record; both ways warn and ignore it
+        with self.assertWarns(PartialRecordWarning):
+            expected = convert_class_to_csv(self.rec, self.txt, f'{self.tmp}/a')
+        with self.assertWarns(PartialRecordWarning):
+            actual = convert_class_to_csv(self.rec, self.txt, f'{self.tmp}/b', stream=True)
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual['num_students'], 2)
+        self.assertEqual(self._read_outputs(f'{self.tmp}/b'), self._read_outputs(f'{self.tmp}/a'))
+
+    def test_stream_without_students(self):
+        """Test that a class with no students writes nothing"""
+        import os
+        from marks_reader import convert_class_to_csv
+
+        with open(self.rec, 'wb') as f:
+            f.write(b'\x00' * 796)
+        os.makedirs(f'{self.tmp}/out')
+        self.assertIsNone(convert_class_to_csv(self.rec, self.txt, f'{self.tmp}/out', stream=True))
+        self.assertEqual(os.listdir(f'{self.tmp}/out'), [])
+
+
 if __name__ == '__main__':
     unittest.main()
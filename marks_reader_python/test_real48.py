@@ -0,0 +1,140 @@
+import unittest
+import random
+
+
+class TestBatchRealDecoder(unittest.TestCase):
+    """Test cases for the NumPy batch Real48 decoder"""
+
+    def test_matches_scalar_decoder(self):
+        """Test that batch results match decode_turbo_real bit for bit"""
+        from marks_reader import decode_turbo_real
+        from real48 import decode_real48_array
+
+        rng = random.Random(48)
+        values = [bytes(rng.randrange(256) for _ in range(6)) for _ in range(2000)]
+        # Every exponent byte, including 0 ("no mark") and the extremes
+        values += [bytes([exp]) + bytes(rng.randrange(256) for _ in range(5)) for exp in range(256)]
+
+        result = decode_real48_array(b''.join(values))
+
+        self.assertEqual(result.dtype.name, 'float64')
+        self.assertEqual(len(result), len(values))
+        for raw, value in zip(values, result.tolist()):
+            self.assertEqual(value.hex(), decode_turbo_real(raw).hex(), raw.hex())
+
+    def test_no_mark(self):
+        """Test that exponent=0 returns -1 (no mark indicator)"""
+        from real48 import decode_real48_array
+        result = decode_real48_array(b'\x00\x00\x00\x00\x80\x81' + b'\x00' * 6)
+        self.assertEqual(result.tolist(), [-1.0, -1.0])
+
+    def test_record_shaped_input(self):
+        """Test decoding a (records, reals, 6) array keeps the leading axes"""
+        import numpy as np
+        from real48 import decode_real48_array
+
+        raw = np.frombuffer(b'\x85\x00\x00\x00\x00\x08' * 6, dtype=np.uint8).reshape(2, 3, 6)
+        result = decode_real48_array(raw)
+        self.assertEqual(result.shape, (2, 3))
+        self.assertTrue((result == 17.0).all())
+
+    def test_invalid_length(self):
+        """Test that a partial trailing value is rejected"""
+        from real48 import decode_real48_array
+        with self.assertRaises(ValueError):
+            decode_real48_array(b'\x81\x00\x00\x00\x00\x00\x81')
+
+
+class TestCodecBackends(unittest.TestCase):
+    """Test cases for the Real48 backend registry"""
+
+    def test_all_backends_conform(self):
+        """Test every registered backend against the reference"""
+        from real48 import conformance
+        for name, mismatches in conformance().items():
+            self.assertEqual(mismatches, [], name)
+
+    def test_halved_marks_backend_is_rejected(self):
+        """Test that a decoder without the implicit leading 1 fails conformance"""
+        import real48
+
+        def halved(bytes_data):
+            if len(bytes_data) != 6:
+                return None
+            if bytes_data[0] == 0:
+                return -1.0
+            mantissa = int.from_bytes(bytes_data[1:6], 'little')
+            sign = -1 if mantissa & 0x8000000000 else 1
+            return sign * ((mantissa & 0x7FFFFFFFFF) / 2.0 ** 39) * 2.0 ** (bytes_data[0] - 129)
+
+        real48.register_backend('halved', halved, lambda data: [halved(data[i:i + 6]) for i in range(0, len(data), 6)])
+        try:
+            self.assertTrue(real48.conformance(['halved'])['halved'])
+            self.assertTrue(real48.known_value_check(['halved'])['halved'])
+        finally:
+            del real48.BACKENDS['halved']
+
+    def test_select_backend(self):
+        """Test forcing and benchmarking backend selection"""
+        import real48
+        previous = real48.selected_backend()
+        try:
+            self.assertEqual(real48.select_backend('reference'), 'reference')
+            self.assertEqual(real48.decode_many(b'\x85\x00\x00\x00\x00\x08'), [17.0])
+            self.assertIn(real48.select_backend(), real48.BACKENDS)
+        finally:
+            real48.select_backend(previous)
+
+    def test_wrong_backend_never_selected(self):
+        """Test that a backend failing the import-time check is not selected however fast it is"""
+        import real48
+        previous = real48.selected_backend()
+        self.assertEqual({name for name, mismatches in real48.known_value_check().items() if mismatches}, set())
+        real48.register_backend('constant', lambda bytes_data: 1.0, lambda data: [1.0] * (len(data) // 6))
+        try:
+            self.assertNotEqual(real48.select_backend(), 'constant')
+            self.assertNotEqual(real48.selected_backend(), 'constant')
+        finally:
+            del real48.BACKENDS['constant']
+            real48.select_backend(previous)
+
+
+class TestRealEncoder(unittest.TestCase):
+    """Test cases for the inverse Real48 encoder"""
+
+    def test_round_trip_bit_patterns(self):
+        """Test that encoding a decoded value gives back the same six bytes"""
+        from real48 import decode_turbo_real, encode_turbo_real
+
+        rng = random.Random(11)
+        for _ in range(5000):
+            raw = bytes([rng.randrange(1, 256)]) + bytes(rng.randrange(256) for _ in range(5))
+            self.assertEqual(encode_turbo_real(decode_turbo_real(raw)), raw, raw.hex())
+
+    def test_marks(self):
+        """Test encoding typical marks and no mark"""
+        from real48 import decode_turbo_real, encode_turbo_real
+
+        self.assertEqual(encode_turbo_real(17.0), b'\x85\x00\x00\x00\x00\x08')
+        self.assertEqual(encode_turbo_real(None), bytes(6))
+        self.assertEqual(decode_turbo_real(encode_turbo_real(-1.0)), -1.0)
+        self.assertAlmostEqual(decode_turbo_real(encode_turbo_real(93.3)), 93.3, places=9)
+
+    def test_encode_mark_writes_blanks_as_zero(self):
+        """Test that every value shown as blank is written as the all-zero pattern"""
+        from real48 import NO_MARK, decode_turbo_real, encode_mark, encode_turbo_real
+
+        for value in (None, -1.0, -3.5, 999.0, 1200.0):
+            self.assertEqual(encode_mark(value), NO_MARK, value)
+        self.assertEqual(encode_mark(decode_turbo_real(NO_MARK)), NO_MARK)
+        self.assertEqual(encode_mark(17.0), encode_turbo_real(17.0))
+
+    def test_overflow(self):
+        """Test that values beyond the Real48 range are rejected"""
+        from real48 import encode_turbo_real
+        with self.assertRaises(OverflowError):
+            encode_turbo_real(1e40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import random
+import tempfile
+import unittest
+
+
+class TestRecFile(unittest.TestCase):
+    """Test cases for the memory-mapped record reader"""
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.data = bytes(rng.randrange(256) for _ in range(796 * 4))
+        fd, self.path = tempfile.mkstemp(suffix='.rec')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.data + b'\x00' * 10)  # trailing partial record
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_len_ignores_partial_record(self):
+        """Test that len() counts complete records only"""
+        from rec_file import RecFile
+        with RecFile(self.path) as rec:
+            self.assertEqual(len(rec), 4)
+            self.assertEqual(rec.trailing_bytes, 10)
+
+    def test_views_match_unpacked_records(self):
+        """Test that lazy fields decode to the same values as the full record"""
+        from marks_reader import unpack_student_record
+        from rec_file import RecFile
+        with RecFile(self.path) as rec:
+            for i, view in enumerate(rec):
+                expected = unpack_student_record(self.data, i * 796)
+                for name in expected:
+                    self.assertEqual(view[name], expected[name])
+                self.assertEqual(view.to_dict(), expected)
+                self.assertEqual(view.element('marks', 7), expected['marks'][7])
+
+    def test_indexing_and_slicing(self):
+        """Test negative indexes, slices and out-of-range access"""
+        from rec_file import RecFile
+        with RecFile(self.path) as rec:
+            self.assertEqual(rec[-1].offset, 3 * 796)
+            self.assertEqual([v.index for v in rec[1:4:2]], [1, 3])
+            with self.assertRaises(IndexError):
+                rec[4]
+            with self.assertRaises(KeyError):
+                rec[0]['missing']
+
+    def test_field_decoded_on_access(self):
+        """Test that only accessed fields are decoded"""
+        from rec_file import RecFile
+        with RecFile(self.path) as rec:
+            view = rec[2]
+            view['name']
+            self.assertEqual(list(view._cache), ['name'])
+
+    def test_empty_file(self):
+        """Test that an empty file is an empty sequence"""
+        from rec_file import RecFile
+        open(self.path, 'wb').close()
+        with RecFile(self.path) as rec:
+            self.assertEqual(len(rec), 0)
+            self.assertEqual(rec[:], [])
+
+
+class TestRecFilePatching(unittest.TestCase):
+    """Test cases for in-place writes through a writable RecFile"""
+
+    def setUp(self):
+        rng = random.Random(5)
+        self.data = bytes(rng.randrange(256) for _ in range(796 * 3))
+        fd, self.path = tempfile.mkstemp(suffix='.rec')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _changed_bytes(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        return [i for i, (a, b) in enumerate(zip(self.data, data)) if a != b]
+
+    def test_set_element_writes_six_bytes(self):
+        """Test that patching one mark changes only that mark's bytes"""
+        from marks_reader import FIELDS_BY_NAME
+        from rec_file import RecFile
+        with RecFile(self.path, writable=True) as rec:
+            view = rec[1]
+            view['marks']  # the cached value must be refreshed
+            view.set_element('marks', 4, 17.0)
+            self.assertEqual(view['marks'][4], 17.0)
+        start = 796 + FIELDS_BY_NAME['marks'].offset + 24
+        changed = self._changed_bytes()
+        self.assertTrue(changed)
+        self.assertTrue(all(start <= i < start + 6 for i in changed))
+        with RecFile(self.path) as rec:
+            self.assertEqual(rec[1].element('marks', 4), 17.0)
+
+    def test_set_fields(self):
+        """Test writing string, scalar real and integer fields"""
+        from rec_file import RecFile
+        with RecFile(self.path, writable=True) as rec:
+            rec[2]['name'] = 'YAN KENNY'
+            rec[2]['finalmark'] = 93.5
+            rec[2]['absences'] = 4
+            rec[2]['catmarks'] = [None] * 10
+        with RecFile(self.path) as rec:
+            record = rec[2].to_dict()
+        self.assertEqual(record['name'], 'YAN KENNY')
+        self.assertEqual(record['finalmark'], 93.5)
+        self.assertEqual(record['absences'], 4)
+        self.assertEqual(record['catmarks'], [-1.0] * 10)
+        self.assertGreaterEqual(min(self._changed_bytes()), 2 * 796)
+
+    def test_blank_marks_round_trip(self):
+        """Test that writing back decoded blanks keeps the all-zero no-mark bytes"""
+        from rec_file import RecFile
+        from synth_gradebook import student_record
+        data = student_record('LUC JIMMY', '309000001', '12K', [16.0, None, 2.0, 25.0], [14.5, None],
+                              [75.3], 75.3)
+        with open(self.path, 'wb') as f:
+            f.write(data)
+        self.data = data
+
+        with RecFile(self.path, writable=True) as rec:
+            view = rec[0]
+            self.assertEqual(view['marks'][1], -1.0)
+            for name in ('marks', 'catmarks', 'termmarks', 'finalmark'):
+                view[name] = view[name]
+            view.set_element('marks', 1, view.element('marks', 1))
+            view.set_element('marks', 50, -1.0)
+            view.set_element('catmarks', 5, 999.0)
+        self.assertEqual(self._changed_bytes(), [])
+
+    def test_read_only_by_default(self):
+        """Test that a RecFile opened without writable=True cannot be patched"""
+        from rec_file import RecFile
+        with RecFile(self.path) as rec:
+            with self.assertRaises(TypeError):
+                rec[0].set_element('marks', 0, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
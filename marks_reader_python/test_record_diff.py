@@ -0,0 +1,119 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestRecordDiff(unittest.TestCase):
+    """Test cases for record-level change detection and the change feed"""
+
+    def setUp(self):
+        from record_diff import update_class
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.out = os.path.join(self.tmp, 'out')
+        os.makedirs(self.out)
+        self.rec, self.txt = generate_class(self.tmp, 'SYN001-1', num_students=8, num_marks=5,
+                                            num_cat=2, seed=4, empty_every=3)
+        summary, changes, rewritten = update_class(self.rec, self.txt, self.out)
+        self.assertTrue(rewritten)
+        self.assertEqual(changes, [])
+        self.assertEqual(summary['num_students'], 8)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def read(self, directory, name):
+        with open(os.path.join(directory, name), newline='', encoding='utf-8') as f:
+            return f.read()
+
+    def assertMatchesFullConversion(self):
+        """The patched CSVs are byte for byte what a full conversion writes"""
+        from marks_reader import convert_class_to_csv
+        fresh = os.path.join(self.tmp, 'fresh')
+        os.makedirs(fresh, exist_ok=True)
+        convert_class_to_csv(self.rec, self.txt, fresh)
+        for suffix in ('marks', 'attendance', 'marks_transposed'):
+            name = f'SYN001-1_{suffix}.csv'
+            self.assertEqual(self.read(self.out, name), self.read(fresh, name), name)
+
+    def test_unchanged_file(self):
+        """Test that an unchanged .rec writes nothing"""
+        from record_diff import update_class
+        before = os.stat(os.path.join(self.out, 'SYN001-1_marks.csv')).st_mtime_ns
+        summary, changes, rewritten = update_class(self.rec, self.txt, self.out)
+        self.assertEqual((changes, rewritten), ([], False))
+        self.assertEqual(summary['num_students'], 8)
+        self.assertEqual(os.stat(os.path.join(self.out, 'SYN001-1_marks.csv')).st_mtime_ns, before)
+
+    def test_changed_mark_patches_rows(self):
+        """Test that a changed mark and absence count are fed and patched into the CSVs"""
+        from marks_reader import format_mark
+        from rec_file import RecFile
+        from record_diff import FEED_HEADER, update_class
+
+        with RecFile(self.rec, writable=True) as rec:
+            record = rec[4]
+            studentno = record['studentno']
+            old_mark = format_mark(record['marks'][1])
+            old_absences = record['absences']
+            record.set_element('marks', 1, 17.5)
+            record['absences'] = old_absences + 3
+
+        summary, changes, rewritten = update_class(self.rec, self.txt, self.out)
+        self.assertFalse(rewritten)
+        self.assertEqual(changes[0][0], studentno)
+        self.assertIn(('Absences', str(old_absences), str(old_absences + 3)),
+                      [change[1:] for change in changes])
+        mark_change = [change for change in changes if change[2] == old_mark and change[3] == '17.5']
+        self.assertEqual(len(mark_change), 1)
+        self.assertEqual(len(changes), 2)
+        self.assertMatchesFullConversion()
+
+        with open(os.path.join(self.out, '_change_feed.csv'), newline='') as f:
+            feed = list(csv.reader(f))
+        self.assertEqual(feed[0], FEED_HEADER)
+        self.assertEqual([row[1:] for row in feed[1:]], [['SYN001-1'] + list(change) for change in changes])
+
+    def test_removed_student_rewrites_in_full(self):
+        """Test that emptying a record is fed as a removal and rewrites every row"""
+        from rec_file import RecFile
+        from record_diff import update_class
+
+        with RecFile(self.rec, writable=True) as rec:
+            name = rec[0]['name']
+            studentno = rec[0]['studentno']
+            rec[0]['name'] = ''
+
+        summary, changes, rewritten = update_class(self.rec, self.txt, self.out)
+        self.assertTrue(rewritten)
+        self.assertEqual(changes, [(studentno, 'Student Name', name, '')])
+        self.assertEqual(summary['num_students'], 7)
+        self.assertMatchesFullConversion()
+
+        # The new fingerprints are the baseline for the next change
+        self.assertEqual(update_class(self.rec, self.txt, self.out)[1:], ([], False))
+
+    def test_edited_csv_rewrites_in_full(self):
+        """Test that CSVs edited since the last export are not patched"""
+        from record_diff import update_class
+        with open(os.path.join(self.out, 'SYN001-1_marks.csv'), 'a') as f:
+            f.write('junk\n')
+        self.assertTrue(update_class(self.rec, self.txt, self.out)[2])
+        self.assertMatchesFullConversion()
+
+    def test_record_hashes(self):
+        """Test that each whole slot gets its own hash"""
+        from marks_reader import RECORD_SIZE
+        from record_diff import record_hashes
+        data = bytes(RECORD_SIZE) + b'\x01' * RECORD_SIZE + b'\x02' * 10
+        hashes = record_hashes(data)
+        self.assertEqual(len(hashes), 2)
+        self.assertNotEqual(hashes[0], hashes[1])
+        self.assertEqual(record_hashes(data[:RECORD_SIZE]), hashes[:1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestSpreadsheetView(unittest.TestCase):
+    """Test cases for the buffered, virtualized spreadsheet renderer"""
+
+    def setUp(self):
+        from synth_gradebook import generate_class
+        self.tmp = tempfile.mkdtemp()
+        self.rec, self.txt = generate_class(self.tmp, 'SYN001-1', num_students=30, num_marks=12, num_cat=3,
+                                            seed=5, empty_every=7)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_only_visible_rows_are_formatted(self):
+        """Test that a frame formats just its rows, and its columns fit the width"""
+        from marks_reader import read_config_file
+        from rec_file import RecFile
+        from spreadsheet_view import SpreadsheetView, class_cells, class_columns, student_views
+        config = read_config_file(self.txt)
+        rec = RecFile(self.rec)
+        self.addCleanup(rec.close)
+        students = student_views(rec)
+        cells = class_cells(config)
+        made = []
+
+        def make_row(student, indexes):
+            made.append(student['name'])
+            return [cells[i](student) for i in indexes]
+
+        view = SpreadsheetView('title', class_columns(config), students, make_row, width=80, height=20)
+        frame = view.render(top=10, rows=5)
+        self.assertEqual(made, [student['name'] for student in students[10:15]])
+        lines = frame.splitlines()
+        self.assertTrue(all(len(line) <= 80 for line in lines))
+        self.assertIn(students[10]['name'], lines[5])
+        self.assertEqual(lines[-1], "Rows 11-15 of 30, columns 1-5 of 17")
+
+    def test_hidden_columns_are_not_decoded(self):
+        """Test that only the marks in visible columns are decoded and formatted"""
+        from unittest import mock
+        import spreadsheet_view
+        from spreadsheet_view import SpreadsheetView
+        with SpreadsheetView.from_class(self.rec, self.txt, width=80) as view:
+            with mock.patch('spreadsheet_view.format_mark', wraps=spreadsheet_view.format_mark) as formatted:
+                view.render(top=0, rows=4, left=2)
+            self.assertEqual(formatted.call_count, 4 * 5)
+            for student in view.items[:4]:
+                self.assertEqual(sorted(student._cache), ['homeform', 'name', 'studentno'])
+
+    def test_columns_scroll_with_names_frozen(self):
+        """Test that scrolling right keeps the student columns and shows later marks"""
+        from spreadsheet_view import SpreadsheetView
+        with SpreadsheetView.from_class(self.rec, self.txt, width=90) as view:
+            lines = view.render(rows=1, left=12).splitlines()
+        self.assertTrue(lines[3].startswith('Student Name'))
+        self.assertEqual(lines[3].split()[-5:], ['TESTS', 'ASSIGN', 'NOTEBOOK', 'T1', 'FINAL'])
+        self.assertEqual(lines[2].split(), ['Student', 'Categories', 'Terms', 'Final'])
+
+    def test_write_matches_csv_view(self):
+        """Test that the .rec view and the marks CSV view draw the same full spreadsheet"""
+        from marks_reader import convert_class_to_csv
+        from spreadsheet_view import SpreadsheetView
+        convert_class_to_csv(self.rec, self.txt, self.tmp)
+        from_csv = io.StringIO()
+        from_rec = io.StringIO()
+        SpreadsheetView.from_csv(os.path.join(self.tmp, 'SYN001-1_marks.csv'), title='t').write(from_csv)
+        with SpreadsheetView.from_class(self.rec, self.txt) as view:
+            view.title = 't'
+            view.write(from_rec)
+        self.assertEqual(from_csv.getvalue(), from_rec.getvalue())
+        self.assertEqual(len(from_rec.getvalue().splitlines()), 30 + 7)
+
+    def test_pager(self):
+        """Test paging forward, back and to the end"""
+        from spreadsheet_view import SpreadsheetView, FRAME_LINES
+        commands = iter(['', 'p', 'G', '>', 'q'])
+        out = io.StringIO()
+        with SpreadsheetView.from_class(self.rec, self.txt, width=80, height=FRAME_LINES + 10) as view:
+            view.page(lambda prompt: next(commands), out)
+        statuses = [line for line in out.getvalue().splitlines() if line.startswith('Rows ')]
+        self.assertEqual(statuses, ['Rows 1-10 of 30, columns 1-5 of 17',
+                                    'Rows 11-20 of 30, columns 1-5 of 17',
+                                    'Rows 1-10 of 30, columns 1-5 of 17',
+                                    'Rows 21-30 of 30, columns 1-5 of 17',
+                                    'Rows 21-30 of 30, columns 6-10 of 17'])
+
+    def test_board(self):
+        """Test the whole-board view across classes"""
+        from synth_gradebook import generate_class
+        from marks_reader import find_class_files
+        from spreadsheet_view import SpreadsheetView
+        generate_class(self.tmp, 'SYN002-1', num_students=4, num_marks=3, num_cat=5, seed=6)
+        with SpreadsheetView.board(find_class_files(self.tmp)) as view:
+            self.assertEqual(len(view.items), 34)
+            self.assertEqual([column.label for column in view.columns][-5:], ['C1', 'C2', 'C3', 'C4', 'C5'])
+            last = view.render(top=33, rows=1).splitlines()[5]
+        self.assertTrue(last.startswith('SYN002-1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
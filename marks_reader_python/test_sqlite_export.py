@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestSQLiteExport(unittest.TestCase):
+    """Test cases for the SQLite exporter"""
+
+    def setUp(self):
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.classes = [generate_class(self.tmp, f'SYN00{n}-1', num_students=10, num_marks=6,
+                                       num_cat=3, seed=n, empty_every=4) for n in range(2)]
+        self.db = os.path.join(self.tmp, 'marks.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _load(self, force=False):
+        from sqlite_export import load_classes, open_database
+        conn = open_database(self.db)
+        try:
+            return load_classes(conn, self.classes, force)
+        finally:
+            conn.close()
+
+    def _query(self, sql, params=()):
+        import sqlite3
+        conn = sqlite3.connect(self.db)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_tables_match_marks_csv(self):
+        """Test that the marks and students match the CSV export"""
+        import csv
+        from marks_reader import convert_class_to_csv
+
+        self.assertEqual(self._load(), ([('SYN000-1', 10), ('SYN001-1', 10)], []))
+        rec, txt = self.classes[0]
+        convert_class_to_csv(rec, txt, self.tmp)
+        with open(os.path.join(self.tmp, 'SYN000-1_marks.csv'), newline='') as f:
+            csv_rows = list(csv.reader(f))[1:]
+
+        students = self._query("SELECT student, name, studentno, homeform, final_mark FROM students "
+                               "WHERE class_code = ? ORDER BY student", ('SYN000-1',))
+        self.assertEqual([list(row[1:4]) for row in students], [row[:3] for row in csv_rows])
+        for (student, *_, final_mark), row in zip(students, csv_rows):
+            marks = dict(self._query("SELECT assessment, mark FROM marks WHERE class_code = ? AND student = ?",
+                                     ('SYN000-1', student)))
+            self.assertEqual([f'{marks[i]:.1f}' if i in marks else '' for i in range(1, 7)], row[3:9])
+            self.assertEqual(f'{final_mark:.1f}', row[-1])
+
+        self.assertEqual(self._query("SELECT COUNT(*) FROM assessments WHERE class_code = 'SYN001-1'"), [(6,)])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM categories"), [(6,)])
+
+    def test_indexes(self):
+        """Test that student number and homeform lookups use an index"""
+        self._load()
+        plan = self._query("EXPLAIN QUERY PLAN SELECT * FROM students WHERE studentno = '300000001'")
+        self.assertIn('idx_students_studentno', str(plan))
+        plan = self._query("EXPLAIN QUERY PLAN SELECT * FROM students WHERE homeform = '10A'")
+        self.assertIn('idx_students_homeform', str(plan))
+
+    def test_incremental_upsert(self):
+        """Test that unchanged classes are skipped and changed ones replaced"""
+        from synth_gradebook import generate_class
+
+        self._load()
+        self.assertEqual(self._load(), ([], ['SYN000-1', 'SYN001-1']))
+
+        generate_class(self.tmp, 'SYN001-1', num_students=4, num_marks=6, num_cat=3, seed=9)
+        os.utime(self.classes[1][0], ns=(0, 10 ** 9))
+        self.assertEqual(self._load(), ([('SYN001-1', 4)], ['SYN000-1']))
+        self.assertEqual(self._query("SELECT class_code, COUNT(*) FROM students GROUP BY class_code"),
+                         [('SYN000-1', 10), ('SYN001-1', 4)])
+        self.assertEqual(self._load(force=True)[0], [('SYN000-1', 10), ('SYN001-1', 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestStudentIndex(unittest.TestCase):
+    """Test cases for the board-wide student index"""
+
+    def setUp(self):
+        from synth_gradebook import generate_class
+
+        self.tmp = tempfile.mkdtemp()
+        self.classes = [generate_class(self.tmp, f'SYN00{n}-1', num_students=6 + n, seed=n, empty_every=3)
+                        for n in range(3)]
+        self.path = os.path.join(self.tmp, '_student_index.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _index(self):
+        from student_index import StudentIndex
+        index = StudentIndex(self.path)
+        index.update(self.classes)
+        index.save()
+        return index
+
+    def test_lookup_matches_records(self):
+        """Test that every looked-up offset holds the student's record"""
+        from marks_reader import iter_student_records
+
+        index = self._index()
+        self.assertEqual([class_code for _, _, class_code in index.lookup('300000006')], ['SYN001-1', 'SYN002-1'])
+        self.assertEqual(len(index.lookup('300000000')), 3)
+        self.assertEqual(index.lookup('missing'), [])
+
+        for class_code, record in index.records('300000002'):
+            rec = self.classes[int(class_code[5])][0]
+            with open(rec, 'rb') as f:
+                expected = [s for s in iter_student_records(f.read()) if s['studentno'] == '300000002']
+            self.assertEqual([record], expected)
+
+    def test_homeform(self):
+        """Test that a homeform lists each of its students once"""
+        from marks_reader import iter_student_records
+
+        index = self._index()
+        expected = set()
+        for rec, _ in self.classes:
+            with open(rec, 'rb') as f:
+                expected |= {s['studentno'] for s in iter_student_records(f.read())
+                             if s['name'] and s['homeform'] == '10A'}
+        self.assertEqual(index.homeform('10A'), sorted(expected))
+
+    def test_only_changed_files_are_reindexed(self):
+        """Test that an update re-scans only changed, and drops removed, files"""
+        from student_index import StudentIndex
+        from synth_gradebook import generate_class
+
+        self._index()
+        index = StudentIndex(self.path)
+        self.assertEqual(index.update(self.classes), ([], []))
+        self.assertEqual(len(index.lookup('300000000')), 3)
+
+        generate_class(self.tmp, 'SYN001-1', num_students=2, seed=4)
+        os.utime(self.classes[1][0], ns=(0, 10 ** 9))
+        self.assertEqual(index.update(self.classes[:2]), ([self.classes[1][0]], [index.key(self.classes[2][0])]))
+        self.assertEqual(index.lookup('300000006'), [])
+        self.assertEqual([class_code for _, _, class_code in index.lookup('300000001')], ['SYN000-1', 'SYN001-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestSyntheticGradebook(unittest.TestCase):
+    """Test cases for the synthetic .rec/.txt generator"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_readers_accept_generated_class(self):
+        """Test that read_config_file and read_student_record parse the files"""
+        from marks_reader import read_config_file, read_student_record, RECORD_SIZE
+        from synth_gradebook import generate_class
+
+        rec, txt = generate_class(self.tmp, 'SYN001-1', num_students=12, num_marks=20,
+                                  num_cat=4, num_terms=2, seed=3)
+        config = read_config_file(txt)
+        self.assertEqual(config['class_code'], 'SYN001-1')
+        self.assertEqual((config['num_marks'], config['num_cat'], config['num_terms']), (20, 4, 2))
+        self.assertEqual(len(config['marks']), 20)
+        self.assertAlmostEqual(sum(weight for _, weight in config['categories']), 100, delta=0.5)
+
+        self.assertEqual(os.path.getsize(rec), 12 * RECORD_SIZE)
+        with open(rec, 'rb') as f:
+            student = read_student_record(f)
+        self.assertTrue(student['name'])
+        self.assertEqual(student['studentno'], '300000000')
+        for value, mark in zip(student['marks'], config['marks']):
+            self.assertTrue(value == -1.0 or 0 < value <= mark['total'])
+        self.assertEqual(student['marks'][20:], [-1.0] * 80)
+        self.assertAlmostEqual(student['termmarks'][0], student['finalmark'])
+
+    def test_reproducible(self):
+        """Test that the same seed writes identical files"""
+        from synth_gradebook import generate_class
+
+        first = generate_class(self.tmp, 'SYN001-1', 5, seed=7, file_stem='a')
+        second = generate_class(self.tmp, 'SYN001-1', 5, seed=7, file_stem='b')
+        for a, b in zip(first, second):
+            with open(a, 'rb') as fa, open(b, 'rb') as fb:
+                self.assertEqual(fa.read(), fb.read())
+
+    def test_empty_records_are_skipped(self):
+        """Test that interleaved empty records do not become CSV rows"""
+        from marks_reader import convert_class_to_csv
+        from synth_gradebook import generate_class
+
+        rec, txt = generate_class(self.tmp, 'SYN001-1', num_students=6, seed=1, empty_every=2)
+        summary = convert_class_to_csv(rec, txt, self.tmp)
+        self.assertEqual(summary['num_students'], 6)
+
+    def test_category_marks(self):
+        """Test the weighted category and final mark calculation"""
+        from synth_gradebook import category_marks
+
+        config = {
+            'num_cat': 2,
+            'categories': [('TESTS', 60.0), ('ASSIGN', 40.0)],
+            'marks': [{'total': 10.0, 'category': 1}, {'total': 20.0, 'category': 1},
+                      {'total': 5.0, 'category': 2}],
+        }
+        catmarks, final = category_marks([5.0, 10.0, None], config)
+        self.assertEqual(catmarks, [30.0, None])
+        self.assertAlmostEqual(final, 50.0)
+
+
+class TestBenchmarkHistory(unittest.TestCase):
+    """Test cases for benchmark regression detection"""
+
+    def test_find_regressions(self):
+        """Test that slower rates and longer wall times beyond the tolerance are reported"""
+        from benchmark import find_regressions
+
+        previous = {'1000': {'marks_csv_rows_per_sec': 1000.0, 'excel_seconds': 1.0}}
+        self.assertEqual(find_regressions(previous, {'1000': {'marks_csv_rows_per_sec': 900.0,
+                                                              'excel_seconds': 1.1}}), [])
+        self.assertEqual(find_regressions(previous, {'1000': {'marks_csv_rows_per_sec': 700.0,
+                                                              'excel_seconds': 1.5}}),
+                         [('1000', 'marks_csv_rows_per_sec', 1000.0, 700.0),
+                          ('1000', 'excel_seconds', 1.0, 1.5)])
+        # Sizes or metrics missing from the previous run are not compared
+        self.assertEqual(find_regressions(previous, {'10000': {'marks_csv_rows_per_sec': 1.0}}), [])
+
+    def test_regression_stays_reported(self):
+        """Test that a regressed run appended to the history does not become the baseline"""
+        from benchmark import best_results, find_regressions
+
+        history = [{'results': {'1000': {'marks_csv_rows_per_sec': 1000.0, 'excel_seconds': 1.0}}},
+                   {'results': {'1000': {'marks_csv_rows_per_sec': 700.0, 'excel_seconds': 1.5}}}]
+        self.assertEqual(best_results(history), {'1000': {'marks_csv_rows_per_sec': 1000.0, 'excel_seconds': 1.0}})
+        self.assertEqual(find_regressions(best_results(history), {'1000': {'marks_csv_rows_per_sec': 700.0,
+                                                                           'excel_seconds': 1.5}}),
+                         [('1000', 'marks_csv_rows_per_sec', 1000.0, 700.0),
+                          ('1000', 'excel_seconds', 1.0, 1.5)])
+        self.assertEqual(best_results([]), {})
+
+    def test_small_run(self):
+        """Test a run on a tiny class produces every CSV metric"""
+        import tempfile
+        from benchmark import benchmark_size
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = benchmark_size(20, work_dir, repeat=1, excel=False)
+        self.assertEqual(set(results), {'decode_records_per_sec', 'projected_decode_records_per_sec',
+                                        'marks_csv_rows_per_sec',
+                                        'attendance_csv_rows_per_sec', 'transposed_csv_rows_per_sec',
+                                        'streamed_csv_rows_per_sec'})
+        self.assertTrue(all(value > 0 for value in results.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestClassWatcher(unittest.TestCase):
+    """Test cases for re-exporting classes as they are saved"""
+
+    def setUp(self):
+        from synth_gradebook import generate_class
+        from watch import ClassWatcher
+
+        self.tmp = tempfile.mkdtemp()
+        self.classes = os.path.join(self.tmp, 'classes')
+        self.output = os.path.join(self.tmp, 'out')
+        os.makedirs(self.classes)
+        os.makedirs(self.output)
+        self.pairs = [generate_class(self.classes, f'SYN00{n}-1', num_students=5, num_marks=4, num_cat=2, seed=n)
+                      for n in range(2)]
+        self.now = 100.0
+        self.watcher = ClassWatcher(self.classes, self.output, settle=1.0, clock=lambda: self.now)
+        self.watcher.start()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def save(self, rec_file, data):
+        """Rewrite a .rec file, moving its mtime on so the change is always seen"""
+        with open(rec_file, 'wb') as f:
+            f.write(data)
+        st = os.stat(rec_file)
+        os.utime(rec_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def summary_codes(self):
+        import csv
+        with open(os.path.join(self.output, '_summary.csv'), newline='') as f:
+            return [row[0] for row in list(csv.reader(f))[1:]]
+
+    def test_start_exports_everything(self):
+        """Test that starting brings every class's CSVs and the summary up to date"""
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'SYN000-1_marks.csv')))
+        self.assertEqual(self.summary_codes(), ['SYN000-1', 'SYN001-1'])
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_change_is_debounced_and_exported(self):
+        """Test that only the changed class is converted, once its file has settled"""
+        from synth_gradebook import generate_class
+        rec_file = self.pairs[0][0]
+        generate_class(self.classes, 'SYN000-1', num_students=7, num_marks=4, num_cat=2, seed=9)
+        self.save(rec_file, open(rec_file, 'rb').read())
+
+        self.assertEqual(self.watcher.poll(), [])  # just seen
+        self.assertEqual(self.watcher.interval, self.watcher.min_interval)
+        self.now += 0.5
+        self.assertEqual(self.watcher.poll(), [])  # not settled yet
+
+        self.now += 1.0
+        events = self.watcher.poll()
+        self.assertEqual([(e['rec_file'], e['status'], e['num_students']) for e in events],
+                         [(rec_file, 'exported', 7)])
+        self.assertAlmostEqual(events[0]['latency'], 1.5)
+        with open(os.path.join(self.output, 'SYN000-1_marks.csv')) as f:
+            self.assertEqual(len(f.readlines()), 8)
+
+        # Quiet polls back off
+        self.now += 1.0
+        self.assertEqual(self.watcher.poll(), [])
+        self.assertEqual(self.watcher.interval, self.watcher.min_interval * 2)
+
+    def test_partial_record_waits(self):
+        """Test that a .rec holding part of a record is not exported while it may still be written"""
+        from marks_reader import RECORD_SIZE, PartialRecordWarning
+        from watch import PARTIAL_SETTLE_FACTOR
+        rec_file = self.pairs[1][0]
+        data = open(rec_file, 'rb').read()
+        self.save(rec_file, data + data[:RECORD_SIZE // 2])
+
+        self.watcher.poll()
+        self.now += 2.0
+        self.assertEqual(self.watcher.poll(), [])
+
+        self.save(rec_file, data + data[:RECORD_SIZE])
+        self.watcher.poll()
+        self.now += 1.0
+        self.assertEqual([e['num_students'] for e in self.watcher.poll()], [6])
+
+        # A file left truncated is exported in the end, warning about the partial record
+        self.save(rec_file, data + data[:RECORD_SIZE // 2])
+        self.watcher.poll()
+        self.now += PARTIAL_SETTLE_FACTOR * 1.0
+        with self.assertWarns(PartialRecordWarning):
+            self.assertEqual([e['status'] for e in self.watcher.poll()], ['exported'])
+
+    def test_touch_without_change(self):
+        """Test that a new mtime with the same contents does not convert the class"""
+        rec_file = self.pairs[0][0]
+        self.save(rec_file, open(rec_file, 'rb').read())
+        self.watcher.poll()
+        self.now += 1.0
+        self.assertEqual([e['status'] for e in self.watcher.poll()], ['unchanged'])
+
+    def test_removed_class(self):
+        """Test that a deleted class is reported and left out of the summary"""
+        os.remove(self.pairs[1][0])
+        events = self.watcher.poll()
+        self.assertEqual([(e['rec_file'], e['status']) for e in events], [(self.pairs[1][0], 'removed')])
+        self.assertEqual(self.summary_codes(), ['SYN000-1'])
+
+    def test_format_event(self):
+        """Test the printed event line"""
+        from watch import format_event
+        line = format_event({'rec_file': '/x/Syn000-1.rec', 'class_code': 'SYN000-1', 'num_students': 5,
+                             'status': 'exported', 'error': None, 'latency': 1.25, 'since_save': 2.0,
+                             'convert_seconds': 0.05})
+        self.assertEqual(line, "Syn000-1.rec: exported SYN000-1 (5 students) in 0.05s, "
+                               "1.25s after the change was seen, 2.00s after save")
+
+
+if __name__ == '__main__':
+    unittest.main()
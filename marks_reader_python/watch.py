@@ -0,0 +1,247 @@
+"""
+Watch mode
+
+Keeps the CSV exports of a class directory current while teachers save
+gradebooks through the day. The directory is polled (one os.scandir listing
+and a stat of each class's two files per poll), every few seconds when
+idle and every half second while something is changing. A class whose
+.rec or .txt changed is converted again with convert_class_to_csv once its
+files have stopped changing, so a half-written save is never exported, and
+_summary.csv is rebuilt from the manifest. Each export reports its latency.
+
+Usage:
+    py watch.py [--classes-dir DIR] [--output-dir DIR] [--recursive] [--settle SECONDS] [--delta]
+"""
+
+import argparse
+import os
+import time
+
+from manifest import ConversionManifest
+from marks_reader import RECORD_SIZE, convert_class_to_csv, convert_classes, find_class_files, write_summary_csv
+
+
+SETTLE_SECONDS = 1.0
+MIN_INTERVAL = 0.5
+MAX_INTERVAL = 5.0
+
+# A .rec that is not a whole number of records is still being written; it is
+# exported anyway once it has been left that way for this many settle periods
+PARTIAL_SETTLE_FACTOR = 10
+
+
+def class_signatures(rec_files):
+    """
+    Size and mtime of each class's files
+
+    Args:
+        rec_files: List of (rec_path, txt_path) tuples
+
+    Returns:
+        dict: rec_path -> (txt_path, (rec size, rec mtime_ns), (txt size, txt mtime_ns)),
+        leaving out classes whose files vanished since they were listed
+    """
+    signatures = {}
+    for rec_file, txt_file in rec_files:
+        try:
+            rec = os.stat(rec_file)
+            txt = os.stat(txt_file)
+        except OSError:
+            continue
+        signatures[rec_file] = (txt_file, (rec.st_size, rec.st_mtime_ns), (txt.st_size, txt.st_mtime_ns))
+    return signatures
+
+
+class ClassWatcher:
+    """
+    Re-exports classes as their files change
+
+    Usage:
+        watcher = ClassWatcher(classes_dir, output_dir)
+        watcher.start()
+        while True:
+            for event in watcher.poll():
+                print(format_event(event))
+            time.sleep(watcher.interval)
+
+    Attributes:
+        interval: Seconds to wait before the next poll; MIN_INTERVAL while a
+                  class is changing, settling or being exported, then doubling
+                  on each quiet poll up to MAX_INTERVAL
+    """
+
+    def __init__(self, classes_dir, output_dir, recursive=False, convert=convert_class_to_csv,
+                 settle=SETTLE_SECONDS, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 clock=time.monotonic):
+        self.classes_dir = classes_dir
+        self.output_dir = output_dir
+        self.recursive = recursive
+        self.convert = convert
+        self.settle = settle
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+        self.interval = min_interval
+        self.manifest = ConversionManifest(output_dir)
+        self.known = {}    # rec_path -> signature at the last export
+        self.pending = {}  # rec_path -> (signature, first seen changed, last seen changed)
+
+    def scan(self):
+        return class_signatures(find_class_files(self.classes_dir, self.recursive))
+
+    def start(self):
+        """
+        Bring every class's exports up to date, as a batch run would
+
+        Returns:
+            tuple: (list of summary dicts, list of (rec_path, error message))
+        """
+        signatures = self.scan()
+        rec_files = [(rec_file, signature[0]) for rec_file, signature in signatures.items()]
+        result = convert_classes(rec_files, self.output_dir, convert=self.convert, manifest=self.manifest)
+        self.known = signatures
+        self.pending.clear()
+        self.write_summary()
+        return result
+
+    def poll(self):
+        """
+        Look for changed classes and export those that have settled
+
+        A class is exported once its files have kept the same size and mtime
+        for `settle` seconds and its .rec holds whole records. A class whose
+        files were touched without changing is recorded but not converted.
+
+        Returns:
+            list: One event dict per class exported or removed, with
+            rec_file, class_code, num_students, status ('exported',
+            'unchanged', 'failed' or 'removed'), error, latency (seconds from
+            the change being seen to the CSVs being written), since_save
+            (seconds from the file's mtime, by the file server's clock) and
+            convert_seconds
+        """
+        now = self.clock()
+        current = self.scan()
+        changing = False
+
+        for rec_file, signature in current.items():
+            if signature == self.known.get(rec_file):
+                self.pending.pop(rec_file, None)
+                continue
+            entry = self.pending.get(rec_file)
+            if entry is None or entry[0] != signature:
+                self.pending[rec_file] = (signature, entry[1] if entry else now, now)
+                changing = True
+
+        events = []
+        for rec_file in sorted(set(self.known) - set(current)):
+            del self.known[rec_file]
+            self.pending.pop(rec_file, None)
+            self.manifest.forget(rec_file)
+            events.append(self.event(rec_file, 'removed', 0.0))
+
+        for rec_file, (signature, first_seen, last_seen) in sorted(self.pending.items()):
+            quiet = now - last_seen
+            whole_records = signature[1][0] % RECORD_SIZE == 0
+            if quiet < self.settle or not (whole_records or quiet >= self.settle * PARTIAL_SETTLE_FACTOR):
+                continue
+            events.append(self.export(rec_file, signature, first_seen))
+
+        if events:
+            self.manifest.save()
+            self.write_summary()
+        if changing or self.pending or events:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+        return events
+
+    def export(self, rec_file, signature, first_seen):
+        """Convert one settled class and return its event"""
+        txt_file = signature[0]
+        del self.pending[rec_file]
+        self.known[rec_file] = signature
+        if self.manifest.is_current(rec_file, txt_file):
+            return self.event(rec_file, 'unchanged', first_seen, signature)
+
+        started = self.clock()
+        summary, failures = convert_classes([(rec_file, txt_file)], self.output_dir, convert=self.convert,
+                                            manifest=self.manifest)
+        convert_seconds = self.clock() - started
+        if failures:
+            return self.event(rec_file, 'failed', first_seen, signature, convert_seconds, error=failures[0][1])
+        return self.event(rec_file, 'exported', first_seen, signature, convert_seconds,
+                          summary=summary[0] if summary else None)
+
+    def event(self, rec_file, status, first_seen, signature=None, convert_seconds=0.0, summary=None, error=None):
+        since_save = None
+        if signature is not None:
+            saved_ns = max(signature[1][1], signature[2][1])
+            since_save = time.time() - saved_ns / 1e9
+        return {
+            'rec_file': rec_file,
+            'class_code': summary['class_code'] if summary else None,
+            'num_students': summary['num_students'] if summary else 0,
+            'status': status,
+            'error': error,
+            'latency': self.clock() - first_seen if status != 'removed' else 0.0,
+            'since_save': since_save,
+            'convert_seconds': convert_seconds,
+        }
+
+    def write_summary(self):
+        """Rebuild _summary.csv from the manifest's summaries of the current classes"""
+        summary = []
+        for rec_file in sorted(self.known):
+            entry = self.manifest.classes.get(self.manifest.key(rec_file))
+            if entry and entry['summary']:
+                summary.append(entry['summary'])
+        return write_summary_csv(summary, self.output_dir)
+
+
+def format_event(event):
+    """One line describing a watch event"""
+    name = os.path.basename(event['rec_file'])
+    if event['status'] == 'removed':
+        return f"{name}: removed"
+    if event['status'] == 'failed':
+        return f"{name}: failed after {event['latency']:.2f}s: {event['error']}"
+    if event['status'] == 'unchanged':
+        return f"{name}: touched but unchanged"
+    since_save = '' if event['since_save'] is None else f", {event['since_save']:.2f}s after save"
+    return (f"{name}: exported {event['class_code']} ({event['num_students']} students) in "
+            f"{event['convert_seconds']:.2f}s, {event['latency']:.2f}s after the change was seen{since_save}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-export classes to CSV as their gradebooks are saved")
+    parser.add_argument('--classes-dir', default=r'S:\Chn\classes')
+    parser.add_argument('--output-dir', default=r'S:\Chn\classes\csv_exports_python')
+    parser.add_argument('--recursive', action='store_true', help="also watch subdirectories")
+    parser.add_argument('--settle', type=float, default=SETTLE_SECONDS,
+                        help=f"seconds a class's files must stay unchanged before export (default {SETTLE_SECONDS})")
+    parser.add_argument('--delta', action='store_true',
+                        help="rewrite only the changed students' rows and log them to _change_feed.csv")
+    args = parser.parse_args(argv)
+
+    convert = convert_class_to_csv
+    if args.delta:
+        from record_diff import update_class_csv
+        convert = update_class_csv
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    watcher = ClassWatcher(args.classes_dir, args.output_dir, recursive=args.recursive, convert=convert,
+                           settle=args.settle)
+    watcher.start()
+    print(f"Watching {len(watcher.known)} classes in {args.classes_dir} (Ctrl+C to stop)\n")
+    try:
+        while True:
+            for event in watcher.poll():
+                print(format_event(event))
+            time.sleep(watcher.interval)
+    except KeyboardInterrupt:
+        print("\nStopped")
+
+
+if __name__ == '__main__':
+    main()